@@ -28,10 +28,16 @@ Long description of module's purpose
         'data/approved_mail_template.xml',
         'data/cancelled_mail_template.xml',
         'data/employee_mail_template.xml',
+        'data/ir_cron.xml',
         'report/badge_report.xml',
         'views/visit_views.xml',
         'views/customfield_views.xml',
+        'views/gate_device_views.xml',
+        'views/visitor_mail_views.xml',
+        'views/visit_archive_views.xml',
         'wizard/cancel_wizard_view.xml',
+        'wizard/badge_batch_wizard_view.xml',
+        'wizard/visit_import_wizard_view.xml',
         'views/menu.xml',        
     ],
     
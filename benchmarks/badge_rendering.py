@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Per-badge vs batched badge rendering for one day's approved visits.
+
+Run inside an Odoo shell, which provides ``env``:
+
+    BENCH_DATE=2025-01-31 BENCH_LOCATION=3 \
+        odoo-bin shell -d <db> --no-http < visitor_management/benchmarks/badge_rendering.py
+
+Nothing is stored: badges are rendered straight through the report, bypassing
+the badge attachment cache.
+"""
+import json
+import os
+import time
+from datetime import date, timedelta
+
+
+def run(env, day=None, location_id=None):
+    Visit = env['visit.information']
+    day = day or date.today() + timedelta(days=1)
+    visits = Visit._get_day_badge_visits(day, location_id)
+    if not visits:
+        return {"date": str(day), "badges": 0}
+
+    started = time.perf_counter()
+    for visit in visits:
+        visit._render_badges_chunk()
+    per_badge = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pdf = visits._render_badges_pdf()
+    batched = time.perf_counter() - started
+
+    return {
+        "date": str(day),
+        "location_id": location_id,
+        "badges": len(visits),
+        "per_badge_seconds": round(per_badge, 3),
+        "batched_seconds": round(batched, 3),
+        "speedup": round(per_badge / batched, 2) if batched else None,
+        "batched_pdf_bytes": len(pdf),
+    }
+
+
+if 'env' in globals():
+    print(json.dumps(run(
+        env,  # noqa: F821 (odoo shell)
+        os.environ.get('BENCH_DATE'),
+        os.environ.get('BENCH_LOCATION'),
+    ), indent=2))
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Latency of the daily-path queries before and after archiving old visits.
+
+Run inside an Odoo shell on a scratch database (seed data is committed):
+
+    BENCH_VISITS=5000000 BENCH_REPEAT=50 BENCH_ARCHIVE=1 BENCH_OUTPUT=archive.json \
+        odoo-bin shell -d <db> --no-http < visitor_management/benchmarks/daily_path.py
+
+Historical visits are inserted with plain SQL (the ORM would take hours for
+millions of rows), spread over the past three years, plus a few hundred
+visits today. They carry no chatter or images, so the gain measured for a
+production table, which has both, is a lower bound. With BENCH_ARCHIVE=1
+the archive cron is run until nothing older than the retention window is
+left, the table is analyzed, and every query is measured again.
+"""
+import json
+import os
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+SEED_MARKER = 'BENCH-ARCHIVE'  # visit.information.company of seeded visits
+SEED_BATCH = 500000
+SEED_DAYS = 3 * 365
+TODAY_VISITS = 500
+
+
+def seed(env, visits):
+    """Make sure ``visits`` historical visits and TODAY_VISITS visits for today exist."""
+    company = env.company
+    location = env['company.location'].sudo().search(
+        [('company_id', '=', company.id), ('name', '=', 'Bench Location')], limit=1
+    ) or env['company.location'].sudo().create({'name': 'Bench Location', 'company_id': company.id})
+    employee = env['hr.employee'].sudo().search([('name', '=', 'Bench Host')], limit=1) \
+        or env['hr.employee'].sudo().create({'name': 'Bench Host', 'company_id': company.id})
+    device = env['visitor.gate.device'].sudo().search([('name', '=', 'Bench Archive Gate')], limit=1) \
+        or env['visitor.gate.device'].sudo().create({'name': 'Bench Archive Gate', 'company_id': company.id})
+
+    env.cr.execute("SELECT count(*) FROM visit_information WHERE company = %s", [SEED_MARKER])
+    existing = env.cr.fetchone()[0]
+    for start in range(existing, visits, SEED_BATCH):
+        env.cr.execute("""
+            INSERT INTO visit_information (
+                name, phone, company, company_id, location_id, employee, visiting_date, status,
+                visit_type, qr_token, on_site, create_uid, write_uid, create_date, write_date)
+            SELECT 'Bench Visitor ' || i, lpad((7000000000 + i)::text, 10, '0'), %(marker)s,
+                   %(company)s, %(location)s, %(employee)s, d, (ARRAY['pending', 'approved', 'approved', 'cancelled'])[1 + i %% 4],
+                   'pre', md5(i::text || random()::text), false, %(uid)s, %(uid)s, d, d
+              FROM generate_series(%(start)s, %(stop)s) AS i,
+                   LATERAL (SELECT (now() at time zone 'UTC') - (1 + i %% %(days)s) * interval '1 day'
+                                   - (i %% 600) * interval '1 minute' AS d) AS dates
+        """, {
+            'marker': SEED_MARKER, 'company': company.id, 'location': location.id, 'employee': employee.id,
+            'uid': env.uid, 'start': start, 'stop': min(start + SEED_BATCH, visits) - 1, 'days': SEED_DAYS,
+        })
+        env.cr.commit()
+
+    Visit = env['visit.information'].sudo().with_context(tracking_disable=True)
+    today = Visit.search([('company', '=', SEED_MARKER), ('visiting_date', '>=', datetime.combine(date.today(), datetime.min.time()))])
+    if len(today) < TODAY_VISITS:
+        today |= Visit.create([{
+            'name': f"Bench Today {i}",
+            'phone': f"8{i:09d}",
+            'company': SEED_MARKER,
+            'company_id': company.id,
+            'location_id': location.id,
+            'employee': employee.id,
+            'visiting_date': datetime.now(),
+            'status': 'approved',
+        } for i in range(len(today), TODAY_VISITS)])
+    env.cr.execute("ANALYZE visit_information")
+    env.cr.commit()
+    return {'today': today, 'device': (device.id, company.id, False)}
+
+
+def _time(env, func, repeat):
+    timings = []
+    for _i in range(repeat):
+        env.invalidate_all()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+    }
+
+
+def measure(env, ctx, repeat):
+    from odoo.addons.visitor_management.models import visit as visit_module
+
+    Visit = env['visit.information'].sudo()
+    today = datetime.combine(date.today(), datetime.min.time())
+    tomorrow = today + timedelta(days=1)
+    rng = random.Random(7)
+    visits = ctx['today']
+
+    def find_today_visitor():
+        Visit.search([('phone', '=', rng.choice(visits).phone),
+                      ('visiting_date', '>=', today), ('visiting_date', '<', tomorrow)], limit=1)
+
+    def verify_qr():
+        Visit.search([('qr_token', '=', rng.choice(visits).qr_token)], limit=1).status
+
+    def dashboard():
+        visit_module._dashboard_cache.clear()
+        Visit.get_dashboard_data(breakdown=list(visit_module.DASHBOARD_BREAKDOWNS))
+
+    def gate_sync():
+        Visit._gate_sync_rows(ctx['device'])
+
+    env.cr.execute("SELECT pg_total_relation_size('visit_information'), count(*) FROM visit_information")
+    size, rows = env.cr.fetchone()
+    return {
+        'visit_rows': rows,
+        'visit_table_mb': round(size / 1024 / 1024, 1),
+        'queries': {
+            name: _time(env, func, repeat)
+            for name, func in (
+                ('find_today_visitor', find_today_visitor),
+                ('verify_qr', verify_qr),
+                ('dashboard', dashboard),
+                ('gate_sync', gate_sync),
+            )
+        },
+    }
+
+
+def archive_all(env):
+    """Run the archive cron until no visit older than the retention window is left."""
+    Archive = env['visit.archive'].sudo()
+    started = time.perf_counter()
+    while True:
+        # same access path as the cron's batch query
+        env.cr.execute("""
+            SELECT id FROM visit_information
+             WHERE COALESCE(visiting_date, create_date) < %s
+          ORDER BY id LIMIT 1
+        """, [Archive._get_cutoff()])
+        if not env.cr.fetchone():
+            break
+        Archive._cron_archive()
+        env.cr.commit()
+    env.cr.execute("ANALYZE visit_information")
+    env.cr.commit()
+    return round(time.perf_counter() - started, 1)
+
+
+def run(env, visits=1000000, repeat=50, archive=False):
+    import odoo
+    ctx = seed(env, visits)
+    result = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'database': env.cr.dbname,
+            'odoo': odoo.release.version,
+            'seeded_visits': visits,
+            'repeat': repeat,
+        },
+        'before': measure(env, ctx, repeat),
+    }
+    if archive:
+        result['archive_seconds'] = archive_all(env)
+        result['after'] = measure(env, ctx, repeat)
+    return result
+
+
+if 'env' in globals():
+    output = run(
+        env,  # noqa: F821 (odoo shell)
+        visits=int(os.environ.get('BENCH_VISITS', 1000000)),
+        repeat=int(os.environ.get('BENCH_REPEAT', 50)),
+        archive=os.environ.get('BENCH_ARCHIVE') == '1',
+    )
+    print(json.dumps(output, indent=2))
+    if os.environ.get('BENCH_OUTPUT'):
+        with open(os.environ['BENCH_OUTPUT'], 'w') as f:
+            json.dump(output, f, indent=2)
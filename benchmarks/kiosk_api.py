@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""Throughput, latency and SQL queries per request of the public kiosk routes.
+
+Run inside an Odoo shell on a scratch database (seed data is committed):
+
+    BENCH_VISITS=100000 BENCH_REQUESTS=200 BENCH_CONCURRENCY=8 BENCH_OUTPUT=kiosk.json \
+        odoo-bin shell -d <db> --no-http < visitor_management/benchmarks/kiosk_api.py
+
+Requests go through the real WSGI application in-process (werkzeug test
+client): routing, auth, JSON handling and one transaction per request as in
+production, without the network hop. SMS is sent with the ``log`` transport,
+so the gateway is never called. Every scenario prepares its own inputs (fresh
+phone numbers, OTP codes, approved visits), measures queries per request on a
+sequential sample, then times the rest with BENCH_CONCURRENCY threads.
+
+Compare two saved runs (exits 1 on a regression beyond BENCH_TOLERANCE percent):
+
+    python visitor_management/benchmarks/kiosk_api.py before.json after.json
+"""
+import base64
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+SEED_MARKER = 'BENCH'  # visit.information.company of seeded visits
+SEED_BATCH = 1000
+QUERY_SAMPLE = 20
+DEVICE_KEY = 'bench-device'
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _phones(prefix, count):
+    # 10 digits, unique per run so OTP rate limits and today's-visit lookups start clean
+    return [f"{prefix}{i:06d}"[:10] for i in range(count)]
+
+
+def _photo():
+    from PIL import Image
+    image = Image.effect_noise((640, 480), 64).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=80)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def seed(env, visits):
+    """Make sure ``visits`` seeded visits exist (spread over the past year), plus a gate device."""
+    Visit = env['visit.information'].sudo().with_context(
+        tracking_disable=True, mail_create_nolog=True, mail_notrack=True)
+    company = env.company
+    location = env['company.location'].sudo().search(
+        [('company_id', '=', company.id), ('name', '=', 'Bench Location')], limit=1
+    ) or env['company.location'].sudo().create({'name': 'Bench Location', 'company_id': company.id})
+
+    employees = env['hr.employee'].sudo().search([('name', '=like', 'Bench Employee %')])
+    if len(employees) < 50:
+        employees |= env['hr.employee'].sudo().create([
+            {'name': f"Bench Employee {i}", 'company_id': company.id, 'work_email': f"bench{i}@example.com"}
+            for i in range(len(employees), 50)
+        ])
+
+    if not env['visitor.gate.device'].sudo().search([('device_key', '=', DEVICE_KEY)]):
+        env['visitor.gate.device'].sudo().create({'name': 'Bench Gate', 'device_key': DEVICE_KEY, 'company_id': company.id})
+
+    existing = Visit.search_count([('company', '=', SEED_MARKER)])
+    now = datetime.now()
+    rng = random.Random(42)
+    for start in range(existing, visits, SEED_BATCH):
+        Visit.create([{
+            'name': f"Bench Visitor {i}",
+            'phone': f"7{i:09d}",
+            'company': SEED_MARKER,
+            'company_id': company.id,
+            'location_id': location.id,
+            'employee': rng.choice(employees).id,
+            'visiting_date': now - timedelta(days=rng.randint(0, 365), minutes=rng.randint(0, 600)),
+            'status': rng.choice(['pending', 'approved', 'approved', 'cancelled']),
+        } for i in range(start, min(start + SEED_BATCH, visits))])
+        env.cr.commit()
+    env.cr.commit()
+    return {'company': company, 'location': location, 'employees': employees}
+
+
+def _approved_today(env, ctx, count, prefix):
+    Visit = env['visit.information'].sudo().with_context(tracking_disable=True)
+    visits = Visit.create([{
+        'name': f"Bench Today {phone}",
+        'phone': phone,
+        'company': SEED_MARKER,
+        'company_id': ctx['company'].id,
+        'location_id': ctx['location'].id,
+        'employee': ctx['employees'][i % len(ctx['employees'])].id,
+        'visiting_date': datetime.now(),
+        'status': 'approved',
+    } for i, phone in enumerate(_phones(prefix, count))])
+    env.cr.commit()
+    return visits
+
+
+def scenarios(env, ctx, count):
+    """{name: [(path, body, is_json_rpc), ...]} with ``count`` prepared requests each."""
+    run = random.randint(10, 99)
+    employee_ids = ctx['employees'].ids
+
+    verify_phones = _phones(f"61{run}", count)
+    codes = [env['visitor.otp'].sudo()._issue(phone) for phone in verify_phones]
+    env.cr.commit()
+
+    form_phones = _phones(f"62{run}", count)
+    photo_visits = _approved_today(env, ctx, count, f"63{run}")
+    checkin_visits = _approved_today(env, ctx, count, f"64{run}")
+    verify_visits = _approved_today(env, ctx, count, f"65{run}")
+    photo = _photo()
+
+    return {
+        'send_otp': [('/visitor/SendOTP', {'mobileNumber': phone}, False)
+                     for phone in _phones(f"60{run}", count)],
+        'verify_otp': [('/visitor/verifyOTP', {'mobileNumber': phone, 'accessToken': code}, True)
+                       for phone, code in zip(verify_phones, codes)],
+        'submit_form': [('/visitor/submitForm', {
+            'name': f"Bench Form {phone}", 'phone': phone, 'employee': employee_ids[i % len(employee_ids)],
+        }, True) for i, phone in enumerate(form_phones)],
+        'nda_photo': [('/visitor/nda_photo', {'visitor_id': visit.id, 'photo_answer': photo}, True)
+                      for visit in photo_visits],
+        'checkin_out': [('/visitor/checkin_out', {'visitor_id': visit.id, 'action': 'checkin'}, True)
+                        for visit in checkin_visits],
+        'verify_qr': [(f'/visitor/verify/{visit.qr_token}', {'device': DEVICE_KEY}, True)
+                      for visit in verify_visits],
+    }
+
+
+def _request(client, path, body, is_json_rpc, remote_addr):
+    started = time.perf_counter()
+    response = client.post(path, data=json.dumps(body), content_type='application/json',
+                           environ_base={'REMOTE_ADDR': remote_addr})
+    elapsed = time.perf_counter() - started
+    ok = response.status_code == 200
+    if ok:
+        try:
+            payload = json.loads(response.get_data())
+            payload = payload.get('result', payload) if is_json_rpc else payload
+            ok = isinstance(payload, dict) and payload.get('Status') == 1
+        except ValueError:
+            ok = False
+    return elapsed, ok
+
+
+def measure(requests_, concurrency):
+    from odoo import sql_db
+    from odoo.http import root
+    from werkzeug.test import Client
+
+    def addr(i):
+        # spread over many addresses so per-IP OTP rate limits do not skew the run
+        return f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+
+    # queries per request, one request at a time so the global counter is exact
+    sample, rest = requests_[:QUERY_SAMPLE], requests_[QUERY_SAMPLE:]
+    client = Client(root)
+    queries = []
+    for i, (path, body, is_json_rpc) in enumerate(sample):
+        before = sql_db.sql_counter
+        _request(client, path, body, is_json_rpc, addr(i))
+        queries.append(sql_db.sql_counter - before)
+
+    local = threading.local()
+
+    def worker(item):
+        i, (path, body, is_json_rpc) = item
+        if not hasattr(local, 'client'):
+            local.client = Client(root)
+        return _request(local.client, path, body, is_json_rpc, addr(QUERY_SAMPLE + i))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, enumerate(rest)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for elapsed, _ok in results)
+    return {
+        'requests': len(rest),
+        'errors': sum(1 for _elapsed, ok in results if not ok),
+        'throughput_rps': round(len(rest) / wall, 2) if wall else None,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'queries_per_request': round(statistics.mean(queries), 1) if queries else None,
+        'queries_max': max(queries) if queries else None,
+    }
+
+
+def run(env, visits=10000, requests_=200, concurrency=8, only=None):
+    config = env['ir.config_parameter'].sudo()
+    previous_transport = config.get_param('visitor.sms.transport')
+    config.set_param('visitor.sms.transport', 'log')
+    env.cr.commit()
+    try:
+        ctx = seed(env, visits)
+        prepared = scenarios(env, ctx, requests_ + QUERY_SAMPLE)
+        results = {
+            name: measure(items, concurrency)
+            for name, items in prepared.items()
+            if not only or name in only
+        }
+    finally:
+        config.set_param('visitor.sms.transport', previous_transport or False)
+        env.cr.commit()
+
+    import odoo
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'database': env.cr.dbname,
+            'odoo': odoo.release.version,
+            'seeded_visits': env['visit.information'].sudo().search_count([('company', '=', SEED_MARKER)]),
+            'requests': requests_,
+            'concurrency': concurrency,
+        },
+        'scenarios': results,
+    }
+
+
+def compare(before, after, tolerance=10.0):
+    """Print per-scenario changes; True when p95 latency or queries per request regressed."""
+    regressed = False
+    print(f"{'scenario':<14}{'rps':>18}{'p95 ms':>18}{'queries':>18}")
+    for name, new in after['scenarios'].items():
+        old = before['scenarios'].get(name)
+        if not old:
+            continue
+        cells = []
+        for key, worse_if_higher in (('throughput_rps', False), ('p95_ms', True), ('queries_per_request', True)):
+            a, b = old.get(key), new.get(key)
+            change = ((b - a) / a * 100) if a and b is not None else 0.0
+            if (change > tolerance if worse_if_higher else change < -tolerance):
+                regressed = True
+                flag = '!'
+            else:
+                flag = ' '
+            cells.append(f"{a}->{b} ({change:+.0f}%){flag}")
+        print(f"{name:<14}" + "".join(f"{cell:>18}" for cell in cells))
+    return regressed
+
+
+if 'env' in globals():
+    output = run(
+        env,  # noqa: F821 (odoo shell)
+        visits=int(os.environ.get('BENCH_VISITS', 10000)),
+        requests_=int(os.environ.get('BENCH_REQUESTS', 200)),
+        concurrency=int(os.environ.get('BENCH_CONCURRENCY', 8)),
+        only=[name for name in os.environ.get('BENCH_ONLY', '').split(',') if name] or None,
+    )
+    print(json.dumps(output, indent=2))
+    if os.environ.get('BENCH_OUTPUT'):
+        with open(os.environ['BENCH_OUTPUT'], 'w') as f:
+            json.dump(output, f, indent=2)
+elif __name__ == '__main__' and len(sys.argv) == 3:
+    with open(sys.argv[1]) as f_before, open(sys.argv[2]) as f_after:
+        sys.exit(1 if compare(json.load(f_before), json.load(f_after),
+                              float(os.environ.get('BENCH_TOLERANCE', 10))) else 0)
@@ -1,3 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from . import api
+from . import kiosk
+from . import gate
+from . import occupancy
+from . import metrics
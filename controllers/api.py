@@ -1,15 +1,19 @@
 # -*- coding: utf-8 -*-
-from dataclasses import fields
+import base64
+import hashlib
 import json
-import random
-import requests
 import logging
+import tempfile
+from contextlib import contextmanager
 from odoo import http, fields as odoo_fields
 from odoo.http import Response, request
-from datetime import date, datetime, timedelta
-from odoo import _
+from datetime import date, datetime
+from odoo.osv import expression
 from werkzeug.exceptions import NotFound
-from odoo.addons.bus.models.bus import dispatch
+from psycopg2 import errors
+
+from ..models.instrumentation import instrument
+from ..models.sms_gateway import SMSUtils
 
 
 # ...
@@ -19,7 +23,11 @@ now = odoo_fields.Datetime.now()
 
 _logger = logging.getLogger(__name__)
 
+# Odoo retries the whole request on these; they must never become an error response
+CONCURRENCY_ERRORS = (errors.SerializationFailure, errors.LockNotAvailable, errors.DeadlockDetected)
+
 
+@instrument
 class VisitorSMS(http.Controller):
 
     @http.route('/visitor/send_sms', auth='public', type='json', methods=['POST'], csrf=False)
@@ -37,20 +45,17 @@ class VisitorSMS(http.Controller):
         
         
         # Base URL
-        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        base_url = request.env['ir.config_parameter'].sudo().get_param('web.base.url')
 
         # Generate download link
         download_link = f"{base_url}/web/content/{visitor.attachment_id.id}?download=True"
         sms_text = f"Hi {visitor.name}, your visit is approved. Download your pass here: {download_link}"
 
-        # Send SMS
-        success = SMSUtils.send_sms_route_mobile(request.env, phone, country_code, sms_text)
-
-        if success:
-            return {"Status": 1, "Message": "Download link sent via SMS"}
-        else:
-            return {"Status": 0, "Message": "Failed to send SMS"}
+        # Queue SMS
+        SMSUtils.queue_sms(request.env, phone, country_code.lstrip('+'), sms_text, visit=visitor)
+        return {"Status": 1, "Message": "Download link queued for SMS"}
     
+@instrument
 class VisitorQRController(http.Controller):
 
     @http.route(['/visitor/verify/<string:token>'], type='json', auth='public', methods=['POST'], csrf=False)
@@ -64,7 +69,7 @@ class VisitorQRController(http.Controller):
             data = {}
 
             # Device check
-            if device != "1234":
+            if not request.env['visitor.gate.device']._authenticate(device):
                 return {"Status": 0, "Message": f"Device id not matched. Got: {device}", "Data": data}
             
             # Verify QR & Visitor
@@ -90,8 +95,82 @@ class VisitorQRController(http.Controller):
             _logger.exception("Error in QR verification")
             return {"Status": -1, "Message": f"Internal Server Error: {str(e)}", "Data": {}}
 
+    @http.route(['/visitor/scan/<string:token>'], type='json', auth='public', methods=['POST'], csrf=False)
+    def scan_qr(self, token, **kw):
+        """Verify a pass and check the visitor in or out in one call.
+
+        Payload: {"device": <device key>, "action": optional "checkin" / "checkout"}.
+        Without an action the scan toggles; a repeated scan is answered as a duplicate.
+        """
+        try:
+            payload = request.httprequest.get_json(force=True, silent=True) or {}
+            device = request.env['visitor.gate.device']._authenticate(payload.get("device"))
+            if not device:
+                return {"Status": 0, "Message": "Unknown device.", "Data": {}}
+
+            action = payload.get("action") or None
+            if action not in (None, "checkin", "checkout"):
+                return {"Status": 0, "Message": "Invalid action. Use 'checkin' or 'checkout'.", "Data": {}}
+
+            row = request.env['visit.information'].sudo()._gate_scan(token, device, action)
+            if not row:
+                return {"Status": 0, "Message": "QR does not match any visitor approved for today.", "Data": {}}
+
+            data = {
+                "VisitorID": row['id'],
+                "name": row['name'],
+                "check_in": odoo_fields.Datetime.to_string(row['new_in']) if row['new_in'] else None,
+                "check_out": odoo_fields.Datetime.to_string(row['new_out']) if row['new_out'] else None,
+                "instruction": row['instructions'],
+            }
+            if row['action'] == "checkin":
+                return {"Status": 1, "Message": "Visitor check-in successful.", "Action": "checkin", "Data": data}
+            if row['action'] == "checkout":
+                return {"Status": 1, "Message": "Visitor check-out successful.", "Action": "checkout", "Data": data}
+            if row['duplicate']:
+                last = "checkout" if row['old_out'] else "checkin"
+                return {"Status": 1, "Message": "Duplicate scan ignored.", "Action": last, "Duplicate": True, "Data": data}
+            if row['old_out']:
+                return {"Status": 0, "Message": "Already checked out.", "Data": data}
+            if not row['old_in']:
+                return {"Status": 0, "Message": "Cannot check-out before check-in.", "Data": data}
+            return {"Status": 0, "Message": "Already checked in.", "Data": data}
+
+        except CONCURRENCY_ERRORS:
+            # a scan racing another one on the same pass: Odoo re-runs the request,
+            # which then sees the first scan and answers it as a duplicate
+            raise
+        except Exception as e:
+            _logger.exception("Error in QR scan")
+            return {"Status": -1, "Message": f"Internal Server Error: {str(e)}", "Data": {}}
+
         
+LOGO_SIZES = {'128', '256', '512', '1024', '1920'}
+LOGO_MAX_AGE = 365 * 24 * 60 * 60
+
+
 class SendmeCommon:
+    @staticmethod
+    def logo_hashes(env, companies):
+        """{company id: checksum of its logo}, read from the attachments in one query"""
+        attachments = env['ir.attachment'].sudo().search_read([
+            ('res_model', '=', 'res.partner'),
+            ('res_field', '=', 'image_1920'),
+            ('res_id', 'in', companies.partner_id.ids),
+        ], ['res_id', 'checksum'])
+        by_partner = {a['res_id']: a['checksum'] for a in attachments}
+        return {company.id: by_partner.get(company.partner_id.id, "") for company in companies}
+
+    @staticmethod
+    def conditional_json_response(payload, etag=None):
+        """JSON response carrying an ETag; answers 304 when the client already has it."""
+        body = json.dumps(payload, default=str, sort_keys=True)
+        etag = etag or hashlib.sha1(body.encode()).hexdigest()
+        headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'no-cache')]
+        if etag in request.httprequest.if_none_match:
+            return Response(status=304, headers=headers)
+        return request.make_response(body, headers=headers + [('Content-Type', 'application/json')])
+
     @staticmethod
     def _process_request_body(request_data, kw=None):
         request_data_str = request_data.decode('utf-8').strip()
@@ -103,22 +182,19 @@ class SendmeCommon:
                 return {}
         return {}
     
-class Otp(http.Controller):
+OTP_ERRORS = {
+    "invalid": "Invalid OTP!",
+    "expired": "OTP expired. Please request a new one.",
+    "locked": "Too many wrong attempts. Please request a new OTP.",
+}
 
-    def _get_today_range(self):
-        """Return datetime range for today."""
-        today = datetime.today().date()
-        tomorrow = today + timedelta(days=1)
-        return today, tomorrow
+
+@instrument
+class Otp(http.Controller):
 
     def _find_today_visitor(self, mobile):
         """Find visitor by mobile for today's date only."""
-        today, tomorrow = self._get_today_range()
-        return request.env['visit.information'].sudo().search([
-            ("phone", "=", mobile),
-            ("visiting_date", ">=", today),
-            ("visiting_date", "<", tomorrow)
-        ], limit=1)
+        return request.env['visit.information'].sudo()._find_today_visitor(mobile)
 
     @http.route('/visitor/SendOTP', auth='public', methods=['POST'], csrf=False)
     def send_otp(self, **kw):
@@ -134,32 +210,24 @@ class Otp(http.Controller):
                 "Message": "Invalid request. Mobile number is required."
             })
 
-        otp_code = str(random.randint(100000, 999999))
-        sms_text = f"{otp_code} is your one time password for SendMe Technologies"
-        now = datetime.now()
-        
-        visitor = self._find_today_visitor(mobile)
-        if visitor:
-            _logger.info(f"Writing OTP {otp_code} to visitor {visitor.id}")
-            visitor.sudo().write({
-                'otp_code': otp_code,
-                'last_otp_time': now
-            })
-            _logger.info(f"After write, visitor otp_code={visitor.otp_code}")
+        RateLimit = request.env['visitor.rate.limit'].sudo()
+        if not (RateLimit._consume('otp_send_ip', request.httprequest.remote_addr)
+                and RateLimit._consume('otp_send_phone', mobile)):
+            return request.make_json_response({
+                "Status": 0,
+                "Message": "Too many OTP requests. Please wait and try again."
+            }, status=429)
 
-        else:
-            visitor = request.env["visit.information"].sudo().create({
-                "phone": mobile,
-                "otp_code": otp_code,
-                "visiting_date": now
-            })
+        # The code only lives in visitor.otp; no visit row until it is verified
+        otp_code = request.env['visitor.otp'].sudo()._issue(mobile)
+        sms_text = f"{otp_code} is your one time password for SendMe Technologies"
 
         response = SMSUtils.send_sms_route_mobile(request.env, mobile, country_code, sms_text)
 
         return request.make_json_response({
             "Status": 1 if response else 0,
             "Message": "OTP sent successfully." if response else "Failed to send OTP. Please try again.",
-            "Data": int(otp_code) if response else None
+            "Data": None
         })
 
 
@@ -168,9 +236,9 @@ class Otp(http.Controller):
         try:
             payload = request.httprequest.get_json(force=True, silent=True) or {}
             mobile = payload.get("mobileNumber")
-            otp = payload.get("accessToken")
+            otp = str(payload.get("accessToken") or "")
 
-            _logger.info(f"Incoming OTP Payload: {payload}")
+            _logger.info("Incoming OTP verification for %s", mobile)
 
             if not mobile or not otp:
                 return {
@@ -179,25 +247,27 @@ class Otp(http.Controller):
                     "Data": {}
                 }
 
-            # search visitor for today
-            today, tomorrow = self._get_today_range()
-            visitor = request.env['visit.information'].sudo().search([
-                ('phone', '=', mobile),
-                ('visiting_date', '>=', today),
-                ('visiting_date', '<', tomorrow)
-            ], limit=1)
-            
-           
-            if not otp.isdigit() or int(otp) != int(visitor.otp_code or 0):
+            if not request.env['visitor.rate.limit'].sudo()._consume('otp_verify_ip', request.httprequest.remote_addr):
+                return {"Status": 0, "Message": "Too many attempts. Please wait and try again.", "Data": {}}
+
+            result = request.env['visitor.otp'].sudo()._verify(mobile, otp) if otp.isdigit() else "invalid"
+            if result != "ok":
                 return {
                     "Status": 0,
-                    "Message": "Invalid OTP!",
+                    "Message": OTP_ERRORS[result],
                     "Data": {}
                 }
 
-           
-            if not visitor or not visitor.name:
-                return {"Status": 1, "Message": "New user - please register", "Data": {}, "Newuser": 1}
+            # search visitor for today; a verified number gets its visit row now
+            visitor = self._find_today_visitor(mobile)
+            if not visitor:
+                visitor = request.env["visit.information"].sudo().create({
+                    "phone": mobile,
+                    "visiting_date": odoo_fields.Datetime.now(),
+                })
+
+            if not visitor.name:
+                return {"Status": 1, "Message": "New user - please register", "Data": {}, "Newuser": 1, "VisitorID": visitor.id}
 
             
             if visitor.status != "approved":
@@ -214,6 +284,8 @@ class Otp(http.Controller):
                 "VisitorID": visitor.id
             }
 
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.exception("Error in OTP verification")
             return {
@@ -252,19 +324,8 @@ class Otp(http.Controller):
                     check_in_time = datetime.now()
                     visitor.sudo().write({'check_in': check_in_time})
 
-                    # Notify employee
-                    if visitor.employee and visitor.employee.user_id:
-                        message = {
-                            'title': "Visitor Check-in",
-                            'message': f"{visitor.name} has checked in at {check_in_time.strftime('%H:%M')}.",
-                            'sticky': True,
-                            'type': 'info'
-                        }
-                        request.env['bus.bus']._sendone(
-                            visitor.employee.user_id.partner_id,
-                            'simple_notification',
-                            message
-                        )
+                    # Notify employee (coalesced and delivered by the notification worker)
+                    request.env['visitor.notification']._notify(visitor, 'checkin', check_in_time)
 
                     data = {
                         "name": visitor.name,
@@ -281,19 +342,8 @@ class Otp(http.Controller):
                     check_out_time = datetime.now()
                     visitor.sudo().write({'check_out': check_out_time})
 
-                    # Notify employee
-                    if visitor.employee and visitor.employee.user_id:
-                        message = {
-                            'title': "Visitor Check-out",
-                            'message': f"{visitor.name} has checked out at {check_out_time.strftime('%H:%M')}.",
-                            'sticky': True,
-                            'type': 'info'
-                        }
-                        request.env['bus.bus']._sendone(
-                            visitor.employee.user_id.partner_id,
-                            'simple_notification',
-                            message
-                        )
+                    # Notify employee (coalesced and delivered by the notification worker)
+                    request.env['visitor.notification']._notify(visitor, 'checkout', check_out_time)
 
                     data = {"name": visitor.name, "check_out": check_out_time.strftime("%Y-%m-%d %H:%M:%S")}
                     return {"Status": 1, "Message": "Visitor check-out successful.", "Data": data}
@@ -305,6 +355,8 @@ class Otp(http.Controller):
             else:
                 return {"Status": 0, "Message": "Invalid action. Use 'checkin' or 'checkout'.", "Data": {}}
 
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.exception("Error in Attendance API")
             return {"Status": -1, "Message": f"Internal Server Error: {str(e)}", "Data": {}}
@@ -312,61 +364,50 @@ class Otp(http.Controller):
 
 
 
-class SMSUtils:
-    @staticmethod
-    def send_sms_route_mobile(env, phone_number, country_code, sms_text):
-        """Send SMS using Route Mobile (you can replace with Firebase later)"""
-        config = env['ir.config_parameter'].sudo()
-        user_name = config.get_param('visitor.sms.username')
-        password = config.get_param('visitor.sms.password')
-        source = config.get_param('visitor.sms.source')
-        entity_id = config.get_param('visitor.sms.entity_id')
-        temp_id = config.get_param('visitor.sms.temp_id')
-
-        destination = f"{country_code}{phone_number}"
-
-        url = (
-            "https://sms6.rmlconnect.net:8443/bulksms/bulksms"
-            f"?username={user_name}"
-            f"&password={password}"
-            f"&type=0"
-            f"&dlr=1"
-            f"&destination={destination}"
-            f"&source={source}"
-            f"&message={sms_text}"
-            f"&entityid={entity_id}"
-            f"&tempid={temp_id}"
-        )
+UPLOAD_FIELDS = {'photo': 'photo_answer', 'nda': 'nda_answer'}
+UPLOAD_THUMBS = {'photo_answer': 'photo_thumb', 'nda_answer': 'nda_thumb'}
+UPLOAD_CHUNK = 64 * 1024
+MULTIPART_OVERHEAD = 16 * 1024
+DEFAULT_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
 
-        try:
-            response = requests.post(url, timeout=10)
-            _logger.info(f"SMS Response: {response.text}")
-            _logger.info(f"DESTINATION: {destination}")
-            _logger.info(f"SMS TEXT: {sms_text}")
-            _logger.info(f"SMS RESPONSE: {response.text}")
-            if isinstance(response.text, str):
-                split_response = response.text.split("|")
-                return split_response[0] == "1701"
-        except Exception:
-            _logger.exception("Error sending SMS via RouteMobile")
-        return False
 
+class ImageUpload:
+    # PNG, JPEG, GIF, WEBP (RIFF....WEBP)
+    SIGNATURES = (b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff', b'GIF87a', b'GIF89a')
 
-class VisitorForm(http.Controller):
+    @staticmethod
+    def max_size(env):
+        value = env['ir.config_parameter'].sudo().get_param('visitor.upload.max_size')
+        return int(value) if value and value.isdigit() else DEFAULT_UPLOAD_MAX_SIZE
 
-    def _get_today_range(self):
-        from datetime import datetime, timedelta
-        today = datetime.combine(datetime.today(), datetime.min.time())
-        tomorrow = today + timedelta(days=1)
-        return today, tomorrow
+    @staticmethod
+    def is_image(header):
+        return header.startswith(ImageUpload.SIGNATURES) or (header[:4] == b'RIFF' and header[8:12] == b'WEBP')
+
+    @staticmethod
+    @contextmanager
+    def spool(stream, max_size):
+        """Copy stream to a temporary file chunk by chunk; yields None past max_size."""
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spooled:
+            size = 0
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    yield None
+                    return
+                spooled.write(chunk)
+            spooled.seek(0)
+            yield spooled
+
+
+@instrument
+class VisitorForm(http.Controller):
 
     def _find_today_visitor(self, phone):
-        today, tomorrow = self._get_today_range()
-        return request.env['visit.information'].sudo().search([
-            ('phone', '=', phone),
-            ('visiting_date', '>=', today),
-            ('visiting_date', '<', tomorrow)
-        ], limit=1)
+        return request.env['visit.information'].sudo()._find_today_visitor(phone)
 
     def _normalize_vals(self, model, data):
         """Keep only real model fields; coerce simple m2m lists to (6,0,ids)."""
@@ -436,6 +477,27 @@ class VisitorForm(http.Controller):
 
 
 
+    @http.route('/visitor/bulk_import', auth='user', type='json', methods=['POST'], csrf=False)
+    def bulk_import(self, **kw):
+        """Pre-register many visitors at once: {"visitors": [{name, phone, email, visiting_date, employee, location_id, ...}]}"""
+        try:
+            data = request.get_json_data() or {}
+            rows = data.get("visitors") or []
+            if not isinstance(rows, list) or not rows:
+                return {"Status": 0, "Message": "visitors must be a non-empty list", "Data": {}}
+
+            result = request.env['visit.information']._import_preregistrations(rows)
+            return {
+                "Status": 1 if result["created"] else 0,
+                "Message": f"{result['created']} of {len(rows)} visitors registered",
+                "Data": result,
+            }
+        except Exception as e:
+            _logger.exception("Error in bulk visitor import")
+            return {"Status": -1, "Message": f"Internal Server Error: {str(e)}", "Data": {}}
+
+
+
     @http.route('/visitor/sendNotification', auth='public', type='http', methods=['POST'], csrf=False)
     def send_notification(self, **kw):
         try:
@@ -469,7 +531,8 @@ class VisitorForm(http.Controller):
                         "email_to": emp.work_email,
                         "lang": emp.user_id.lang or "en_US",
                     }
-                    template.sudo().with_context(ctx).send_mail(visitor.id, force_send=True)
+                    # queued; the mail flush worker delivers it
+                    visitor._queue_mail("visitor_management.email_visit_request", 'host_request', context=ctx)
                     return request.make_response(
                         json.dumps({
                             "Status": 1,
@@ -553,17 +616,16 @@ class VisitorForm(http.Controller):
             if vals:
                 visitor.sudo().write(vals)
 
-            # generate URLs for both NDA & Photo
+            # generate URLs for both NDA & Photo, plus the small variants kiosks should display
             base_url = request.httprequest.host_url.rstrip('/')
-            nda_url = f"{base_url}/web/image/visit.information/{visitor.id}/nda_answer" if visitor.nda_answer else ""
-            photo_url = f"{base_url}/web/image/visit.information/{visitor.id}/photo_answer" if visitor.photo_answer else ""
-
             return {
                 "Status": 1,
                 "Message": "NDA/Photo updated successfully!",
                 "VisitorID": visitor.id,
-                "NDA_URL": nda_url,
-                "PhotoURL": photo_url,
+                "NDA_URL": visitor._image_url(base_url, 'nda_answer'),
+                "PhotoURL": visitor._image_url(base_url, 'photo_answer'),
+                "NDAThumbURL": visitor._image_url(base_url, 'nda_thumb', 'nda_answer'),
+                "PhotoThumbURL": visitor._image_url(base_url, 'photo_thumb', 'photo_answer'),
             }
 
         except Exception as e:
@@ -571,6 +633,50 @@ class VisitorForm(http.Controller):
 
 
 
+    @http.route('/visitor/upload/<int:visitor_id>/<string:kind>', auth='public', type='http', methods=['POST'], csrf=False)
+    def upload_image(self, visitor_id, kind, **kw):
+        """Upload a photo or signature as multipart ("file" part) or as the raw request body.
+
+        The body is spooled to a temporary file within visitor.upload.max_size and its
+        header checked before anything is decoded; no base64 string is built.
+        """
+        try:
+            field_name = UPLOAD_FIELDS.get(kind)
+            if not field_name:
+                return request.make_json_response({"Status": 0, "Message": "kind must be 'photo' or 'nda'"}, status=400)
+
+            visitor = request.env["visit.information"].sudo().browse(visitor_id)
+            if not visitor.exists():
+                return request.make_json_response({"Status": 0, "Message": "Visitor not found"}, status=404)
+
+            max_size = ImageUpload.max_size(request.env)
+            httprequest = request.httprequest
+            if httprequest.content_length and httprequest.content_length > max_size + MULTIPART_OVERHEAD:
+                return request.make_json_response({"Status": 0, "Message": "File too large"}, status=413)
+
+            upload = httprequest.files.get('file')
+            stream = upload.stream if upload else httprequest.stream
+            with ImageUpload.spool(stream, max_size) as spooled:
+                if spooled is None:
+                    return request.make_json_response({"Status": 0, "Message": "File too large"}, status=413)
+                if not ImageUpload.is_image(spooled.read(16)):
+                    return request.make_json_response({"Status": 0, "Message": "Unsupported image format"}, status=415)
+                spooled.seek(0)
+                visitor._store_image_raw(field_name, spooled.read())
+
+            base_url = httprequest.host_url.rstrip('/')
+            return request.make_json_response({
+                "Status": 1,
+                "Message": "Upload stored successfully!",
+                "VisitorID": visitor.id,
+                "URL": visitor._image_url(base_url, field_name),
+                "ThumbURL": visitor._image_url(base_url, UPLOAD_THUMBS[field_name], field_name),
+            })
+
+        except Exception as e:
+            _logger.exception("Error uploading %s for visitor %s", kind, visitor_id)
+            return request.make_json_response({"Status": 0, "Message": f"Error: {str(e)}"}, status=500)
+
     @http.route('/company/getNDA', auth='public', type='http', methods=['GET'], csrf=False)
     def get_nda(self, **kw):
         try:
@@ -606,6 +712,11 @@ class VisitorForm(http.Controller):
                 headers=[("Content-Type", "application/json")]
             )
 
+EMPLOYEE_PAGE_SIZE = 20
+EMPLOYEE_MAX_PAGE_SIZE = 100
+
+
+@instrument
 class EmployeeAPI(http.Controller):
 
     @http.route('/visitor/employee', type='http', auth='public', methods=['GET'], csrf=False)
@@ -639,7 +750,70 @@ class EmployeeAPI(http.Controller):
                 "Data": []
             }, status=500)
 
- 
+    @http.route('/visitor/employee/search', type='http', auth='public', methods=['GET'], csrf=False)
+    def search_employees(self, q='', limit=EMPLOYEE_PAGE_SIZE, cursor=None, company_id=None, **kwargs):
+        """Host typeahead: match on name, email or department, keyset-paginated by (name, id).
+
+        Pass the returned NextCursor back as ``cursor`` for the following page.
+        """
+        try:
+            limit = max(1, min(int(limit), EMPLOYEE_MAX_PAGE_SIZE))
+            domain = []
+            if company_id:
+                domain.append(('company_id', '=', int(company_id)))
+
+            q = (q or '').strip()
+            if q:
+                # ilike '%q%' is served by the trigram indexes on these columns
+                domain = expression.AND([domain, [
+                    '|', '|',
+                    ('name', 'ilike', q),
+                    ('work_email', 'ilike', q),
+                    ('department_id.name', 'ilike', q),
+                ]])
+
+            if cursor:
+                last_name, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+                domain = expression.AND([domain, [
+                    '|',
+                    ('name', '>', last_name),
+                    '&', ('name', '=', last_name), ('id', '>', last_id),
+                ]])
+
+            employees = request.env['hr.employee'].sudo().search_read(
+                domain, ['name', 'job_title', 'department_id'], order='name, id', limit=limit + 1,
+            )
+            has_more = len(employees) > limit
+            employees = employees[:limit]
+            data = [{
+                "id": emp['id'],
+                "name": emp['name'],
+                "job_title": emp['job_title'],
+                "department": emp['department_id'][1] if emp['department_id'] else None,
+            } for emp in employees]
+
+            next_cursor = None
+            if has_more:
+                last = employees[-1]
+                next_cursor = base64.urlsafe_b64encode(json.dumps([last['name'], last['id']]).encode()).decode()
+
+            return request.make_json_response({
+                "Status": 1 if data else 0,
+                "Message": "Employees fetched successfully." if data else "No employees found.",
+                "Data": data,
+                "NextCursor": next_cursor,
+            })
+
+        except Exception as e:
+            _logger.exception("Error in searching employees: %s", str(e))
+            return request.make_json_response({
+                "Status": 0,
+                "Message": f"Error: {str(e)}",
+                "Data": []
+            }, status=500)
+
+
+@instrument
 class VisitorFieldAPI(http.Controller):
     
     @http.route('/visitor/fields', type='http', auth='public', methods=['GET'], csrf=False)
@@ -686,41 +860,35 @@ class VisitorFieldAPI(http.Controller):
 
 
 
+@instrument
 class CompanyAPI(http.Controller):
 
-    def _logo_b64(self, company, size_field):
-        # Try requested size field first (image_128/256/512/1024/1920), else fallback to logo/image_1920
-        bin_val = getattr(company, size_field, None) or company.logo or getattr(company, 'image_1920', None)
-        if not bin_val:
-            return ""
-        # Odoo binary fields are base64; can be bytes or str depending on context
-        return bin_val.decode('utf-8') if isinstance(bin_val, (bytes, bytearray)) else bin_val
-
     @http.route('/visitor/company', type='http', auth='public', methods=['GET'], csrf=False)
     def get_company(self, **kwargs):
         try:
-            # optional: pick image size; default to 128 to keep responses small
+            # optional: pick image size for the logo URLs; default to 128 to keep downloads small
             size = kwargs.get('size', '128')
-            size_field = f"image_{size}" if size in {'128','256','512','1024','1920'} else 'image_128'
+            size = size if size in LOGO_SIZES else '128'
 
             companies = request.env['res.company'].sudo().search([], limit=100)
+            logo_hashes = SendmeCommon.logo_hashes(request.env, companies)
 
             data = []
             for company in companies:
+                logo_hash = logo_hashes[company.id]
                 company_data = {
                     "id": company.id,
                     "name": company.name,
                     "email": company.email,
                     "phone": company.phone,
                     "website": company.website,
-                    # base64 instead of URL
-                    "logo_base64": self._logo_b64(company, size_field),
-                    # if you prefer a data URI form for direct <img src>, uncomment next line:
-                    # "logo_data_uri": f"data:image/png;base64,{self._logo_b64(company, size_field)}" if self._logo_b64(company, size_field) else ""
+                    # logos are fetched separately and cached by the kiosk
+                    "logo_url": f"/visitor/company/{company.id}/logo?size={size}&unique={logo_hash}" if logo_hash else "",
+                    "logo_hash": logo_hash,
                 }
                 data.append(company_data)
 
-            return request.make_json_response({
+            return SendmeCommon.conditional_json_response({
                 "Status": 1 if data else 0,
                 "Message": "Companies fetched successfully" if data else "No companies found",
                 "Data": data
@@ -734,6 +902,17 @@ class CompanyAPI(http.Controller):
                 "Data": []
             }, status=500)
 
+    @http.route('/visitor/company/<int:company_id>/logo', type='http', auth='public', methods=['GET'], csrf=False)
+    def get_company_logo(self, company_id, size='128', unique=None, **kwargs):
+        """Company logo with ETag/Last-Modified; immutable for a year when requested with its hash."""
+        company = request.env['res.company'].sudo().browse(company_id)
+        if not company.exists():
+            raise NotFound()
+
+        field_name = f"image_{size if size in LOGO_SIZES else '128'}"
+        stream = request.env['ir.binary']._get_image_stream_from(company.partner_id, field_name)
+        return stream.get_response(max_age=LOGO_MAX_AGE if unique else 0, immutable=bool(unique))
+
 
     @http.route('/visitor/company/create', type='http', auth='public', methods=['POST'], csrf=False)
     def create_company(self, **kwargs):
@@ -805,6 +984,7 @@ class CompanyAPI(http.Controller):
 
 
 
+@instrument
 class VisitorQuestionController(http.Controller):
 
     @http.route('/visitor/get_questions', auth='public', type='http', methods=['POST'], csrf=False)
@@ -911,32 +1091,58 @@ class VisitorQuestionController(http.Controller):
             if not visitor.exists():
                 return request.make_response(json.dumps({"error": "Visitor not found"}), headers=[('Content-Type', 'application/json')])
 
+            Entry = request.env['visitor.notebook.entry'].sudo()
+
+            # Existing answers and the location's questions, one read each
+            existing = {
+                e['question_id'][0]: e for e in Entry.search_read(
+                    [('visitor_id', '=', visitor.id)], ['question_id', 'answer_selection'])
+            }
+            allowed = set(visitor.location_id.additional_question_ids.ids)
+
+            changes = {}
+            applied, rejected = [], []
             for ans in answers:
                 question_id = ans.get("question_id")
                 answer_selection = ans.get("answer_selection")
 
-                if not question_id or answer_selection not in ('yes', 'no'):
+                try:
+                    question_id = int(question_id)
+                except (TypeError, ValueError):
+                    rejected.append({"question_id": question_id, "reason": "invalid question_id"})
+                    continue
+                if answer_selection not in ('yes', 'no'):
+                    rejected.append({"question_id": question_id, "reason": "answer_selection must be 'yes' or 'no'"})
+                    continue
+                if question_id not in allowed:
+                    rejected.append({"question_id": question_id, "reason": "question does not belong to the visitor's location"})
                     continue
 
-                notebook_entry = request.env['visitor.notebook.entry'].sudo().search([
-                    ('visitor_id', '=', visitor.id),
-                    ('question_id', '=', question_id)
-                ], limit=1)
-
-                if notebook_entry:
-                    notebook_entry.sudo().write({'answer_selection': answer_selection})
+                entry = existing.get(question_id)
+                if entry is not None and entry['answer_selection'] == answer_selection:
+                    changes.pop(question_id, None)
+                    action = "unchanged"
                 else:
-                    request.env['visitor.notebook.entry'].sudo().create({
-                        'visitor_id': visitor.id,
-                        'question_id': question_id,
-                        'answer_selection': answer_selection
-                    })
+                    # last answer wins when a question is sent twice
+                    changes[question_id] = answer_selection
+                    action = "created" if entry is None else "updated"
+                applied.append({"question_id": question_id, "answer_selection": answer_selection, "action": action})
+
+            # one INSERT ... ON CONFLICT: a concurrent submit for the same question updates instead of failing
+            Entry._upsert_answers(visitor.id, changes)
 
             return request.make_response(
-                json.dumps({"success": True, "message": "Answers submitted successfully"}),
+                json.dumps({
+                    "success": True,
+                    "message": "Answers submitted successfully",
+                    "applied": applied,
+                    "rejected": rejected,
+                }),
                 headers=[('Content-Type', 'application/json')]
             )
 
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.exception("Failed to submit visitor notebook answers")
             return request.make_response(
@@ -944,6 +1150,7 @@ class VisitorQuestionController(http.Controller):
                 headers=[('Content-Type', 'application/json')]
             )
 
+@instrument
 class VisitorBadgeController(http.Controller):
 
     @http.route('/visitor/badge/<int:visitor_id>', type='http', auth='public', csrf=False, methods=['GET'])
@@ -954,10 +1161,42 @@ class VisitorBadgeController(http.Controller):
             if not visitor.exists():
                 raise NotFound("Visitor not found")
 
-            report_svc = request.env['ir.actions.report'].sudo()
-            pdf, _ = report_svc._render("visitor_management.action_visit_report", [visitor.id])
+            # a conditional GET only needs the content hash, not the PDF
+            digest = visitor._badge_content_hash()
+            etag = f'"{digest}"'
+            if digest in request.httprequest.if_none_match:
+                return Response(status=304, headers=[('ETag', etag), ('Cache-Control', 'no-cache')])
+
+            # Stored badge, re-rendered only when its content hash changes
+            attachment = visitor._get_badge_attachment()
 
             filename = f"Visitor_Pass_{visitor.display_name or visitor.name or visitor.id}.pdf"
+            stream = request.env['ir.binary']._get_stream_from(attachment)
+            stream.download_name = filename
+            response = stream.get_response(as_attachment=False)
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        except NotFound as e:
+            return request.make_response(str(e), headers=[('Content-Type', 'text/plain')])
+        except CONCURRENCY_ERRORS:
+            raise
+        except Exception as e:
+            _logger.exception("Error generating visitor badge for id=%s", visitor_id)
+            return request.make_response(f"Error generating badge: {e}", headers=[('Content-Type', 'text/plain')])
+
+    @http.route('/visitor/badges/batch', type='http', auth='user', methods=['GET'])
+    def visitor_badges_batch(self, date=None, location_id=None, **kwargs):
+        """All approved badges of a day (and location) as one multi-page PDF."""
+        try:
+            day = odoo_fields.Date.to_date(date) if date else odoo_fields.Date.context_today(request.env.user)
+            visits = request.env['visit.information']._get_day_badge_visits(day, location_id)
+            if not visits:
+                raise NotFound("No approved visits for this day")
+
+            pdf = visits._render_badges_pdf()
+            filename = f"Visitor_Passes_{day}.pdf"
             return request.make_response(
                 pdf,
                 headers=[
@@ -970,5 +1209,5 @@ class VisitorBadgeController(http.Controller):
         except NotFound as e:
             return request.make_response(str(e), headers=[('Content-Type', 'text/plain')])
         except Exception as e:
-            _logger.exception("Error generating visitor badge for id=%s", visitor_id)
-            return request.make_response(f"Error generating badge: {e}", headers=[('Content-Type', 'text/plain')])
+            _logger.exception("Error generating badge batch for %s", date)
+            return request.make_response(f"Error generating badges: {e}", headers=[('Content-Type', 'text/plain')])
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import logging
+
+from odoo import http
+from odoo.http import request
+
+from ..models.instrumentation import instrument
+from .api import CONCURRENCY_ERRORS
+
+_logger = logging.getLogger(__name__)
+
+# most gates sync many times a day with a handful of changes; below this the
+# gzip header costs more than it saves
+GZIP_MIN_SIZE = 1024
+MAX_EVENTS_PER_UPLOAD = 500
+
+
+@instrument
+class GateSyncAPI(http.Controller):
+    """Delta sync for gate devices that keep verifying QR codes while offline."""
+
+    def _device(self, key):
+        return request.env['visitor.gate.device']._authenticate(
+            key or request.httprequest.headers.get('X-Device-Key'))
+
+    @http.route('/visitor/gate/sync', type='http', auth='public', methods=['GET'], csrf=False)
+    def gate_sync(self, device=None, cursor=None, **kwargs):
+        """Today's approved visits changed since ``cursor``, as NDJSON.
+
+        The first line is a header {"cursor", "full", "count"}; the device stores
+        the cursor and sends it back on the next call. Each following line is one
+        visit: {"id", "h" (sha256 of the QR token), "name", "loc", "win", "in",
+        "out"}, or {"id", "revoked": true}. A "full" response replaces the local
+        list. Gzip-compressed when the client accepts it.
+        """
+        try:
+            gate = self._device(device)
+            if not gate:
+                return request.make_json_response({"Status": 0, "Message": "Unknown device."}, status=403)
+
+            rows, next_cursor, full = request.env['visit.information']._gate_sync_rows(gate, cursor)
+            lines = [json.dumps({"cursor": next_cursor, "full": full, "count": len(rows)}, separators=(',', ':'))]
+            lines.extend(json.dumps(row, separators=(',', ':')) for row in rows)
+            body = ("\n".join(lines) + "\n").encode()
+
+            headers = [('Content-Type', 'application/x-ndjson'), ('Cache-Control', 'no-store')]
+            if len(body) >= GZIP_MIN_SIZE and 'gzip' in request.httprequest.accept_encodings:
+                body = gzip.compress(body, compresslevel=6)
+                headers += [('Content-Encoding', 'gzip'), ('Vary', 'Accept-Encoding')]
+            return request.make_response(body, headers=headers)
+
+        except Exception as e:
+            _logger.exception("Error in gate sync")
+            return request.make_json_response({"Status": 0, "Message": f"Error: {str(e)}"}, status=500)
+
+    @http.route('/visitor/gate/events', type='json', auth='public', methods=['POST'], csrf=False)
+    def gate_events(self, **kw):
+        """Upload check-in/check-out events recorded offline.
+
+        Payload: {"device": key, "events": [{"key": idempotency key, "id": visit id,
+        "action": "checkin" / "checkout", "at": epoch seconds}, ...]}.
+        Re-sending an event is harmless: its stored result is returned again.
+        """
+        try:
+            payload = request.httprequest.get_json(force=True, silent=True) or {}
+            gate = self._device(payload.get("device"))
+            if not gate:
+                return {"Status": 0, "Message": "Unknown device.", "Data": {}}
+
+            events = payload.get("events")
+            if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+                return {"Status": 0, "Message": "events must be a list of objects.", "Data": {}}
+            if len(events) > MAX_EVENTS_PER_UPLOAD:
+                return {"Status": 0, "Message": f"At most {MAX_EVENTS_PER_UPLOAD} events per upload.", "Data": {}}
+
+            results = request.env['visit.information']._gate_apply_events(gate, events)
+            return {
+                "Status": 1,
+                "Message": "Events processed.",
+                "Data": {
+                    "applied": sum(1 for r in results if r["state"] == "applied" and not r["duplicate"]),
+                    "results": results,
+                },
+            }
+
+        except CONCURRENCY_ERRORS:
+            raise
+        except Exception as e:
+            _logger.exception("Error in gate event upload")
+            return {"Status": -1, "Message": f"Internal Server Error: {str(e)}", "Data": {}}
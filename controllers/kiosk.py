@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import logging
+import threading
+
+from odoo import http
+from odoo.http import Response, request
+
+from ..models.instrumentation import instrument
+from .api import SendmeCommon
+
+_logger = logging.getLogger(__name__)
+
+BOOTSTRAP_CACHE_SIZE = 64
+
+# (dbname, company id, location id) -> (version, body)
+_bootstrap_cache = {}
+_bootstrap_lock = threading.Lock()
+
+
+@instrument
+class KioskAPI(http.Controller):
+
+    def _bootstrap_version(self, company_id, location_id=None):
+        """Version stamp of everything in the bundle: last write and row count per table.
+
+        Any create, write or delete on those rows changes it, in every worker.
+        The company partner is included for the logo, and the departments
+        (with their parents, which may be shared) for the employees'
+        department names.
+        A bundle for one location is stamped with that location's questions
+        and fields only, and with the location id itself, so bundles of two
+        locations never share a version.
+        """
+        request.env.cr.execute("""
+            SELECT max(write_date), count(*) FROM res_company WHERE id = %(company)s
+            UNION ALL
+            SELECT max(write_date), count(*) FROM company_location
+             WHERE company_id = %(company)s AND (%(location)s IS NULL OR id = %(location)s)
+            UNION ALL
+            SELECT max(q.write_date), count(*)
+              FROM company_location_question q
+              JOIN company_location l ON l.id = q.location_id
+             WHERE l.company_id = %(company)s AND (%(location)s IS NULL OR l.id = %(location)s)
+            UNION ALL
+            SELECT max(write_date), count(*) FROM company_field
+             WHERE company_id = %(company)s AND (%(location)s IS NULL OR location_id = %(location)s)
+            UNION ALL
+            SELECT max(write_date), count(*) FROM hr_employee WHERE company_id = %(company)s AND active
+            UNION ALL
+            SELECT max(p.write_date), count(*)
+              FROM res_partner p
+              JOIN res_company c ON c.partner_id = p.id
+             WHERE c.id = %(company)s
+            UNION ALL
+            SELECT max(write_date), count(*) FROM hr_department
+             WHERE company_id = %(company)s OR company_id IS NULL
+        """, {'company': company_id, 'location': location_id})
+        stamp = "|".join(f"{write_date}:{count}" for write_date, count in request.env.cr.fetchall())
+        return hashlib.sha1(f"{company_id}|{location_id or ''}|{stamp}".encode()).hexdigest()
+
+    def _build_bootstrap(self, company, location_id=None):
+        env = request.env
+        Location = env['company.location'].sudo()
+        domain = [('company_id', '=', company.id)]
+        if location_id:
+            domain.append(('id', '=', location_id))
+        locations = Location.search(domain)
+        location_ids = locations.ids
+
+        questions = env['company.location.question'].sudo().search_read(
+            [('location_id', 'in', location_ids)],
+            ['location_id', 'question_text', 'question_type', 'required'], order='id',
+        )
+        field_cfgs = env['company.field'].sudo().search(
+            [('enabled', '=', True), ('location_id', 'in', location_ids)])
+        field_cfgs.field_id.mapped('name')  # prefetch in one query
+
+        employees = env['hr.employee'].sudo().search_read(
+            [('company_id', '=', company.id)],
+            ['name', 'work_email', 'work_phone', 'job_title', 'department_id'], order='name',
+        )
+
+        questions_by_location = {loc_id: [] for loc_id in location_ids}
+        for q in questions:
+            questions_by_location[q['location_id'][0]].append({
+                "id": q['id'],
+                "question": q['question_text'],
+                "type": q['question_type'],
+                "required": q['required'],
+            })
+        fields_by_location = {loc_id: [] for loc_id in location_ids}
+        for cfg in field_cfgs:
+            fields_by_location[cfg.location_id.id].append({
+                "id": cfg.id,
+                "field_id": cfg.field_id.id,
+                "field_name": cfg.field_id.name,
+                "label": cfg.label,
+                "type": cfg.field_type,
+                "required": cfg.required,
+            })
+
+        logo_hash = SendmeCommon.logo_hashes(env, company)[company.id]
+        return {
+            "Status": 1,
+            "Message": "Kiosk bootstrap",
+            "Company": {
+                "id": company.id,
+                "name": company.name,
+                "logo_url": f"/visitor/company/{company.id}/logo?size=128&unique={logo_hash}" if logo_hash else "",
+                "logo_hash": logo_hash,
+            },
+            "Locations": [{
+                "id": loc.id,
+                "name": loc.name,
+                "NDA": {"Enabled": loc.nda, "Required": loc.nda_required},
+                "Photo": {"Enabled": loc.photo, "Required": loc.photo_required},
+                "Questions": {"Enabled": loc.question, "Required": loc.question_required},
+                "NDADetails": loc.nda_details or "",
+                "QuestionList": questions_by_location[loc.id],
+                "Fields": fields_by_location[loc.id],
+            } for loc in locations],
+            "Employees": [{
+                "id": emp['id'],
+                "name": emp['name'],
+                "work_email": emp['work_email'],
+                "work_phone": emp['work_phone'],
+                "job_title": emp['job_title'],
+                "department": emp['department_id'][1] if emp['department_id'] else None,
+            } for emp in employees],
+        }
+
+    @http.route('/visitor/kiosk/bootstrap', type='http', auth='public', methods=['GET'], csrf=False)
+    def kiosk_bootstrap(self, company_id=None, location_id=None, **kwargs):
+        """Everything a kiosk needs for one company (and optionally one location), in one call.
+
+        Cached under a version stamp; poll with If-None-Match to get a 304 while nothing changed.
+        """
+        try:
+            company = request.env['res.company'].sudo().browse(int(company_id or request.env.company.id))
+            if not company.exists():
+                return request.make_json_response({"Status": 0, "Message": "Invalid company ID"}, status=404)
+            location_id = int(location_id) if location_id else None
+
+            version = self._bootstrap_version(company.id, location_id)
+            headers = [('ETag', f'"{version}"'), ('Cache-Control', 'no-cache')]
+            if version in request.httprequest.if_none_match:
+                return Response(status=304, headers=headers)
+
+            key = (request.env.cr.dbname, company.id, location_id)
+            cached = _bootstrap_cache.get(key)
+            if cached and cached[0] == version:
+                body = cached[1]
+            else:
+                payload = self._build_bootstrap(company, location_id)
+                payload["Version"] = version
+                body = json.dumps(payload, default=str)
+                with _bootstrap_lock:
+                    if len(_bootstrap_cache) >= BOOTSTRAP_CACHE_SIZE:
+                        _bootstrap_cache.clear()
+                    _bootstrap_cache[key] = (version, body)
+
+            return request.make_response(body, headers=headers + [('Content-Type', 'application/json')])
+
+        except Exception as e:
+            _logger.exception("Error building kiosk bootstrap")
+            return request.make_json_response({"Status": 0, "Message": f"Error: {str(e)}"}, status=500)
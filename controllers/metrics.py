@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import ipaddress
+import logging
+
+from odoo import http
+from odoo.http import request
+
+from ..models.instrumentation import render_prometheus
+
+_logger = logging.getLogger(__name__)
+
+
+class MetricsAPI(http.Controller):
+
+    def _allowed(self):
+        # loopback only unless visitor.metrics.allowed_ips lists the scraper
+        remote = request.httprequest.remote_addr or ''
+        allowed = request.env['ir.config_parameter'].sudo().get_param('visitor.metrics.allowed_ips', '')
+        if remote in {ip.strip() for ip in allowed.split(',') if ip.strip()}:
+            return True
+        try:
+            return ipaddress.ip_address(remote).is_loopback
+        except ValueError:
+            return False
+
+    @http.route('/visitor/metrics', type='http', auth='public', methods=['GET'], csrf=False)
+    def metrics(self, **kwargs):
+        """Request counts, latency histogram, SQL and external-call time per endpoint, Prometheus text format."""
+        if not self._allowed():
+            return request.make_response("Forbidden\n", status=403, headers=[('Content-Type', 'text/plain')])
+        rows = request.env['visitor.request.metric'].sudo()._get_rows()
+        return request.make_response(
+            render_prometheus(rows),
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'), ('Cache-Control', 'no-store')],
+        )
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import http, fields
+from odoo.http import request
+
+from ..models.instrumentation import instrument
+
+_logger = logging.getLogger(__name__)
+
+
+@instrument
+class OccupancyAPI(http.Controller):
+
+    def _company_ids(self, company_id=None):
+        allowed = request.env.user.company_ids.ids
+        if company_id:
+            return [int(company_id)] if int(company_id) in allowed else []
+        return allowed
+
+    @http.route('/visitor/occupancy', type='http', auth='user', methods=['GET'], csrf=False)
+    def occupancy(self, company_id=None, **kwargs):
+        """Live number of visitors on site per company and location, read from the counters."""
+        try:
+            counts = request.env['visitor.occupancy'].sudo()._get_counts(self._company_ids(company_id))
+            return request.make_json_response({
+                "Status": 1,
+                "Message": "Occupancy",
+                "Data": [dict(data, company_id=cid) for cid, data in counts.items()],
+            })
+        except Exception as e:
+            _logger.exception("Error reading occupancy")
+            return request.make_json_response({"Status": 0, "Message": f"Error: {str(e)}"}, status=500)
+
+    @http.route('/visitor/rollcall', type='http', auth='user', methods=['GET'], csrf=False)
+    def rollcall(self, company_id=None, location_id=None, **kwargs):
+        """Everyone on site right now, for an evacuation roll call."""
+        try:
+            company_ids = self._company_ids(company_id)
+            domain = [
+                ('on_site', '=', True),
+                ('company_id', 'in', company_ids),
+                ('check_in', '>=', request.env['visitor.occupancy']._today_start()),
+            ]
+            if location_id:
+                domain.append(('location_id', '=', int(location_id)))
+            visitors = request.env['visit.information'].sudo().search_read(
+                domain,
+                ['name', 'phone', 'company', 'employee', 'location_id', 'company_id', 'check_in'],
+                order='location_id, name',
+            )
+            counts = request.env['visitor.occupancy'].sudo()._get_counts(company_ids)
+            return request.make_json_response({
+                "Status": 1,
+                "Message": "Roll call",
+                "Total": sum(data["total"] for data in counts.values()),
+                "Data": [{
+                    "id": v['id'],
+                    "name": v['name'],
+                    "phone": v['phone'],
+                    "visitor_company": v['company'] or "",
+                    "host": v['employee'][1] if v['employee'] else "",
+                    "location": v['location_id'][1] if v['location_id'] else "",
+                    "company_id": v['company_id'][0],
+                    "check_in": fields.Datetime.to_string(v['check_in']),
+                } for v in visitors],
+            })
+        except Exception as e:
+            _logger.exception("Error building roll call")
+            return request.make_json_response({"Status": 0, "Message": f"Error: {str(e)}"}, status=500)
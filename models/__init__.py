@@ -1,3 +1,18 @@
 # -*- coding: utf-8 -*-
 
+from . import instrumentation
 from . import visit
+from . import visit_approval_job
+from . import sms_gateway
+from . import visit_import
+from . import visit_image
+from . import hr_employee
+from . import visitor_otp
+from . import gate_device
+from . import gate_sync
+from . import ir_websocket
+from . import visitor_occupancy
+from . import visit_bus
+from . import visitor_notification
+from . import visit_mail
+from . import visit_archive
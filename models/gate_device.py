@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import secrets
+from datetime import date, datetime, time, timedelta
+
+from odoo import models, fields, api, tools
+
+# seconds during which a repeated scan of the same pass is treated as the same scan
+SCAN_DEBOUNCE_SECONDS = 60
+# fields _get_device_map depends on
+DEVICE_MAP_FIELDS = {'device_key', 'company_id', 'location_id', 'active'}
+
+
+class VisitorGateDevice(models.Model):
+    _name = 'visitor.gate.device'
+    _description = 'Visitor Gate Device'
+
+    name = fields.Char(string="Name", required=True)
+    device_key = fields.Char(string="Device Key", required=True, copy=False,
+                             default=lambda self: secrets.token_urlsafe(24))
+    company_id = fields.Many2one('res.company', string="Company", required=True, default=lambda self: self.env.company)
+    location_id = fields.Many2one("company.location", string="Location", domain="[('company_id', '=', company_id)]")
+    active = fields.Boolean(default=True)
+
+    _sql_constraints = [
+        ('uniq_device_key', 'unique(device_key)', 'This device key is already registered.')
+    ]
+
+    @api.model
+    @tools.ormcache()
+    def _get_device_map(self):
+        """{device key: (device id, company id, location id)} of active devices."""
+        devices = self.sudo().search_read([], ['device_key', 'company_id', 'location_id'])
+        return {
+            d['device_key']: (d['id'], d['company_id'][0], d['location_id'][0] if d['location_id'] else None)
+            for d in devices
+        }
+
+    @api.model
+    def _authenticate(self, device_key):
+        """(device id, company id, location id) for a registered key, else None. No query once cached."""
+        if not device_key:
+            return None
+        return self._get_device_map().get(str(device_key))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if any(record.active for record in records):
+            self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        # other fields (names, bookkeeping) do not change the map; leave the shared cache alone
+        if DEVICE_MAP_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        clear = any(device.active for device in self)
+        res = super().unlink()
+        if clear:
+            self.env.registry.clear_cache()
+        return res
+
+
+class VisitInformation(models.Model):
+    _inherit = 'visit.information'
+
+    @api.model
+    def _gate_scan(self, token, device, action=None):
+        """Check a pass in or out at a gate in a single UPDATE ... RETURNING.
+
+        ``device`` is the (id, company id, location id) of an authenticated gate
+        device. Without ``action`` the scan checks in a visitor who is not on
+        site yet and checks out one who is. The row is locked while it is
+        updated, so two scans of the same pass run one after the other; a
+        repeat within the debounce window changes nothing and is reported as
+        a duplicate. Returns a dict with the visit values before and after.
+        """
+        _device_id, company_id, location_id = device
+        now = fields.Datetime.now()
+        debounce = int(self.env['ir.config_parameter'].sudo().get_param(
+            'visitor.gate.debounce', SCAN_DEBOUNCE_SECONDS))
+        today = datetime.combine(date.today(), time.min)
+        self.env.cr.execute("""
+            WITH old AS (
+                SELECT id, employee, check_in, check_out
+                  FROM visit_information
+                 WHERE qr_token = %(token)s
+                   AND status = 'approved'
+                   AND company_id = %(company)s
+                   AND (%(location)s IS NULL OR location_id = %(location)s)
+                   AND visiting_date >= %(day_start)s AND visiting_date < %(day_end)s
+                 LIMIT 1
+                   FOR UPDATE
+            ), new AS (
+                SELECT id, employee, check_in AS old_in, check_out AS old_out,
+                       CASE WHEN check_in IS NULL AND %(allow_in)s THEN %(now)s ELSE check_in END AS new_in,
+                       CASE WHEN %(allow_out)s AND check_in IS NOT NULL AND check_out IS NULL
+                                 AND check_in <= %(out_after)s
+                            THEN %(now)s ELSE check_out END AS new_out
+                  FROM old
+            )
+            UPDATE visit_information v
+               SET check_in = new.new_in,
+                   check_out = new.new_out,
+                   on_site = (new.new_in IS NOT NULL AND new.new_out IS NULL),
+                   write_uid = CASE WHEN new.new_in IS DISTINCT FROM new.old_in OR new.new_out IS DISTINCT FROM new.old_out
+                                    THEN %(uid)s ELSE v.write_uid END,
+                   write_date = CASE WHEN new.new_in IS DISTINCT FROM new.old_in OR new.new_out IS DISTINCT FROM new.old_out
+                                     THEN %(now)s ELSE v.write_date END
+              FROM new
+              LEFT JOIN hr_employee e ON e.id = new.employee
+              LEFT JOIN res_users u ON u.id = e.user_id
+             WHERE v.id = new.id
+         RETURNING v.id, v.name, v.instructions, v.company_id, v.location_id, v.visiting_date, v.status,
+                   new.old_in, new.old_out, new.new_in, new.new_out, u.id AS host_user_id
+        """, {
+            'token': token,
+            'company': company_id,
+            'location': location_id,
+            'day_start': today,
+            'day_end': today + timedelta(days=1),
+            'allow_in': action in (None, 'checkin'),
+            'allow_out': action in (None, 'checkout'),
+            # an automatic scan right after check-in is the turnstile firing twice, not a check-out
+            'out_after': now - timedelta(seconds=debounce) if action is None else now,
+            'now': now,
+            'uid': self.env.uid,
+        })
+        row = self.env.cr.dictfetchone()
+        if not row:
+            return None
+        self.browse(row['id']).invalidate_recordset(['check_in', 'check_out', 'on_site', 'write_uid', 'write_date'])
+
+        if row['old_in'] is None and row['new_in'] is not None:
+            row['action'] = 'checkin'
+        elif row['old_out'] is None and row['new_out'] is not None:
+            row['action'] = 'checkout'
+        else:
+            row['action'] = None
+            last = row['old_out'] or row['old_in']
+            row['duplicate'] = bool(last and last >= now - timedelta(seconds=debounce))
+        if row['action']:
+            # the counters are normally kept by write(), which this UPDATE bypasses
+            key = (row['company_id'], row['location_id'])
+            was_on_site = bool(row['old_in'] and not row['old_out'] and row['old_in'] >= today)
+            is_on_site = bool(row['new_in'] and not row['new_out'] and row['new_in'] >= today)
+            self.env['visitor.occupancy'].sudo()._apply_deltas({key: int(is_on_site) - int(was_on_site)})
+            snapshot = {
+                'company_id': row['company_id'],
+                'day': fields.Date.to_string(row['visiting_date'].date()),
+                'status': row['status'],
+                'host': row['host_user_id'] or 0,
+            }
+            self._bus_publish(
+                {row['id']: dict(snapshot, on_site=bool(row['old_in'] and not row['old_out']),
+                                 check_in=row['old_in'], check_out=row['old_out'])},
+                {row['id']: dict(snapshot, on_site=bool(row['new_in'] and not row['new_out']),
+                                 check_in=row['new_in'], check_out=row['new_out'])},
+            )
+            # queued in this transaction, delivered by the notification worker after commit
+            self.env['visitor.notification']._notify(self.browse(row['id']), row['action'], now)
+        return row
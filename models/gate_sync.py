@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# re-send changes this far behind the cursor: a transaction that started before the
+# previous sync may commit after it with an older write_date
+SYNC_OVERLAP_SECONDS = 60
+# offline clocks drift; events further in the future than this are rejected
+EVENT_MAX_SKEW_SECONDS = 300
+EVENT_RETENTION_DAYS = 30
+
+
+class VisitorGateEvent(models.Model):
+    """Check-in/check-out events uploaded by gate devices after working offline.
+
+    (device, key) is unique, so an upload retried after a lost response is
+    answered from the stored outcome instead of being applied twice.
+    """
+    _name = 'visitor.gate.event'
+    _description = 'Visitor Gate Event'
+    _order = 'id desc'
+
+    device_id = fields.Many2one('visitor.gate.device', string="Device", required=True, ondelete='cascade')
+    key = fields.Char(string="Idempotency Key", required=True)
+    visit_id = fields.Many2one('visit.information', string="Visit", ondelete='cascade', index=True)
+    action = fields.Selection([('checkin', 'Check-in'), ('checkout', 'Check-out')], string="Action")
+    event_time = fields.Datetime(string="Event Time")
+    state = fields.Selection([
+        ('applied', 'Applied'),
+        ('ignored', 'Ignored'),
+        ('rejected', 'Rejected'),
+    ], string="State", required=True)
+    message = fields.Char(string="Message")
+
+    _sql_constraints = [
+        ('uniq_device_key', 'unique(device_id, key)', 'This event was already uploaded by the device.')
+    ]
+
+    def _result(self, duplicate=False):
+        self.ensure_one()
+        return {"key": self.key, "state": self.state, "message": self.message or "", "duplicate": duplicate}
+
+    @api.autovacuum
+    def _gc_old_events(self):
+        limit = fields.Datetime.now() - timedelta(days=EVENT_RETENTION_DAYS)
+        self.search([('create_date', '<', limit)]).unlink()
+
+
+class VisitInformation(models.Model):
+    _inherit = 'visit.information'
+
+    @staticmethod
+    def _gate_token_hash(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @api.model
+    def _gate_sync_rows(self, device, cursor=None):
+        """Today's visits for a device, as compact dicts, changed since ``cursor``.
+
+        The cursor is "<day>|<write_date>" of the previous sync. A missing,
+        malformed or stale-day cursor gives a full snapshot of approved visits;
+        a delta also carries visits that stopped being approved, flagged
+        ``revoked`` so the device drops them. Returns (rows, next cursor, full).
+        """
+        _device_id, company_id, location_id = device
+        today = date.today()
+        day_start = datetime.combine(today, time.min)
+        day_end = day_start + timedelta(days=1)
+
+        since = None
+        if cursor:
+            day, _sep, stamp = cursor.partition('|')
+            try:
+                if day == today.isoformat():
+                    since = fields.Datetime.to_datetime(stamp)
+            except ValueError:
+                since = None
+
+        domain = [
+            ('company_id', '=', company_id),
+            ('visiting_date', '>=', day_start),
+            ('visiting_date', '<', day_end),
+        ]
+        if location_id:
+            domain.append(('location_id', '=', location_id))
+        if since:
+            domain.append(('write_date', '>', since - timedelta(seconds=SYNC_OVERLAP_SECONDS)))
+        else:
+            domain.append(('status', '=', 'approved'))
+
+        visits = self.sudo().search_read(
+            domain,
+            ['qr_token', 'name', 'location_id', 'status', 'check_in', 'check_out', 'write_date'],
+            order='write_date, id',
+        )
+
+        def epoch(value):
+            return int(value.replace(tzinfo=timezone.utc).timestamp()) if value else None
+
+        window = [epoch(day_start), epoch(day_end)]
+        rows = []
+        for visit in visits:
+            if visit['status'] != 'approved' or not visit['qr_token']:
+                rows.append({"id": visit['id'], "revoked": True})
+                continue
+            rows.append({
+                "id": visit['id'],
+                "h": self._gate_token_hash(visit['qr_token']),
+                "name": visit['name'],
+                "loc": visit['location_id'][0] if visit['location_id'] else None,
+                "win": window,
+                "in": epoch(visit['check_in']),
+                "out": epoch(visit['check_out']),
+            })
+
+        last = visits[-1]['write_date'] if visits else since
+        next_cursor = f"{today.isoformat()}|{fields.Datetime.to_string(last or day_start)}"
+        return rows, next_cursor, since is None
+
+    @api.model
+    def _gate_apply_events(self, device, events):
+        """Apply check-in/check-out events recorded offline by a device.
+
+        Conflicts with what is already recorded (online scans, other gates) are
+        resolved so that the earliest check-in and the latest check-out win and a
+        check-out never precedes the check-in; a check-out without any check-in
+        is rejected. Each visit is written once per upload, and the host is
+        notified of a first check-in or check-out as for an online scan.
+        Returns one result dict per event, in order.
+        """
+        device_id, company_id, location_id = device
+        Event = self.env['visitor.gate.event'].sudo()
+        now = fields.Datetime.now()
+
+        keys = [str(event.get('key') or '') for event in events]
+        stored = {
+            event.key: event
+            for event in Event.search([('device_id', '=', device_id), ('key', 'in', [k for k in keys if k])])
+        }
+
+        visit_ids = set()
+        for event in events:
+            try:
+                visit_ids.add(int(event.get('id')))
+            except (TypeError, ValueError):
+                pass
+        domain = [('id', 'in', list(visit_ids)), ('company_id', '=', company_id)]
+        if location_id:
+            domain.append(('location_id', '=', location_id))
+        visits = {visit.id: visit for visit in self.sudo().search(domain)}
+
+        results = [None] * len(events)
+        new_events = {}  # key -> vals, created at the end
+        pending = defaultdict(list)  # visit -> [(time, action, key)]
+        for index, (event, key) in enumerate(zip(events, keys)):
+            if not key:
+                results[index] = {"key": key, "state": "rejected", "message": "Missing idempotency key.", "duplicate": False}
+                continue
+            if key in stored:
+                results[index] = stored[key]._result(duplicate=True)
+                continue
+            if key in new_events:
+                results[index] = (key, True)  # same outcome as its first copy
+                continue
+
+            action = event.get('action')
+            vals = {'device_id': device_id, 'key': key, 'action': action if action in ('checkin', 'checkout') else False}
+            new_events[key] = vals
+            results[index] = (key, False)
+            try:
+                visit = visits.get(int(event.get('id')))
+                at = datetime.fromtimestamp(float(event.get('at')), timezone.utc).replace(tzinfo=None)
+            except (TypeError, ValueError, OverflowError):
+                vals.update(state='rejected', message="Invalid visit id or timestamp.")
+                continue
+            vals['event_time'] = at
+            if not vals['action']:
+                vals.update(state='rejected', message="Invalid action. Use 'checkin' or 'checkout'.")
+            elif not visit:
+                vals.update(state='rejected', message="Visit not found for this device.")
+            elif visit.status != 'approved':
+                vals.update(visit_id=visit.id, state='rejected', message=f"Visitor not approved (status={visit.status}).")
+            elif at > now + timedelta(seconds=EVENT_MAX_SKEW_SECONDS):
+                vals.update(visit_id=visit.id, state='rejected', message="Event time is in the future.")
+            else:
+                vals['visit_id'] = visit.id
+                pending[visit].append((at, vals['action'], key))
+
+        for visit, visit_events in pending.items():
+            check_in, check_out = visit.check_in, visit.check_out
+            for at, action, key in sorted(visit_events):
+                vals = new_events[key]
+                if action == 'checkin':
+                    if check_out and at > check_out:
+                        vals.update(state='ignored', message="Check-in after the recorded check-out.")
+                    elif not check_in or at < check_in:
+                        check_in = at
+                        vals['state'] = 'applied'
+                    else:
+                        vals.update(state='ignored', message="An earlier check-in is already recorded.")
+                else:
+                    if not check_in:
+                        vals.update(state='rejected', message="Cannot check-out before check-in.")
+                    elif at < check_in:
+                        vals.update(state='ignored', message="Check-out before the recorded check-in.")
+                    elif not check_out or at > check_out:
+                        check_out = at
+                        vals['state'] = 'applied'
+                    else:
+                        vals.update(state='ignored', message="A later check-out is already recorded.")
+            if (check_in, check_out) != (visit.check_in, visit.check_out):
+                # only a first check-in or check-out is news to the host
+                events_to_notify = []
+                if check_in and not visit.check_in:
+                    events_to_notify.append(('checkin', check_in))
+                if check_out and not visit.check_out:
+                    events_to_notify.append(('checkout', check_out))
+                visit.write({'check_in': check_in, 'check_out': check_out})
+                for event, when in events_to_notify:
+                    self.env['visitor.notification']._notify(visit, event, when)
+
+        created = {event.key: event for event in Event.create(list(new_events.values()))} if new_events else {}
+        return [
+            result if isinstance(result, dict) else created[result[0]]._result(duplicate=result[1])
+            for result in results
+        ]
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class HrEmployee(models.Model):
+    _inherit = 'hr.employee'
+
+    # GIN trigram indexes (pg_trgm) for the kiosk host typeahead
+    name = fields.Char(index='trigram')
+    work_email = fields.Char(index='trigram')
+
+
+class HrDepartment(models.Model):
+    _inherit = 'hr.department'
+
+    name = fields.Char(index='trigram')
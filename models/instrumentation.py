@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""Per-call timing of visitor endpoints: SQL, external calls (PDF, SMS, SMTP) and total latency.
+
+``instrument`` decorates a function, or every route of an ``http.Controller``
+class; ``track_external`` wraps a call to something outside the database.
+Figures are kept per worker and periodically added to visitor.request.metric,
+which the /visitor/metrics endpoint renders in Prometheus text format.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from odoo import models, fields, api
+from odoo.http import request
+from odoo.modules.registry import Registry
+
+_logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = 1000
+FLUSH_SECONDS = 10
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_local = threading.local()
+# one worker may serve several databases: figures are kept and flushed per dbname
+_pending = defaultdict(lambda: defaultdict(float))  # dbname -> {(metric, labels): value not yet flushed}
+_pending_lock = threading.Lock()
+_last_flush = {}  # dbname -> monotonic time of the last flush
+_slow_threshold = {}  # dbname -> (expires, milliseconds)
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def _thread_sql():
+    thread = threading.current_thread()
+    if not hasattr(thread, 'query_count'):
+        # counted by odoo.sql_db once the attributes exist (HTTP threads have them already)
+        thread.query_count = 0
+        thread.query_time = 0
+    return thread.query_count, thread.query_time
+
+
+@contextmanager
+def track_external(kind):
+    """Time a call outside the database (``pdf``, ``sms``, ``smtp``...) for every running measurement."""
+    stack = _stack()
+    if not stack:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        for measurement in stack:
+            measurement['external'][kind] += elapsed
+            measurement['calls'][kind] += 1
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+
+
+def _record(dbname, name, measurement, total, failed):
+    if not dbname:
+        return
+    queries = measurement['queries']
+    sql_time = measurement['sql_time']
+    endpoint = _labels(endpoint=name)
+    updates = [
+        ('visitor_requests_total', _labels(endpoint=name, outcome='error' if failed else 'ok'), 1),
+        ('visitor_request_seconds_sum', endpoint, total),
+        ('visitor_request_seconds_count', endpoint, 1),
+        ('visitor_sql_queries_total', endpoint, queries),
+        ('visitor_sql_seconds_total', endpoint, sql_time),
+    ]
+    for bound in LATENCY_BUCKETS:
+        if total <= bound:
+            updates.append(('visitor_request_seconds_bucket', _labels(endpoint=name, le=bound), 1))
+    updates.append(('visitor_request_seconds_bucket', _labels(endpoint=name, le='+Inf'), 1))
+    for kind, seconds in measurement['external'].items():
+        updates.append(('visitor_external_seconds_total', _labels(endpoint=name, kind=kind), seconds))
+        updates.append(('visitor_external_calls_total', _labels(endpoint=name, kind=kind), measurement['calls'][kind]))
+    with _pending_lock:
+        pending = _pending[dbname]
+        for metric, labels, value in updates:
+            pending[(metric, labels)] += value
+
+
+def _slow_threshold_ms(dbname):
+    cached = _slow_threshold.get(dbname)
+    now = time.monotonic()
+    if cached and cached[0] > now:
+        return cached[1]
+    threshold = SLOW_REQUEST_MS
+    try:
+        with Registry(dbname).cursor() as cr:
+            cr.execute("SELECT value FROM ir_config_parameter WHERE key = 'visitor.metrics.slow_ms'")
+            row = cr.fetchone()
+            if row and row[0].isdigit():
+                threshold = int(row[0])
+    except Exception:
+        _logger.debug("Could not read visitor.metrics.slow_ms", exc_info=True)
+    _slow_threshold[dbname] = (now + FLUSH_SECONDS, threshold)
+    return threshold
+
+
+def _log_if_slow(dbname, name, measurement, total):
+    total_ms = total * 1000
+    if not dbname or total_ms < _slow_threshold_ms(dbname):
+        return
+    external = measurement['external']
+    other_ms = total_ms - measurement['sql_time'] * 1000 - sum(external.values()) * 1000
+    breakdown = ", ".join(f"{kind} {seconds * 1000:.0f} ms" for kind, seconds in sorted(external.items()))
+    _logger.warning(
+        "Slow visitor request %s: %.0f ms total, sql %d queries / %.0f ms%s, other %.0f ms",
+        name, total_ms, measurement['queries'], measurement['sql_time'] * 1000,
+        f", {breakdown}" if breakdown else "", max(other_ms, 0),
+    )
+    with _pending_lock:
+        _pending[dbname][('visitor_slow_requests_total', _labels(endpoint=name))] += 1
+
+
+def _flush(dbname, force=False):
+    """Add this worker's pending figures of ``dbname`` to its table, at most every FLUSH_SECONDS."""
+    now = time.monotonic()
+    if not dbname:
+        return
+    with _pending_lock:
+        if not force and now - _last_flush.setdefault(dbname, now) < FLUSH_SECONDS:
+            return
+        updates = list(_pending.pop(dbname, {}).items())
+        _last_flush[dbname] = now
+    if not updates:
+        return
+    try:
+        with Registry(dbname).cursor() as cr:
+            for (metric, labels), value in sorted(updates):
+                cr.execute("""
+                    INSERT INTO visitor_request_metric (metric, labels, value)
+                         VALUES (%s, %s, %s)
+                    ON CONFLICT (metric, labels) DO UPDATE
+                            SET value = visitor_request_metric.value + EXCLUDED.value
+                """, [metric, labels, value])
+    except Exception:
+        _logger.warning("Could not flush visitor request metrics", exc_info=True)
+        with _pending_lock:
+            pending = _pending[dbname]
+            for key, value in updates:
+                pending[key] += value
+
+
+def _current_dbname(args):
+    for arg in args:
+        if isinstance(arg, models.BaseModel):
+            return arg.env.cr.dbname
+    return request.db if request else None
+
+
+def _instrument_function(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        queries, sql_time = _thread_sql()
+        measurement = {'external': defaultdict(float), 'calls': defaultdict(int)}
+        stack.append(measurement)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            total = time.perf_counter() - started
+            stack.remove(measurement)
+            end_queries, end_sql_time = _thread_sql()
+            measurement['queries'] = end_queries - queries
+            measurement['sql_time'] = end_sql_time - sql_time
+            try:
+                dbname = _current_dbname(args)
+                _record(dbname, name, measurement, total, failed)
+                _log_if_slow(dbname, name, measurement, total)
+                if not stack:
+                    _flush(dbname)
+            except Exception:
+                _logger.debug("Could not record metrics of %s", name, exc_info=True)
+    return wrapper
+
+
+def instrument(target=None, name=None):
+    """Measure a function, or every route of a controller class.
+
+    Usable bare (``@instrument``) or with a metric name (``@instrument(name="visit.approve")``).
+    Place it above ``@http.route`` / ``@api.*`` decorators.
+    """
+    if target is None:
+        return lambda real_target: instrument(real_target, name=name)
+    if isinstance(target, type):
+        for attr, member in list(vars(target).items()):
+            if callable(member) and hasattr(member, 'original_routing'):
+                setattr(target, attr, _instrument_function(member, f"{target.__name__}.{attr}"))
+        return target
+    return _instrument_function(target, name or target.__qualname__)
+
+
+def render_prometheus(rows):
+    """Prometheus text exposition of (metric, labels, value) rows."""
+    types = {
+        'visitor_request_seconds': 'histogram',
+        'visitor_requests_total': 'counter',
+        'visitor_sql_queries_total': 'counter',
+        'visitor_sql_seconds_total': 'counter',
+        'visitor_external_seconds_total': 'counter',
+        'visitor_external_calls_total': 'counter',
+        'visitor_slow_requests_total': 'counter',
+    }
+    lines, declared = [], set()
+    for metric, labels, value in sorted(rows):
+        family = metric.rsplit('_', 1)[0] if metric.startswith('visitor_request_seconds_') else metric
+        if family not in declared:
+            declared.add(family)
+            lines.append(f"# TYPE {family} {types.get(family, 'untyped')}")
+        text = str(int(value)) if float(value).is_integer() else repr(float(value))
+        lines.append(f"{metric}{{{labels}}} {text}" if labels else f"{metric} {text}")
+    return "\n".join(lines) + "\n"
+
+
+class VisitorRequestMetric(models.Model):
+    """Request metrics summed over all workers, one row per metric and label set."""
+    _name = 'visitor.request.metric'
+    _description = 'Visitor Request Metric'
+    _log_access = False
+
+    metric = fields.Char(string="Metric", required=True)
+    labels = fields.Char(string="Labels", default="")
+    value = fields.Float(string="Value")
+
+    _sql_constraints = [
+        ('uniq_metric_labels', 'unique(metric, labels)', 'One row per metric and label set.')
+    ]
+
+    @api.model
+    def _get_rows(self):
+        self.env.cr.execute("SELECT metric, labels, value FROM visitor_request_metric")
+        totals = defaultdict(float, {(metric, labels): value for metric, labels, value in self.env.cr.fetchall()})
+        # plus this worker's figures not flushed yet
+        with _pending_lock:
+            for key, value in _pending.get(self.env.cr.dbname, {}).items():
+                totals[key] += value
+        return [(metric, labels, value) for (metric, labels), value in totals.items()]
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+# bus sub-channel of each res.company carrying live visitor updates
+VISITOR_CHANNEL = 'visitor_management'
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        # internal users follow their companies' visitor channel
+        channels = super()._build_bus_channel_list(channels)
+        if self.env.uid and self.env.user._is_internal():
+            channels.extend((company, VISITOR_CHANNEL) for company in self.env.user.company_ids)
+        return channels
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from odoo import models, fields, api, tools
+
+from .instrumentation import track_external
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_GATEWAY_URL = "https://sms6.rmlconnect.net:8443/bulksms/bulksms"
+SUCCESS_CODE = "1701"
+BULK_CHUNK_SIZE = 100
+POOL_SIZE = 8
+TIMEOUT = 5
+MAX_BACKOFF_MINUTES = 60
+DEFAULT_MAX_ATTEMPTS = 5
+
+CONFIG_KEYS = (
+    'visitor.sms.username',
+    'visitor.sms.password',
+    'visitor.sms.source',
+    'visitor.sms.entity_id',
+    'visitor.sms.temp_id',
+    'visitor.sms.gateway_url',
+    'visitor.sms.transport',
+)
+
+
+class HTTPTransport:
+    """Posts to the gateway over a keep-alive connection pool."""
+
+    def __init__(self, url):
+        self.url = url or DEFAULT_GATEWAY_URL
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def post(self, params):
+        with track_external('sms'):
+            response = self.session.post(self.url, params=params, timeout=TIMEOUT)
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+
+class LogTransport:
+    """Only logs messages and acknowledges them, for development databases."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def post(self, params):
+        _logger.info("SMS (not sent) to %s: %s", params['destination'], params['message'])
+        return ",".join(f"{SUCCESS_CODE}|{dest}|0" for dest in params['destination'].split(','))
+
+    def close(self):
+        pass
+
+
+# Point visitor.sms.transport at another entry (and visitor.sms.gateway_url at
+# a local stub server) to keep tests away from the real gateway.
+TRANSPORTS = {
+    'route_mobile': HTTPTransport,
+    'log': LogTransport,
+}
+
+
+class SMSGatewayClient:
+    """Route Mobile bulk SMS client, one per database and configuration."""
+
+    def __init__(self, config):
+        self.config = config
+        (self.username, self.password, self.source, self.entity_id,
+         self.temp_id, url, transport) = config
+        self.transport = TRANSPORTS.get(transport or 'route_mobile', HTTPTransport)(url)
+
+    def send(self, destination, sms_text):
+        ok, detail = self.send_bulk([destination], sms_text)[destination]
+        return ok
+
+    def send_bulk(self, destinations, sms_text):
+        """Send the same text to many destinations, BULK_CHUNK_SIZE numbers per call.
+
+        Returns {destination: (ok, gateway detail)}.
+        """
+        results = {}
+        destinations = list(dict.fromkeys(destinations))
+        for start in range(0, len(destinations), BULK_CHUNK_SIZE):
+            chunk = destinations[start:start + BULK_CHUNK_SIZE]
+            params = {
+                'username': self.username,
+                'password': self.password,
+                'type': 0,
+                'dlr': 1,
+                'destination': ",".join(chunk),
+                'source': self.source,
+                'message': sms_text,
+                'entityid': self.entity_id,
+                'tempid': self.temp_id,
+            }
+            try:
+                response = self.transport.post(params)
+            except Exception as e:
+                _logger.exception("Error sending SMS via RouteMobile")
+                results.update({dest: (False, str(e)) for dest in chunk})
+                continue
+            _logger.info("SMS RESPONSE for %s destination(s): %s", len(chunk), response)
+            results.update(self._parse_response(chunk, response))
+        return results
+
+    @staticmethod
+    def _normalize_number(number):
+        return "".join(ch for ch in number or "" if ch.isdigit()).lstrip("0")
+
+    @classmethod
+    def _match_destination(cls, chunk, number):
+        """Destination of ``chunk`` the gateway means by ``number``.
+
+        The gateway may echo the number with or without "+", the country code
+        or a leading 0, so numbers are compared on their digits, one being a
+        suffix of the other.
+        """
+        number = cls._normalize_number(number)
+        if not number:
+            return None
+        candidates = [
+            dest for dest in chunk
+            if (normalized := cls._normalize_number(dest))
+            and (normalized.endswith(number) or number.endswith(normalized))
+        ]
+        return candidates[0] if len(candidates) == 1 else None
+
+    @classmethod
+    def _parse_response(cls, chunk, response):
+        # "1701|<destination>|<message id>,1701|..." or a bare error code for the whole call
+        results = {dest: (False, response) for dest in chunk}
+        entries = [entry for entry in (response or "").strip().split(",") if "|" in entry]
+        for entry in entries:
+            parts = entry.split("|")
+            dest = cls._match_destination(chunk, parts[1])
+            if dest is None and len(chunk) == 1 and len(entries) == 1:
+                dest = chunk[0]  # one number sent, one status back
+            if dest is not None:
+                results[dest] = (parts[0] == SUCCESS_CODE, entry)
+        return results
+
+    def close(self):
+        self.transport.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class SMSUtils:
+    @staticmethod
+    def send_sms_route_mobile(env, phone_number, country_code, sms_text):
+        """Send one SMS right away through the pooled gateway client (see visitor.sms.outbox)"""
+        return env['visitor.sms.outbox'].sudo()._send_now(phone_number, country_code, sms_text)
+
+    @staticmethod
+    def queue_sms(env, phone_number, country_code, sms_text, visit=None):
+        """Deliver through the outbox cron, with retry/backoff"""
+        return env['visitor.sms.outbox'].sudo()._enqueue(phone_number, country_code, sms_text, visit=visit)
+
+
+class VisitorSmsOutbox(models.Model):
+    _name = 'visitor.sms.outbox'
+    _description = 'Visitor SMS Outbox'
+    _order = 'next_try_at, id'
+
+    phone = fields.Char(string="Phone", required=True)
+    country_code = fields.Char(string="Country Code", default="91", required=True)
+    body = fields.Text(string="Message", required=True)
+    visit_id = fields.Many2one('visit.information', string="Visit", ondelete='set null', index=True)
+    state = fields.Selection([
+        ("outgoing", "Outgoing"),
+        ("sent", "Sent"),
+        ("error", "Error"),
+    ], string="State", default="outgoing", required=True, index=True)
+    attempts = fields.Integer(string="Attempts", default=0)
+    next_try_at = fields.Datetime(string="Next Try", default=fields.Datetime.now, required=True)
+    sent_at = fields.Datetime(string="Sent At", readonly=True)
+    gateway_response = fields.Char(string="Gateway Response", readonly=True)
+
+    def _destination(self):
+        self.ensure_one()
+        return f"{self.country_code or ''}{self.phone}".lstrip('+')
+
+    # Gateway client
+    @api.model
+    @tools.ormcache()
+    def _get_gateway_config(self):
+        # ir.config_parameter clears the registry caches on every change,
+        # so new credentials are picked up without a restart
+        config = self.env['ir.config_parameter'].sudo()
+        return tuple(config.get_param(key) for key in CONFIG_KEYS)
+
+    @api.model
+    def _get_client(self):
+        config = self._get_gateway_config()
+        dbname = self.env.cr.dbname
+        with _clients_lock:
+            client = _clients.get(dbname)
+            if client is None or client.config != config:
+                if client is not None:
+                    client.close()
+                client = _clients[dbname] = SMSGatewayClient(config)
+        return client
+
+    @api.model
+    def _send_now(self, phone_number, country_code, sms_text):
+        """Send one SMS synchronously (OTP) and return whether the gateway accepted it."""
+        destination = f"{country_code}{phone_number}".lstrip('+')
+        return self._get_client().send(destination, sms_text)
+
+    # Outbox
+    @api.model
+    def _enqueue(self, phone_number, country_code, sms_text, visit=None):
+        message = self.sudo().create({
+            'phone': phone_number,
+            'country_code': country_code,
+            'body': sms_text,
+            'visit_id': visit.id if visit else False,
+        })
+        cron = self.env.ref('visitor_management.ir_cron_visitor_sms_outbox', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return message
+
+    @api.model
+    def _get_batch_size(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('visitor.sms.batch_size')
+        return int(value) if value and value.isdigit() else BULK_CHUNK_SIZE
+
+    @api.model
+    def _cron_send_outbox(self):
+        self.env.cr.execute("""
+            SELECT id FROM visitor_sms_outbox
+             WHERE state = 'outgoing' AND next_try_at <= (now() at time zone 'UTC')
+          ORDER BY next_try_at, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [self._get_batch_size()])
+        messages = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if not messages:
+            return True
+
+        client = self._get_client()
+        # one gateway call per distinct text
+        for body in set(messages.mapped('body')):
+            group = messages.filtered(lambda m: m.body == body)
+            results = client.send_bulk([m._destination() for m in group], body)
+            group._apply_results(results)
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+
+        if len(messages) == self._get_batch_size():
+            self.env.ref('visitor_management.ir_cron_visitor_sms_outbox')._trigger()
+        return True
+
+    def _apply_results(self, results):
+        now = fields.Datetime.now()
+        sent = self.filtered(lambda m: results.get(m._destination(), (False,))[0])
+        sent.write({'state': 'sent', 'sent_at': now})
+        for message in sent:
+            message.gateway_response = results[message._destination()][1]
+
+        for message in self - sent:
+            attempts = message.attempts + 1
+            message.write({
+                'attempts': attempts,
+                'gateway_response': results.get(message._destination(), (False, "no response"))[1],
+                'state': 'error' if attempts >= DEFAULT_MAX_ATTEMPTS else 'outgoing',
+                'next_try_at': now + timedelta(minutes=min(2 ** attempts, MAX_BACKOFF_MINUTES)),
+            })
+
+    def action_retry(self):
+        self.write({'state': 'outgoing', 'attempts': 0, 'next_try_at': fields.Datetime.now()})
+        self.env.ref('visitor_management.ir_cron_visitor_sms_outbox')._trigger()
+        return True
@@ -5,11 +5,20 @@ from lxml import etree
 from odoo import models, fields, api,_
 from odoo.exceptions import UserError
 from odoo.exceptions import ValidationError
+from odoo.modules.registry import Registry
+from odoo.tools.pdf import merge_pdf
+from odoo.tools.sql import create_index, create_unique_index, index_exists
 import re
 import base64
+import hashlib
 import logging
-import requests
-from odoo.addons.visitor_management.controllers.api import SMSUtils
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from .instrumentation import instrument, track_external
+from .sms_gateway import SMSUtils
 
 _logger = logging.getLogger(__name__)
 try:
@@ -18,6 +27,31 @@ try:
 except Exception:
     setup_modifiers = None
 
+PHONE_RE = re.compile(r'\d{10}')
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Custom-field form arch cache counters (per worker)
+VIEW_CACHE_STATS = {'lookups': 0, 'builds': 0}
+
+# Dashboard counts, cached for a few seconds per company
+DASHBOARD_STATUSES = ("pending", "approved", "cancelled")
+DASHBOARD_BREAKDOWNS = ("location_id", "employee", "visit_type")
+DASHBOARD_CACHE_TTL = 10
+DASHBOARD_CACHE_SIZE = 256
+
+# Batch badge printing
+BADGE_CHUNK_SIZE = 50
+BADGE_RENDER_WORKERS = 4
+_dashboard_cache = {}
+
+JOB_STATES = [
+    ("queued", "Queued"),
+    ("retrying", "Retrying"),
+    ("done", "Done"),
+    ("failed", "Failed"),
+]
+
+
 class VisitInformation(models.Model):
     _name = 'visit.information'
     _inherit = ['mail.thread','mail.activity.mixin']
@@ -30,18 +64,16 @@ class VisitInformation(models.Model):
     company_id = fields.Many2one('res.company',string="Employee Company",default=lambda self: self.env.company,   required=True, readonly=True,index=True)
     employee = fields.Many2one('hr.employee',string='Employee',default=lambda self: self._default_employee())
     check_out = fields.Datetime(string="Check-out",readonly=True)
+    on_site = fields.Boolean(string="On Site", compute="_compute_on_site", store=True)
     status = fields.Selection([("pending","Pending"),("approved","Approved"),("cancelled","Cancelled")],default="pending",tracking=True)
     email = fields.Char(string="Email")
     phone = fields.Char(string="Phone", required=True, size=10)
     purpose = fields.Text(string="Purpose of Visit")
     cancellation_reason = fields.Text(string="Cancellation Reason")
-    otp_code = fields.Char(string="OTP", store=True)
-    otp_attempts = fields.Integer(string="OTP Attempts", default=0)
-    last_otp_time = fields.Datetime(string="Last OTP Sent")
     location_id = fields.Many2one("company.location",string="Location",domain="[('company_id', '=', company_id)]")
     attachment_id = fields.Many2one("ir.attachment")
     visiting_date = fields.Datetime(string="Date")
-    qr_token = fields.Char("QR Token", default=lambda self: str(uuid.uuid4()), readonly=True)
+    qr_token = fields.Char("QR Token", default=lambda self: str(uuid.uuid4()), readonly=True, copy=False)
     instructions = fields.Text(string="Instruction")
     visit_type = fields.Selection([
     ("pre", "Pre-Registered"),
@@ -52,12 +84,96 @@ class VisitInformation(models.Model):
     notebook_id = fields.One2many(
         'visitor.notebook.entry', 'visitor_id', string="Notebook Entries",ondelete='cascade'
     )
-    
+
+    # Approval pipeline (see visit.approval.job)
+    pdf_state = fields.Selection(JOB_STATES, string="Badge Status", readonly=True, copy=False)
+    sms_state = fields.Selection(JOB_STATES, string="SMS Status", readonly=True, copy=False)
+    email_state = fields.Selection(JOB_STATES, string="Email Status", readonly=True, copy=False)
+    approval_job_ids = fields.One2many('visit.approval.job', 'visit_id', string="Approval Jobs", readonly=True)
+    badge_hash = fields.Char(string="Badge Hash", readonly=True, copy=False)
+
+    def init(self):
+        """Indexes for the kiosk and dashboard access paths.
+
+        - phone + visiting_date: _find_today_visitor / verify_otp
+        - qr_token (unique): verify_qr, one row per badge
+        - status + visiting_date: dashboard counts
+        - visiting_date of approved visits only: gate and badge lookups for a day
+        """
+        cr = self.env.cr
+        create_index(cr, 'visit_information_phone_visiting_date_idx',
+                     self._table, ['phone', 'visiting_date'])
+        create_index(cr, 'visit_information_status_visiting_date_idx',
+                     self._table, ['status', 'visiting_date'])
+        create_index(cr, 'visit_information_approved_visiting_date_idx',
+                     self._table, ['visiting_date'], where="status = 'approved'")
+
+        if not index_exists(cr, 'visit_information_qr_token_uniq_idx'):
+            # duplicated rows (record copies) get a fresh token before the unique index goes in
+            cr.execute("""
+                UPDATE visit_information v
+                   SET qr_token = uuid_in(md5(random()::text || clock_timestamp()::text || v.id::text)::cstring)::text
+                 WHERE v.id IN (
+                    SELECT id FROM (
+                        SELECT id, row_number() OVER (PARTITION BY qr_token ORDER BY id) AS rank
+                          FROM visit_information WHERE qr_token IS NOT NULL
+                    ) dup WHERE dup.rank > 1
+                 )
+            """)
+            create_unique_index(cr, 'visit_information_qr_token_uniq_idx', self._table, ['qr_token'])
+
+    @api.model
+    def _find_today_visitor(self, phone):
+        """The visit registered today for ``phone``, if any (phone + visiting_date index)."""
+        today = fields.Datetime.to_datetime(fields.Date.today())
+        return self.search([
+            ("phone", "=", phone),
+            ("visiting_date", ">=", today),
+            ("visiting_date", "<", today + timedelta(days=1)),
+        ], limit=1)
+
+    @api.model
+    def _custom_fields_company_id(self):
+        # Company context (view is cached, so rely on default_company_id or current company)
+        return self.env.context.get('default_company_id') or self.env.company.id
+
+    @api.model
+    def _get_view_cache_key(self, view_id=None, view_type='form', **options):
+        """The injected custom fields depend on the company, so the cached arch must too."""
+        key = super()._get_view_cache_key(view_id, view_type, **options)
+        if view_type == 'form':
+            key += (self._custom_fields_company_id(),)
+        return key
+
+    @api.model
+    def _get_view_cache(self, view_id=None, view_type='form', **options):
+        if view_type == 'form':
+            VIEW_CACHE_STATS['lookups'] += 1
+        return super()._get_view_cache(view_id, view_type, **options)
+
+    @api.model
+    def get_view_cache_stats(self):
+        """Hit rate of the cached custom-field form arch in this worker."""
+        lookups, builds = VIEW_CACHE_STATS['lookups'], VIEW_CACHE_STATS['builds']
+        hits = max(lookups - builds, 0)
+        return {
+            'lookups': lookups,
+            'builds': builds,
+            'hits': hits,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    @api.model
+    def _clear_custom_fields_view_cache(self):
+        # arch built by _get_view is kept in the 'templates' ormcache
+        self.env.registry.clear_cache('templates')
+
     @api.model
     def _get_view(self, view_id=None, view_type='form', **options):
         arch, view = super()._get_view(view_id, view_type, **options)
         if view_type != "form":
             return arch, view
+        VIEW_CACHE_STATS['builds'] += 1
 
         # arch may be string or lxml element (v18); keep/return same type
         is_element = isinstance(arch, etree._Element)
@@ -68,13 +184,12 @@ class VisitInformation(models.Model):
             return (doc if is_element else etree.tostring(doc, encoding="unicode")), view
         holder = holder_nodes[0]
 
-        # Company context (view is cached, so rely on default_company_id or current company)
-        company_id = self.env.context.get('default_company_id') or self.env.company.id
+        company_id = self._custom_fields_company_id()
 
-        # Fetch *all* location-specific configs for this company
+        # Fetch *all* location-specific configs for this company (stored company_id, no join)
         cfgs = self.env['company.field'].sudo().search([
             ('enabled', '=', True),
-            ('location_id.company_id', '=', company_id),
+            ('company_id', '=', company_id),
         ])
 
         # Avoid duplicate {field, location} injections if view already has some
@@ -87,16 +202,16 @@ class VisitInformation(models.Model):
         fields_dict = view['fields'] if isinstance(view, dict) and 'fields' in view else None
 
         for cfg in cfgs:
-            fname = cfg.field_id and cfg.field_id.name
+            fname = cfg.field_id.name
             if not fname or fname not in self._fields:
                 continue
 
             # Skip if this field already exists in form (avoid duplicates like "name")
             if fname in existing_in_form:
-                _logger.info("Skipping field %s because it's already in the form", fname)
+                _logger.debug("Skipping field %s because it's already in the form", fname)
                 continue
 
-            loc_id = int(cfg.location_id.id)
+            loc_id = cfg.location_id.id
             key = (fname, str(loc_id))
             if key in seen:
                 continue
@@ -127,8 +242,7 @@ class VisitInformation(models.Model):
 
             holder.append(node)
             seen.add(key)
-            _logger.info("Injected dynamic field %s for location %s (required=%s)", fname, loc_id, cfg.required)
-            print("&&&&&............>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>TESTING",fname)
+            _logger.debug("Injected dynamic field %s for location %s (required=%s)", fname, loc_id, cfg.required)
 
         return (doc if is_element else etree.tostring(doc, encoding="unicode")), view
 
@@ -187,23 +301,43 @@ class VisitInformation(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         records = super(VisitInformation, self).create(vals_list)
-        for rec in records:
-            if rec.visit_type == 'walkin':
-                rec._ask_additional_questions()
+        records.filtered(lambda rec: rec.visit_type == 'walkin')._ask_additional_questions()
         return records
 
     
     def _ask_additional_questions(self):
-        if self.location_id:
-            for question in self.location_id.additional_question_ids:
-                self.env['visitor.notebook.entry'].create({
-                    'visitor_id': self.id,
-                    'question_id': question.id,
-                    'answer_selection': None,
-                })
+        """Seed one empty notebook entry per location question, for all visits in one create()."""
+        visits = self.filtered('location_id')
+        if not visits:
+            return
+        # questions of every location involved, in a single query
+        questions = self.env['company.location.question'].sudo().search_read(
+            [('location_id', 'in', visits.location_id.ids)], ['location_id'], order='id',
+        )
+        questions_by_location = defaultdict(list)
+        for question in questions:
+            questions_by_location[question['location_id'][0]].append(question['id'])
+        # answers passed to create() already have their entry
+        answered = {
+            (entry['visitor_id'], entry['question_id'])
+            for entry in self.env['visitor.notebook.entry'].sudo().search_read(
+                [('visitor_id', 'in', visits.ids)], ['visitor_id', 'question_id'], load=False)
+        }
+
+        self.env['visitor.notebook.entry'].create([{
+            'visitor_id': visit.id,
+            'question_id': question_id,
+            'answer_selection': None,
+        } for visit in visits for question_id in questions_by_location[visit.location_id.id]
+            if (visit.id, question_id) not in answered])
 
 
     
+    @api.depends("check_in", "check_out")
+    def _compute_on_site(self):
+        for rec in self:
+            rec.on_site = bool(rec.check_in and not rec.check_out)
+
     @api.depends("employee")
     def _compute_company_id(self):
         for rec in self:
@@ -226,16 +360,18 @@ class VisitInformation(models.Model):
     @api.constrains('phone')
     def _check_phone(self):
         for rec in self:
-            if rec.phone and not re.fullmatch(r'\d{10}', rec.phone):
+            if rec.phone and not PHONE_RE.fullmatch(rec.phone):
                 raise ValidationError("Phone number must be exactly 10 digits.")
 
     @api.constrains('email')
     def _check_email(self):
         for rec in self:
-            if rec.email and not re.fullmatch(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', rec.email):
+            if rec.email and not EMAIL_RE.fullmatch(rec.email):
                 raise ValidationError("Please enter a valid email address.")
             
+    @instrument(name="visit.action_approved")
     def action_approved(self):
+        """Approve visits right away; badge PDF, SMS and email are queued as approval jobs."""
         for rec in self:
             # Always mark approved
             rec.sudo().write({'status': 'approved'})
@@ -246,66 +382,142 @@ class VisitInformation(models.Model):
                     rec.sudo().write({'check_in': fields.Datetime.now()})
                     _logger.info("Auto check-in for walk-in visitor %s (id=%s)", rec.name, rec.id)
 
-                # notify employee in Odoo dashboard
-                if rec.employee and rec.employee.user_id:
-                    message = {
-                        'title': "Visitor Auto Check-in",
-                        'message': f"{rec.name} has been auto checked-in at {rec.check_in.strftime('%H:%M')}.",
-                        'sticky': True,
-                        'type': 'info'
-                    }
-                    self.env['bus.bus']._sendone(
-                        rec.employee.user_id.partner_id,
-                        'simple_notification',
-                        message
-                    )
-                # continue
-
-            template = self.env.ref("visitor_management.email_visit_approved", False)
-            report = self.env.ref("visitor_management.action_visit_report", False)
-
-            if not (template and report):
-                _logger.warning("Missing template or report for pre-registered visitor %s", rec.id)
-                continue
+                # notify employee; bursts for one host are sent as a digest
+                self.env['visitor.notification']._notify(rec, 'auto_checkin', rec.check_in)
 
-            # 1. Generate PDF
-            pdf_content, _ = self.env['ir.actions.report'].sudo()._render_qweb_pdf(
-                'visitor_management.action_visit_report', rec.id
+        # 1. Generate PDF (SMS and email are queued once the badge exists)
+        self.env['visit.approval.job']._enqueue(self, 'pdf')
+        return True
+
+    # Approval pipeline stages, run by visit.approval.job
+    def _approval_stage_pdf(self):
+        self.ensure_one()
+        self._get_badge_attachment()
+
+    # Badge PDF cache
+    def _attachment_checksum(self, res_model, res_field, res_id):
+        # checksum of an image field without loading its data
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', res_model),
+            ('res_field', '=', res_field),
+            ('res_id', '=', res_id),
+        ], limit=1)
+        return attachment.checksum or ''
+
+    def _badge_content_hash(self):
+        """Hash of everything badge_report prints, so a badge is only re-rendered when it changes."""
+        self.ensure_one()
+        template = self.env.ref('visitor_management.badge_report', raise_if_not_found=False)
+        parts = [
+            self.name or '',
+            self.company or '',
+            str(self.company_id.id),
+            self._attachment_checksum('res.partner', 'image_1920', self.company_id.partner_id.id),
+            self.employee.name or '',
+            fields.Datetime.to_string(self.visiting_date) or '',
+            self.qr_token or '',
+            self.photo_checksum or '',
+            fields.Datetime.to_string(template.write_date) if template else '',
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+    def _get_badge_attachment(self):
+        """Return the stored badge PDF, rendering it only when the badge content changed."""
+        self.ensure_one()
+        digest = self._badge_content_hash()
+        if self.attachment_id and self.badge_hash == digest:
+            return self.attachment_id
+
+        report = self.env.ref("visitor_management.action_visit_report", False)
+        if not report:
+            raise UserError(_("Missing badge report for visitor %s") % self.id)
+
+        # 1. Generate PDF
+        with track_external('pdf'):
+            pdf_content, _report_type = self.env['ir.actions.report'].sudo()._render_qweb_pdf(
+                'visitor_management.action_visit_report', self.id
             )
-            pdf_base64 = base64.b64encode(pdf_content)
-
-            # 2. Create attachment
-            attachment = self.env['ir.attachment'].sudo().create({
-                'name': f"Approved_Visit_{rec.name}.pdf",
-                'type': 'binary',
-                'datas': pdf_base64,
-                'res_model': rec._name,
-                'res_id': rec.id,
-                'mimetype': 'application/pdf',
-            })
-            rec.sudo().write({'attachment_id': attachment.id})
-
-            # 3. Attach to template
-            template.attachment_ids = [(6, 0, [attachment.id])]
-
-            # 4. Send SMS with download link
-            base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
-            download_link = f"{base_url}/web/content/{attachment.id}?download=True"
-            try:
-                sms_text = f"Hi {rec.name}, your visit is approved. Download your pass here: {download_link}"
-                _logger.info("Sending SMS to %s: %s", rec.phone, sms_text)
-                SMSUtils.send_sms_route_mobile(self.env, rec.phone, "91", sms_text)
-            except Exception:
-                _logger.exception("Failed to send SMS for visitor %s", rec.id)
-
-            # 5. Send email
-            try:
-                email_values = {'email_from': self.env.user.email}
-                template.sudo().send_mail(rec.id, force_send=True, email_values=email_values)
-            except Exception:
-                _logger.exception("Failed to send approval email for visitor %s", rec.id)
+        vals = {
+            'name': f"Approved_Visit_{self.name}.pdf",
+            'type': 'binary',
+            'datas': base64.b64encode(pdf_content),
+            'res_model': self._name,
+            'res_id': self.id,
+            'mimetype': 'application/pdf',
+        }
+
+        # 2. Create attachment, or refresh the existing one so links already sent keep working
+        attachment = self.attachment_id.sudo()
+        if attachment:
+            attachment.write(vals)
+        else:
+            attachment = self.env['ir.attachment'].sudo().create(vals)
+        self.sudo().write({'attachment_id': attachment.id, 'badge_hash': digest})
+        return attachment
 
-        return True
+    @api.model
+    def _get_day_badge_visits(self, day, location_id=None):
+        """Approved visits of one day (optionally one location), in print order."""
+        day = fields.Date.to_date(day)
+        domain = [
+            ('status', '=', 'approved'),
+            ('visiting_date', '>=', fields.Datetime.to_datetime(day)),
+            ('visiting_date', '<', fields.Datetime.to_datetime(day + timedelta(days=1))),
+        ]
+        if location_id:
+            domain.append(('location_id', '=', int(location_id)))
+        return self.search(domain, order='location_id, name, id')
+
+    def _render_badges_pdf(self):
+        """Render the badges of all visits in self as one multi-page PDF.
+
+        Up to BADGE_CHUNK_SIZE badges go through a single wkhtmltopdf run. Bigger sets are
+        split into chunks rendered concurrently (each chunk is its own wkhtmltopdf process,
+        driven from a thread with its own cursor) and merged in order.
+        """
+        ids = self.ids
+        chunks = [ids[i:i + BADGE_CHUNK_SIZE] for i in range(0, len(ids), BADGE_CHUNK_SIZE)]
+        with track_external('pdf'):
+            if len(chunks) <= 1 or getattr(threading.current_thread(), 'testing', False):
+                pdfs = [self.browse(chunk)._render_badges_chunk() for chunk in chunks]
+            else:
+                dbname, uid, context = self.env.cr.dbname, self.env.uid, dict(self.env.context)
+
+                def render(chunk):
+                    with Registry(dbname).cursor() as cr:
+                        env = api.Environment(cr, uid, context)
+                        return env[self._name].browse(chunk)._render_badges_chunk()
+
+                with ThreadPoolExecutor(max_workers=min(len(chunks), BADGE_RENDER_WORKERS)) as executor:
+                    pdfs = list(executor.map(render, chunks))
+        return pdfs[0] if len(pdfs) == 1 else merge_pdf(pdfs)
+
+    def _render_badges_chunk(self):
+        pdf_content, _report_type = self.env['ir.actions.report'].sudo()._render_qweb_pdf(
+            'visitor_management.action_visit_report', self.ids
+        )
+        return pdf_content
+
+    def _approval_stage_sms(self):
+        self.ensure_one()
+        # 4. Send SMS with download link
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        download_link = f"{base_url}/web/content/{self.attachment_id.id}?download=True"
+        sms_text = f"Hi {self.name}, your visit is approved. Download your pass here: {download_link}"
+        _logger.info("Sending SMS to %s: %s", self.phone, sms_text)
+        if not SMSUtils.send_sms_route_mobile(self.env, self.phone, "91", sms_text):
+            raise UserError(_("SMS gateway rejected the message for visitor %s") % self.id)
+
+    def _approval_stage_email(self):
+        self.ensure_one()
+        template = self.env.ref("visitor_management.email_visit_approved", False)
+        if not template:
+            raise UserError(_("Missing approval mail template for visitor %s") % self.id)
+
+        # Badge attached to this mail only; the flush worker sends it
+        email_values = {'email_from': self.env.user.email}
+        self._queue_mail("visitor_management.email_visit_approved", 'approval',
+                         email_values=email_values, attachments=self.attachment_id)
 
     
     # Cancelled Method        
@@ -325,22 +537,98 @@ class VisitInformation(models.Model):
         
     # Odoo Dashboard Method   
     @api.model
-    def get_dashboard_data(self):
-        """Return counts of visits by status for today"""
-        today = fields.Date.today()
-        start_of_day = fields.Datetime.to_datetime(f"{today} 00:00:00")
-        end_of_day = fields.Datetime.to_datetime(f"{today} 23:59:59")
-
-        counts = {}
-        statuses = ["pending", "approved", "cancelled"]
-        for status in statuses:
-            counts[status] = self.search_count([
-                ("status", "=", status),
-                ("visiting_date", ">=", start_of_day),
-                ("visiting_date", "<=", end_of_day),
-            ])
-        return counts
-        
+    def get_dashboard_data(self, date_from=None, date_to=None, breakdown=None):
+        """Return counts of visits by status (and visitors on site) for a date range, today by default.
+
+        ``breakdown`` may list any of DASHBOARD_BREAKDOWNS; each adds per-value counts
+        under ``breakdown[<field>]``. Every breakdown is a single grouped query, and
+        results are kept for ``visitor.dashboard.cache_ttl`` seconds per company.
+
+        ``snapshot`` is the transaction snapshot the counts were read in
+        ("xmin:xmax:xip,..."), cached with them: clients that keep the counts
+        current with 'visitor_delta' messages use it to drop the deltas the
+        counts already include.
+        """
+        date_from = fields.Date.to_date(date_from) or fields.Date.today()
+        date_to = fields.Date.to_date(date_to) or date_from
+        breakdown = [name for name in (breakdown or []) if name in DASHBOARD_BREAKDOWNS]
+
+        key = (self.env.cr.dbname, tuple(self.env.companies.ids), self._dashboard_scope(),
+               date_from, date_to, tuple(breakdown))
+        now = time.monotonic()
+        cached = _dashboard_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        domain = [
+            ("visiting_date", ">=", fields.Datetime.to_datetime(date_from)),
+            ("visiting_date", "<", fields.Datetime.to_datetime(date_to + timedelta(days=1))),
+        ]
+        # one grouped aggregate per dimension; the totals come from the first one
+        dimensions = breakdown or [None]
+        data = {status: 0 for status in DASHBOARD_STATUSES}
+        data.update(on_site=0, date_from=fields.Date.to_string(date_from), date_to=fields.Date.to_string(date_to),
+                    company_ids=self.env.companies.ids, scope=self._dashboard_scope())
+        if breakdown:
+            data['breakdown'] = {}
+
+        for index, dimension in enumerate(dimensions):
+            groupby = ['status', 'on_site'] + ([dimension] if dimension else [])
+            rows = {}
+            for group in self._read_group(domain, groupby, ['__count']):
+                status, on_site, count = group[0], group[1], group[-1]
+                if not status:
+                    continue
+                if index == 0:
+                    data[status] = data.get(status, 0) + count
+                    if on_site:
+                        data['on_site'] += count
+                if dimension:
+                    value = group[2]
+                    value_key = value.id if isinstance(value, models.BaseModel) else value
+                    row = rows.setdefault(value_key, dict(
+                        {s: 0 for s in DASHBOARD_STATUSES},
+                        id=value_key or False,
+                        name=self._dashboard_value_name(dimension, value),
+                        on_site=0,
+                    ))
+                    row[status] = row.get(status, 0) + count
+                    if on_site:
+                        row['on_site'] += count
+            if dimension:
+                data['breakdown'][dimension] = list(rows.values())
+
+        # same transaction snapshot as the counts above (repeatable read)
+        self.env.cr.execute("SELECT txid_current_snapshot()::text")
+        data['snapshot'] = self.env.cr.fetchone()[0]
+
+        if len(_dashboard_cache) > DASHBOARD_CACHE_SIZE:
+            for stale in [k for k, (expires, _data) in _dashboard_cache.items() if expires <= now]:
+                _dashboard_cache.pop(stale, None)
+        _dashboard_cache[key] = (now + self._dashboard_cache_ttl(), data)
+        return data
+
+    @api.model
+    def _dashboard_scope(self):
+        # employees only see their own visits (record rule), so they get their own cache entry
+        user = self.env.user
+        if user.has_group('visitor_management.group_employee') and not user.has_group('visitor_management.group_admin'):
+            return user.id
+        return 0
+
+    @api.model
+    def _dashboard_cache_ttl(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('visitor.dashboard.cache_ttl')
+        return int(value) if value and value.isdigit() else DASHBOARD_CACHE_TTL
+
+    @api.model
+    def _dashboard_value_name(self, dimension, value):
+        if isinstance(value, models.BaseModel):
+            return value.display_name if value else _("Undefined")
+        if not value:
+            return _("Undefined")
+        return dict(self._fields[dimension]._description_selection(self.env)).get(value, value)
+
 # Dynamic fields   
 class CompanyField(models.Model):
     _name = "company.field"
@@ -377,6 +665,22 @@ class CompanyField(models.Model):
         readonly=True
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['visit.information']._clear_custom_fields_view_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env['visit.information']._clear_custom_fields_view_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['visit.information']._clear_custom_fields_view_cache()
+        return res
+
     @api.depends()
     def _compute_visitor_model_id(self):
         visit_model = self.env["ir.model"].sudo().search([("model", "=", "visit.information")], limit=1)
@@ -399,6 +703,24 @@ class CustomField(models.Model):
         "company.location", "company_id", string="Locations"
     )      
     
+class IrModelFields(models.Model):
+    _inherit = 'ir.model.fields'
+
+    def write(self, vals):
+        visit_fields = self.filtered(lambda f: f.model == 'visit.information')
+        res = super().write(vals)
+        if visit_fields:
+            self.env['visit.information']._clear_custom_fields_view_cache()
+        return res
+
+    def unlink(self):
+        visit_fields = self.filtered(lambda f: f.model == 'visit.information')
+        res = super().unlink()
+        if visit_fields:
+            self.env['visit.information']._clear_custom_fields_view_cache()
+        return res
+
+
 class VisitorNotebookEntry(models.Model):
     _name = 'visitor.notebook.entry'
     _description = 'Visitor Notebook Entry'
@@ -410,6 +732,39 @@ class VisitorNotebookEntry(models.Model):
         ('no', 'No'),
     ], string="Answer Option")
 
+    _sql_constraints = [
+        ('uniq_visitor_question', 'unique(visitor_id, question_id)', 'This question is already answered for this visitor.')
+    ]
+
+    @api.model
+    def _upsert_answers(self, visit_id, answers):
+        """Store {question id: answer} for a visit in one statement.
+
+        Two submits for the same visit may both find a question unanswered;
+        ON CONFLICT makes the later one update the entry instead of failing on
+        uniq_visitor_question.
+        """
+        if not answers:
+            return
+        self.flush_model()
+        self.env.cr.execute("""
+            INSERT INTO visitor_notebook_entry
+                   (visitor_id, question_id, answer_selection, create_uid, write_uid, create_date, write_date)
+            SELECT %(visit)s, a.question_id, a.answer, %(uid)s, %(uid)s,
+                   now() at time zone 'UTC', now() at time zone 'UTC'
+              FROM unnest(%(questions)s::int[], %(answers)s::varchar[]) AS a(question_id, answer)
+            ON CONFLICT (visitor_id, question_id) DO UPDATE
+               SET answer_selection = EXCLUDED.answer_selection,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, {
+            'visit': visit_id,
+            'uid': self.env.uid,
+            'questions': list(answers),
+            'answers': list(answers.values()),
+        })
+        self.invalidate_model()
+
 
 class CompanyLocation(models.Model):
     _name = "company.location"
@@ -435,6 +790,21 @@ class CompanyLocation(models.Model):
     visitor_field_ids = fields.One2many(
         "company.field", "location_id", string="Visitor Fields"
     )
+
+    def write(self, vals):
+        res = super().write(vals)
+        # custom fields are injected per company; moving a location moves its fields
+        if 'company_id' in vals:
+            self.env['visit.information']._clear_custom_fields_view_cache()
+        return res
+
+    def unlink(self):
+        # company.field rows go with the location through ON DELETE CASCADE
+        has_fields = bool(self.visitor_field_ids)
+        res = super().unlink()
+        if has_fields:
+            self.env['visit.information']._clear_custom_fields_view_cache()
+        return res
     
 class CompanyLocationQuestion(models.Model):
     _name = "company.location.question"
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_DELAY_MINUTES = 2
+
+# Stage that must follow a successful one
+NEXT_STAGES = {
+    'pdf': ['sms', 'email'],
+    'sms': [],
+    'email': [],
+}
+
+
+class VisitApprovalJob(models.Model):
+    _name = 'visit.approval.job'
+    _description = 'Visit Approval Job'
+    _order = 'scheduled_at, id'
+
+    visit_id = fields.Many2one('visit.information', string="Visit", required=True, ondelete='cascade', index=True)
+    stage = fields.Selection([
+        ("pdf", "Badge PDF"),
+        ("sms", "SMS"),
+        ("email", "Email"),
+    ], string="Stage", required=True)
+    state = fields.Selection([
+        ("pending", "Pending"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ], string="State", default="pending", required=True, index=True)
+    user_id = fields.Many2one('res.users', string="Approved By", default=lambda self: self.env.user, required=True)
+    attempts = fields.Integer(string="Attempts", default=0)
+    scheduled_at = fields.Datetime(string="Scheduled At", default=fields.Datetime.now, required=True)
+    done_at = fields.Datetime(string="Done At", readonly=True)
+    last_error = fields.Text(string="Last Error", readonly=True)
+
+    @api.model
+    def _get_batch_size(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('visitor.approval.batch_size')
+        return int(value) if value and value.isdigit() else DEFAULT_BATCH_SIZE
+
+    @api.model
+    def _get_max_attempts(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('visitor.approval.max_attempts')
+        return int(value) if value and value.isdigit() else DEFAULT_MAX_ATTEMPTS
+
+    @api.model
+    def _enqueue(self, visits, stage, user=None):
+        """Queue one job per visit for the given stage and wake up the cron."""
+        if not visits:
+            return self.browse()
+        user = user or self.env.user
+        jobs = self.sudo().create([{'visit_id': visit.id, 'stage': stage, 'user_id': user.id} for visit in visits])
+        visits.sudo().write({f'{stage}_state': 'queued'})
+        cron = self.env.ref('visitor_management.ir_cron_visit_approval_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return jobs
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Run up to a batch of due jobs, one per transaction.
+
+        Each job is claimed with its own row lock and committed once it ran:
+        the lock is held until then, so a parallel cron skips it instead of
+        sending the same badge or SMS again.
+        """
+        batch_size = self._get_batch_size()
+        max_attempts = self._get_max_attempts()
+        processed = 0
+        while processed < batch_size:
+            self.env.cr.execute("""
+                SELECT id FROM visit_approval_job
+                 WHERE state = 'pending' AND scheduled_at <= (now() at time zone 'UTC')
+              ORDER BY scheduled_at, id
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+            """)
+            row = self.env.cr.fetchone()
+            if not row:
+                break
+            self.browse(row[0])._run(max_attempts)
+            processed += 1
+            if not getattr(threading.current_thread(), 'testing', False):
+                self.env.cr.commit()
+
+        if processed == batch_size:
+            self.env.ref('visitor_management.ir_cron_visit_approval_jobs')._trigger()
+        return True
+
+    def _run(self, max_attempts):
+        self.ensure_one()
+        # stages run as the approver so mails keep going out from their address
+        visit = self.visit_id.with_user(self.user_id).sudo()
+        try:
+            with self.env.cr.savepoint():
+                getattr(visit, f'_approval_stage_{self.stage}')()
+        except Exception as e:
+            _logger.exception("Approval job %s (%s) failed for visitor %s", self.id, self.stage, visit.id)
+            attempts = self.attempts + 1
+            failed = attempts >= max_attempts
+            self.write({
+                'attempts': attempts,
+                'last_error': str(e),
+                'state': 'failed' if failed else 'pending',
+                'scheduled_at': fields.Datetime.now() + timedelta(minutes=RETRY_DELAY_MINUTES * attempts),
+            })
+            visit.write({f'{self.stage}_state': 'failed' if failed else 'retrying'})
+            return False
+
+        self.write({'state': 'done', 'attempts': self.attempts + 1, 'done_at': fields.Datetime.now(), 'last_error': False})
+        visit.write({f'{self.stage}_state': 'done'})
+        for next_stage in NEXT_STAGES[self.stage]:
+            self._enqueue(visit, next_stage, user=self.user_id)
+        return True
+
+    def action_retry(self):
+        self.write({'state': 'pending', 'attempts': 0, 'scheduled_at': fields.Datetime.now()})
+        for job in self:
+            job.visit_id.sudo().write({f'{job.stage}_state': 'queued'})
+        self.env.ref('visitor_management.ir_cron_visit_approval_jobs')._trigger()
+        return True
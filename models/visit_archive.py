@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+ARCHIVE_RETENTION_DAYS = 365
+ARCHIVE_BATCH = 1000
+# keep: the original photo and signature files move to the archive row, derivatives are deleted
+# drop: every image of the visit is deleted with it
+ARCHIVE_IMAGE_POLICIES = ('keep', 'drop')
+ARCHIVE_IMAGE_POLICY = 'keep'
+ARCHIVE_IMAGE_FIELDS = ('photo_answer', 'nda_answer')
+
+ARCHIVE_FIELDS = [
+    'name', 'phone', 'email', 'company', 'company_id', 'location_id', 'employee', 'visiting_date',
+    'visit_type', 'status', 'purpose', 'cancellation_reason', 'check_in', 'check_out',
+    'photo_checksum', 'nda_checksum', 'create_date',
+]
+
+
+class VisitArchive(models.Model):
+    """Visits older than the retention window, without their chatter, badges and image variants.
+
+    The cron moves them out of visit.information in batches so the daily
+    kiosk, gate and dashboard queries only scan recent rows; reports search
+    this model instead.
+    """
+    _name = 'visit.archive'
+    _description = 'Archived Visit'
+    _log_access = False
+    _order = 'visiting_date desc, id desc'
+
+    visit_ref = fields.Integer(string="Visit ID", readonly=True)  # indexed by uniq_visit_ref
+    name = fields.Char(string="Name", readonly=True)
+    phone = fields.Char(string="Phone", readonly=True, index=True)
+    email = fields.Char(string="Email", readonly=True)
+    company = fields.Char(string="Company", readonly=True)
+    company_id = fields.Many2one('res.company', string="Employee Company", readonly=True, ondelete='cascade')
+    location_id = fields.Many2one('company.location', string="Location", readonly=True, ondelete='set null')
+    employee_id = fields.Many2one('hr.employee', string="Employee", readonly=True, ondelete='set null')
+    visiting_date = fields.Datetime(string="Date", readonly=True)
+    visit_type = fields.Selection([
+        ("pre", "Pre-Registered"),
+        ("walkin", "Walk-In"),
+    ], string="Visitor Type", readonly=True)
+    status = fields.Selection([
+        ("pending", "Pending"),
+        ("approved", "Approved"),
+        ("cancelled", "Cancelled"),
+    ], string="Status", readonly=True)
+    purpose = fields.Text(string="Purpose of Visit", readonly=True)
+    cancellation_reason = fields.Text(string="Cancellation Reason", readonly=True)
+    check_in = fields.Datetime(string="Check-in", readonly=True)
+    check_out = fields.Datetime(string="Check-out", readonly=True)
+    answers = fields.Text(string="Answers", readonly=True, help="Notebook answers as a JSON list of {question_id, question, answer}")
+    # originals only, and only under the 'keep' policy; the files stay where they are in the filestore
+    photo_answer = fields.Image(string="Photo", readonly=True)
+    nda_answer = fields.Image(string="Signature", readonly=True)
+    photo_checksum = fields.Char(string="Photo Checksum", readonly=True)
+    nda_checksum = fields.Char(string="Signature Checksum", readonly=True)
+    created_on = fields.Datetime(string="Registered On", readonly=True)
+    archived_on = fields.Datetime(string="Archived On", readonly=True, default=fields.Datetime.now)
+
+    _sql_constraints = [
+        ('uniq_visit_ref', 'unique(visit_ref)', 'This visit is already archived.')
+    ]
+
+    def init(self):
+        """Reports filter a company over a date range."""
+        create_index(self.env.cr, 'visit_archive_company_visiting_date_idx',
+                     self._table, ['company_id', 'visiting_date'])
+
+    @api.model
+    def _get_param(self, key, default):
+        value = self.env['ir.config_parameter'].sudo().get_param(key)
+        return int(value) if value and value.isdigit() else default
+
+    @api.model
+    def _get_cutoff(self):
+        days = self._get_param('visitor.archive.retention_days', ARCHIVE_RETENTION_DAYS)
+        return datetime.combine(date.today() - timedelta(days=days), time.min)
+
+    @api.model
+    def _get_image_policy(self):
+        policy = self.env['ir.config_parameter'].sudo().get_param('visitor.archive.image_policy')
+        return policy if policy in ARCHIVE_IMAGE_POLICIES else ARCHIVE_IMAGE_POLICY
+
+    @api.model
+    def _cron_archive(self):
+        """Move one batch of visits older than the retention window to the archive."""
+        batch_size = self._get_param('visitor.archive.batch_size', ARCHIVE_BATCH)
+        # oldest visits have the lowest ids: walking the primary key finds a batch quickly
+        self.env.cr.execute("""
+            SELECT id FROM visit_information
+             WHERE COALESCE(visiting_date, create_date) < %s
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [self._get_cutoff(), batch_size])
+        visit_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not visit_ids:
+            return True
+
+        visits = self.env['visit.information'].sudo().browse(visit_ids)
+        archives = self._archive_visits(visits)
+        _logger.info("Archived %s visits", len(archives))
+
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+        if len(visit_ids) == batch_size:
+            self.env.ref('visitor_management.ir_cron_visitor_archive')._trigger()
+        return True
+
+    @api.model
+    def _archive_visits(self, visits):
+        """Copy ``visits`` to archive rows, hand over or drop their images, then delete them."""
+        # a list, not a dict keyed by text: two questions may share the same wording
+        answers = defaultdict(list)
+        entries = self.env['visitor.notebook.entry'].sudo().search_read(
+            [('visitor_id', 'in', visits.ids)], ['visitor_id', 'question_id', 'answer_selection'],
+            order='visitor_id, question_id, id', load=False)
+        questions = {
+            question.id: question.question_text
+            for question in self.env['company.location.question'].sudo().browse(
+                {entry['question_id'] for entry in entries})
+        }
+        for entry in entries:
+            answers[entry['visitor_id']].append({
+                'question_id': entry['question_id'],
+                'question': questions.get(entry['question_id'], ""),
+                'answer': entry['answer_selection'] or "",
+            })
+
+        vals_list = []
+        for row in visits.read(ARCHIVE_FIELDS, load=False):
+            vals_list.append({
+                'visit_ref': row['id'],
+                'name': row['name'],
+                'phone': row['phone'],
+                'email': row['email'],
+                'company': row['company'],
+                'company_id': row['company_id'],
+                'location_id': row['location_id'],
+                'employee_id': row['employee'],
+                'visiting_date': row['visiting_date'],
+                'visit_type': row['visit_type'],
+                'status': row['status'],
+                'purpose': row['purpose'],
+                'cancellation_reason': row['cancellation_reason'],
+                'check_in': row['check_in'],
+                'check_out': row['check_out'],
+                'answers': json.dumps(answers[row['id']]) if row['id'] in answers else False,
+                'photo_checksum': row['photo_checksum'],
+                'nda_checksum': row['nda_checksum'],
+                'created_on': row['create_date'],
+            })
+        archives = self.sudo().create(vals_list)
+
+        if self._get_image_policy() == 'keep':
+            # re-point the attachments instead of copying their content
+            self.env['ir.attachment'].flush_model()
+            self.env.cr.execute("""
+                UPDATE ir_attachment a
+                   SET res_model = %s, res_id = m.archive_id
+                  FROM unnest(%s::int[], %s::int[]) AS m(visit_id, archive_id)
+                 WHERE a.res_model = 'visit.information' AND a.res_id = m.visit_id
+                   AND a.res_field IN %s
+            """, [self._name, [vals['visit_ref'] for vals in vals_list], archives.ids, ARCHIVE_IMAGE_FIELDS])
+            self.env['ir.attachment'].invalidate_model()
+
+        # chatter, tracking, badge PDFs, image variants and notebook entries go with the visits
+        visits.with_context(tracking_disable=True).unlink()
+        return archives
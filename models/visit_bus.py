@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from collections import Counter, defaultdict
+
+from odoo import models, fields, api
+
+from .ir_websocket import VISITOR_CHANNEL
+
+DELTA_FIELDS = {'status', 'check_in', 'check_out', 'visiting_date', 'company_id', 'employee'}
+
+
+class VisitInformation(models.Model):
+    """Publish visit changes as compact deltas on the company's bus channel.
+
+    A 'visitor_delta' message carries, for one company:
+    - "c": [[day, status, on_site, host user id, n], ...] net changes to the
+      dashboard counters, one entry per distinct bucket;
+    - "r": {visit id: {field: value}} new values of the rows that changed,
+      for open list views;
+    - "x": id of the transaction that made the change, so a client holding a
+      snapshot (see get_dashboard_data) can drop deltas it already includes.
+    Clients apply them without querying the server again.
+    """
+    _inherit = 'visit.information'
+
+    def _bus_snapshot(self):
+        return {
+            rec.id: {
+                'company_id': rec.company_id.id,
+                'day': fields.Date.to_string(rec.visiting_date.date()) if rec.visiting_date else False,
+                'status': rec.status,
+                'on_site': rec.on_site,
+                'host': rec.employee.user_id.id or 0,
+                'check_in': rec.check_in,
+                'check_out': rec.check_out,
+            }
+            for rec in self
+        }
+
+    @api.model
+    def _bus_txid(self):
+        data = self.env.cr.precommit.data
+        if 'visit_bus.txid' not in data:
+            self.env.cr.execute("SELECT txid_current()")
+            data['visit_bus.txid'] = self.env.cr.fetchone()[0]
+        return data['visit_bus.txid']
+
+    @api.model
+    def _bus_publish(self, before, after, rows=True):
+        """Send the difference between two snapshots (see _bus_snapshot), one message per company."""
+        counts = defaultdict(Counter)
+        changed = defaultdict(dict)
+        for visit_id in set(before) | set(after):
+            old, new = before.get(visit_id), after.get(visit_id)
+            if old == new:
+                continue
+            if old:
+                counts[old['company_id']][(old['day'], old['status'], old['on_site'], old['host'])] -= 1
+            if new:
+                counts[new['company_id']][(new['day'], new['status'], new['on_site'], new['host'])] += 1
+                if rows and old:
+                    changed[new['company_id']][visit_id] = {
+                        'status': new['status'],
+                        'on_site': new['on_site'],
+                        'check_in': fields.Datetime.to_string(new['check_in']),
+                        'check_out': fields.Datetime.to_string(new['check_out']),
+                    }
+
+        Bus = self.env['bus.bus'].sudo()
+        txid = None
+        for company_id in set(counts) | set(changed):
+            if not company_id:
+                continue
+            deltas = [list(key) + [n] for key, n in counts[company_id].items() if n]
+            if not deltas and not changed[company_id]:
+                continue
+            txid = txid or self._bus_txid()
+            Bus._sendone(
+                (self.env['res.company'].browse(company_id), VISITOR_CHANNEL),
+                'visitor_delta',
+                {'company_id': company_id, 'c': deltas, 'r': changed[company_id], 'x': txid},
+            )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._bus_publish({}, records._bus_snapshot(), rows=False)
+        return records
+
+    def write(self, vals):
+        if not DELTA_FIELDS.intersection(vals):
+            return super().write(vals)
+        before = self._bus_snapshot()
+        res = super().write(vals)
+        self._bus_publish(before, self._bus_snapshot())
+        return res
+
+    def unlink(self):
+        before = self._bus_snapshot()
+        res = super().unlink()
+        self._bus_publish(before, {}, rows=False)
+        return res
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import base64
+import hashlib
+import logging
+
+from odoo import models, fields, api
+from odoo.tools.image import ImageProcess
+
+_logger = logging.getLogger(__name__)
+
+# source field: (checksum field, [(variant field, max width, max height), ...] largest first)
+IMAGE_VARIANTS = {
+    'photo_answer': ('photo_checksum', [('photo_badge', 256, 256), ('photo_thumb', 128, 128)]),
+    'nda_answer': ('nda_checksum', [('nda_thumb', 256, 128)]),
+}
+
+
+class VisitInformation(models.Model):
+    _inherit = 'visit.information'
+
+    # Derivatives are stored as attachments like any Image field; the filestore
+    # keeps one file per content, so repeat visitors share storage
+    photo_badge = fields.Image(string="Badge Photo", readonly=True, copy=False)
+    photo_thumb = fields.Image(string="Photo Thumbnail", readonly=True, copy=False)
+    nda_thumb = fields.Image(string="Signature Thumbnail", readonly=True, copy=False)
+    photo_checksum = fields.Char(string="Photo Checksum", readonly=True, copy=False, index=True)
+    nda_checksum = fields.Char(string="Signature Checksum", readonly=True, copy=False, index=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            self._prepare_image_vals(vals)
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self._prepare_image_vals(vals)
+        return super().write(vals)
+
+    @api.model
+    def _prepare_image_vals(self, vals):
+        """Add the resized variants and content hash of uploaded images to vals (in place)."""
+        for source, (checksum_field, variants) in IMAGE_VARIANTS.items():
+            if source not in vals:
+                continue
+            value = vals[source]
+            if not value:
+                vals[checksum_field] = False
+                vals.update({variant: False for variant, _w, _h in variants})
+                continue
+
+            raw = base64.b64decode(value)
+            checksum = hashlib.sha1(raw).hexdigest()
+            vals[checksum_field] = checksum
+            images = self._process_image(source, raw, checksum)
+            vals.update({name: base64.b64encode(data) for name, data in images.items()})
+
+    @api.model
+    def _process_image(self, source, raw, checksum):
+        """Raw bytes of ``source`` within its field limits and of every variant, from a single decode.
+
+        The Image field still runs its own processing on the stored value, but
+        once the image is within its limits that only reads the header.
+        """
+        field = self._fields[source]
+        image = ImageProcess(raw, verify_resolution=field.verify_resolution)
+        values = {source: image.resize(field.max_width, field.max_height).image_quality()}
+        values.update(self._get_image_variants(source, checksum, image))
+        return values
+
+    @api.model
+    def _get_image_variants(self, source, checksum, image):
+        """Raw bytes of every variant of ``source``, reused from an identical earlier upload when possible.
+
+        ``image`` is the ImageProcess of the upload, already resized to the source field limits.
+        """
+        checksum_field, variants = IMAGE_VARIANTS[source]
+        variant_fields = [variant for variant, _w, _h in variants]
+
+        # Same upload already processed (repeat visitor): reuse its variants
+        previous = self.sudo().search([(checksum_field, '=', checksum)], limit=1)
+        if previous:
+            attachments = self._get_image_attachments(previous, variant_fields)
+            if len(attachments) == len(variant_fields):
+                return {name: attachment.raw for name, attachment in attachments.items()}
+
+        # each variant is resized in place from the previous, larger one
+        result = {}
+        for variant, width, height in variants:
+            result[variant] = image.resize(width, height).image_quality()
+        return result
+
+    @api.model
+    def _get_image_attachments(self, records, field_names):
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', records.ids),
+            ('res_field', 'in', field_names),
+        ])
+        return {attachment.res_field: attachment for attachment in attachments}
+
+    def _store_image_raw(self, source, raw):
+        """Store an uploaded image and its variants straight from bytes.
+
+        Same processing as writing ``source`` through the ORM, without the
+        base64 round trip: the attachments are written with their raw content.
+        """
+        self.ensure_one()
+        checksum_field, _variants = IMAGE_VARIANTS[source]
+        checksum = hashlib.sha1(raw).hexdigest()
+        values = self._process_image(source, raw, checksum)
+
+        Attachment = self.env['ir.attachment'].sudo()
+        existing = self._get_image_attachments(self, list(values))
+        for name, data in values.items():
+            if name in existing:
+                existing[name].write({'raw': data})
+            else:
+                Attachment.create({
+                    'name': name,
+                    'res_model': self._name,
+                    'res_field': name,
+                    'res_id': self.id,
+                    'type': 'binary',
+                    'raw': data,
+                })
+        self.invalidate_recordset(list(values))
+        self.sudo().write({checksum_field: checksum})
+
+    def _image_url(self, base_url, *field_names):
+        """URL of the first non-empty image field, smallest variant first."""
+        self.ensure_one()
+        record = self.with_context(bin_size=True)
+        for name in field_names:
+            if record[name]:
+                return f"{base_url}/web/image/{self._name}/{self.id}/{name}"
+        return ""
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.osv import expression
+
+from .visit import PHONE_RE, EMAIL_RE
+
+_logger = logging.getLogger(__name__)
+
+IMPORT_FIELDS = ('name', 'phone', 'email', 'visiting_date', 'purpose', 'company', 'instructions')
+
+
+class VisitInformation(models.Model):
+    _inherit = 'visit.information'
+
+    @api.model
+    def _import_preregistrations(self, rows):
+        """Create pre-registered visits from a list of row dicts.
+
+        Rows are validated in one pass; employees, locations and existing visits are
+        each resolved with a single query, and every valid row is inserted through
+        one create(). Everything is imported into the current company: hosts and
+        locations are only looked up there, so a row naming another company's
+        employee or location is rejected. Returns {"created": n, "rows": [per-row report]} instead of
+        failing the whole batch on a bad row.
+        """
+        report = []
+        parsed = []
+        for index, row in enumerate(rows, start=1):
+            vals, errors = self._import_parse_row(row)
+            report.append({"row": index, "status": "error" if errors else "pending", "errors": errors})
+            parsed.append(vals)
+
+        valid = [i for i, entry in enumerate(report) if not entry["errors"]]
+        employees = self._import_resolve_employees([parsed[i] for i in valid])
+        locations = self._import_resolve_locations([parsed[i] for i in valid])
+        existing = self._import_existing_visits([parsed[i] for i in valid])
+
+        vals_list, row_indexes = [], []
+        for i in valid:
+            vals, entry = parsed[i], report[i]
+            employee_key = vals.pop('_employee', None)
+            location_key = vals.pop('_location', None)
+
+            employee = employees.get(employee_key) if employee_key else None
+            if employee_key and not employee:
+                entry["errors"].append(_("Unknown employee %(employee)s in %(company)s",
+                                         employee=employee_key, company=self.env.company.name))
+            location = locations.get(location_key) if location_key else None
+            if location_key and not location:
+                entry["errors"].append(_("Unknown location %(location)s in %(company)s",
+                                         location=location_key, company=self.env.company.name))
+
+            key = (vals['phone'], vals['visiting_date'].date())
+            if key in existing:
+                entry["status"] = "duplicate"
+                entry["id"] = existing[key]
+                continue
+            if entry["errors"]:
+                entry["status"] = "error"
+                continue
+
+            vals.update({
+                'visit_type': 'pre',
+                # always set: avoids one _default_employee search per row
+                'employee': employee['id'] if employee else False,
+                'company_id': self.env.company.id,
+                'location_id': location['id'] if location else False,
+            })
+            existing[key] = False  # duplicates inside the same file
+            vals_list.append(vals)
+            row_indexes.append(i)
+
+        created = self._import_create(vals_list, [report[i] for i in row_indexes])
+        return {"created": created, "rows": report}
+
+    @api.model
+    def _import_parse_row(self, row):
+        errors = []
+        vals = {k: (str(row[k]).strip() if row.get(k) not in (None, False) else False) for k in IMPORT_FIELDS}
+
+        if not vals['name']:
+            errors.append(_("Name is required."))
+        phone = vals['phone'] or ''
+        if phone.endswith('.0'):
+            phone = phone[:-2]  # numeric spreadsheet cells
+        vals['phone'] = phone
+        if not PHONE_RE.fullmatch(phone):
+            errors.append(_("Phone number must be exactly 10 digits."))
+        if vals['email'] and not EMAIL_RE.fullmatch(vals['email']):
+            errors.append(_("Please enter a valid email address."))
+
+        visiting_date = row.get('visiting_date')
+        try:
+            vals['visiting_date'] = fields.Datetime.to_datetime(visiting_date) if visiting_date else False
+        except (ValueError, TypeError):
+            vals['visiting_date'] = False
+        if not vals['visiting_date']:
+            errors.append(_("A valid visiting_date is required."))
+
+        employee = row.get('employee') or row.get('employee_id') or row.get('employee_email')
+        location = row.get('location_id') or row.get('location')
+        vals['_employee'] = self._import_key(employee)
+        vals['_location'] = self._import_key(location)
+        return vals, errors
+
+    @staticmethod
+    def _import_key(value):
+        # ids may arrive as int, "12" or 12.0; anything else is a name/email
+        if value in (None, False, ''):
+            return None
+        text = str(value).strip()
+        if text.endswith('.0') and text[:-2].isdigit():
+            text = text[:-2]
+        return int(text) if text.isdigit() else text.lower()
+
+    @api.model
+    def _import_resolve_employees(self, parsed):
+        keys = {vals['_employee'] for vals in parsed if vals.get('_employee')}
+        if not keys:
+            return {}
+        ids = [k for k in keys if isinstance(k, int)]
+        emails = [k for k in keys if isinstance(k, str)]
+        domain = expression.AND([
+            [('company_id', '=', self.env.company.id)],
+            expression.OR([[('id', 'in', ids)]] + [[('work_email', '=ilike', email)] for email in emails]),
+        ])
+        records = self.env['hr.employee'].sudo().search_read(domain, ['work_email'])
+        result = {}
+        for rec in records:
+            result[rec['id']] = rec
+            if rec['work_email']:
+                result[rec['work_email'].lower()] = rec
+        return result
+
+    @api.model
+    def _import_resolve_locations(self, parsed):
+        keys = {vals['_location'] for vals in parsed if vals.get('_location')}
+        if not keys:
+            return {}
+        records = self.env['company.location'].sudo().search_read(
+            [('company_id', '=', self.env.company.id)], ['name'],
+        )
+        result = {}
+        for rec in records:
+            result[rec['id']] = rec
+            result[rec['name'].strip().lower()] = rec
+        return result
+
+    @api.model
+    def _import_existing_visits(self, parsed):
+        """{(phone, day): visit id} of visits already registered for the rows' phones and days."""
+        phones = {vals['phone'] for vals in parsed}
+        days = [vals['visiting_date'] for vals in parsed]
+        if not phones:
+            return {}
+        start = fields.Datetime.to_datetime(min(days).date())
+        end = fields.Datetime.to_datetime(max(days).date() + timedelta(days=1))
+        visits = self.sudo().search_read([
+            ('company_id', '=', self.env.company.id),
+            ('phone', 'in', list(phones)),
+            ('visiting_date', '>=', start),
+            ('visiting_date', '<', end),
+        ], ['phone', 'visiting_date'])
+        return {(v['phone'], v['visiting_date'].date()): v['id'] for v in visits}
+
+    @api.model
+    def _import_create(self, vals_list, entries):
+        if not vals_list:
+            return 0
+        try:
+            with self.env.cr.savepoint():
+                records = self.create(vals_list)
+        except Exception:
+            _logger.info("Bulk visitor import failed as a batch, retrying row by row", exc_info=True)
+        else:
+            for entry, record in zip(entries, records):
+                entry.update(status="created", id=record.id)
+            return len(records)
+
+        # isolate the rows the database or constraints reject
+        created = 0
+        for vals, entry in zip(vals_list, entries):
+            try:
+                with self.env.cr.savepoint():
+                    record = self.create(vals)
+            except Exception as e:
+                entry.update(status="error", errors=[str(e)])
+            else:
+                entry.update(status="created", id=record.id)
+                created += 1
+        return created
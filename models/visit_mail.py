@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from collections import defaultdict
+
+from odoo import models, fields, api, Command
+
+from .instrumentation import instrument, track_external
+
+_logger = logging.getLogger(__name__)
+
+MAIL_FLUSH_BATCH = 50
+
+
+class MailMail(models.Model):
+    _inherit = 'mail.mail'
+
+    # set on mails queued by visitor management; the flush worker only picks those
+    visitor_mail_kind = fields.Char(string="Visitor Mail Kind", index='btree_not_null')
+
+    @api.model
+    def process_email_queue(self, ids=None, batch_size=1000):
+        """The standard mail queue cron leaves visitor mails to _cron_flush_visitor_mail."""
+        filters = list(self.env.context.get('filters') or []) + [('visitor_mail_kind', '=', False)]
+        return super(MailMail, self.with_context(filters=filters)).process_email_queue(
+            ids=ids, batch_size=batch_size)
+
+    @instrument(name="mail.flush_visitor_mail")
+    @api.model
+    def _cron_flush_visitor_mail(self):
+        """Send queued visitor mails in batches, one SMTP connection per batch, and record delivery times."""
+        value = self.env['ir.config_parameter'].sudo().get_param('visitor.mail.batch_size')
+        batch_size = int(value) if value and value.isdigit() else MAIL_FLUSH_BATCH
+        self.env.cr.execute("""
+            SELECT id FROM mail_mail
+             WHERE state = 'outgoing' AND visitor_mail_kind IS NOT NULL
+               AND (scheduled_date IS NULL OR scheduled_date <= (now() at time zone 'UTC'))
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [batch_size])
+        mails = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if not mails:
+            return True
+
+        queued = {mail.id: (mail.visitor_mail_kind, mail.create_date) for mail in mails}
+        with track_external('smtp'):
+            mails.send(auto_commit=False, raise_exception=False)
+
+        now = fields.Datetime.now()
+        states = {mail.id: mail.state for mail in self.browse(list(queued)).exists()}
+        latencies, failures = defaultdict(list), defaultdict(int)
+        for mail_id, (kind, queued_at) in queued.items():
+            state = states.get(mail_id, 'sent')  # sent mails with auto_delete are gone
+            if state == 'sent':
+                latencies[kind].append((now - queued_at).total_seconds())
+            elif state == 'exception':
+                failures[kind] += 1
+        self.env['visitor.mail.metric']._record(latencies, failures)
+
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+        if len(mails) == batch_size:
+            self.env.ref('visitor_management.ir_cron_visitor_mail_flush')._trigger()
+        return True
+
+
+class VisitorMailMetric(models.Model):
+    """Daily delivery figures of visitor mails: volume, failures, enqueue-to-delivery seconds."""
+    _name = 'visitor.mail.metric'
+    _description = 'Visitor Mail Metric'
+    _log_access = False
+    _order = 'day desc, kind'
+
+    day = fields.Date(string="Day", required=True)
+    kind = fields.Char(string="Kind", required=True)
+    sent = fields.Integer(string="Sent")
+    failed = fields.Integer(string="Failed")
+    latency_sum = fields.Float(string="Total Latency (s)")
+    latency_max = fields.Float(string="Max Latency (s)")
+    latency_avg = fields.Float(string="Average Latency (s)", compute='_compute_latency_avg')
+
+    _sql_constraints = [
+        ('uniq_day_kind', 'unique(day, kind)', 'One metric row per day and kind.')
+    ]
+
+    @api.depends('sent', 'latency_sum')
+    def _compute_latency_avg(self):
+        for metric in self:
+            metric.latency_avg = metric.latency_sum / metric.sent if metric.sent else 0.0
+
+    @api.model
+    def _record(self, latencies, failures):
+        """Add {kind: [seconds, ...]} delivered and {kind: count} failed mails to today's row."""
+        today = fields.Date.context_today(self)
+        for kind in set(latencies) | set(failures):
+            values = latencies.get(kind, [])
+            self.env.cr.execute("""
+                INSERT INTO visitor_mail_metric (day, kind, sent, failed, latency_sum, latency_max)
+                     VALUES (%(day)s, %(kind)s, %(sent)s, %(failed)s, %(sum)s, %(max)s)
+                ON CONFLICT (day, kind) DO UPDATE
+                        SET sent = visitor_mail_metric.sent + EXCLUDED.sent,
+                            failed = visitor_mail_metric.failed + EXCLUDED.failed,
+                            latency_sum = visitor_mail_metric.latency_sum + EXCLUDED.latency_sum,
+                            latency_max = GREATEST(visitor_mail_metric.latency_max, EXCLUDED.latency_max)
+            """, {
+                'day': today,
+                'kind': kind,
+                'sent': len(values),
+                'failed': failures.get(kind, 0),
+                'sum': sum(values),
+                'max': max(values, default=0.0),
+            })
+        self.invalidate_model()
+
+
+class VisitInformation(models.Model):
+    _inherit = 'visit.information'
+
+    def _queue_mail(self, template_xmlid, kind, email_values=None, attachments=None, context=None):
+        """Render ``template_xmlid`` for each visit into the mail queue and wake the flush worker.
+
+        Attachments are linked to each mail, never to the shared template, and
+        nothing waits on SMTP.
+        """
+        template = self.env.ref(template_xmlid).sudo()
+        if context:
+            template = template.with_context(**context)
+        values = dict(email_values or {}, visitor_mail_kind=kind)
+        if attachments:
+            values['attachment_ids'] = [Command.link(attachment.id) for attachment in attachments]
+        mail_ids = [template.send_mail(rec.id, force_send=False, email_values=values) for rec in self]
+        cron = self.env.ref('visitor_management.ir_cron_visitor_mail_flush', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return mail_ids
+
+    @api.model
+    def _detach_badges_from_approval_template(self):
+        """Unlink the badge PDFs earlier approvals left on the shared approval template."""
+        template = self.env.ref('visitor_management.email_visit_approved', raise_if_not_found=False)
+        if not template:
+            return
+        badges = template.sudo().attachment_ids.filtered(
+            lambda attachment: attachment.res_model == self._name and attachment.mimetype == 'application/pdf')
+        if badges:
+            template.sudo().attachment_ids = [Command.unlink(attachment.id) for attachment in badges]
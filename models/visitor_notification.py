@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import html_escape
+
+_logger = logging.getLogger(__name__)
+
+# events of the same kind for the same host within this many seconds become one digest
+NOTIFY_WINDOW_SECONDS = 30
+NOTIFY_CHANNELS = 'bus'
+# deliveries per channel per worker run; the rest waits for the next run
+NOTIFY_LIMITS = {'bus': 500, 'email': 50, 'sms': 20}
+NOTIFY_RETRY_SECONDS = 60
+# a channel that failed is retried after NOTIFY_RETRY_SECONDS * 2 ** (attempt - 1), at most this many times
+NOTIFY_MAX_ATTEMPTS = 5
+DIGEST_NAMES = 3
+
+EVENT_TEXT = {
+    # event: (title, single message, digest message)
+    'checkin': ("Visitor Check-in", "{name} has checked in at {time}.", "{count} visitors arrived: {names}."),
+    'checkout': ("Visitor Check-out", "{name} has checked out at {time}.", "{count} visitors left: {names}."),
+    'auto_checkin': ("Visitor Auto Check-in", "{name} has been auto checked-in at {time}.",
+                     "{count} visitors were auto checked-in: {names}."),
+}
+
+
+class VisitorNotification(models.Model):
+    """Host notifications waiting to be delivered.
+
+    Events are queued in the transaction that records them and delivered by a
+    cron worker once the coalescing window has passed, so a burst of arrivals
+    for one host becomes a single digest on each channel.
+    """
+    _name = 'visitor.notification'
+    _description = 'Visitor Notification'
+    _order = 'id'
+
+    employee_id = fields.Many2one('hr.employee', string="Host", required=True, ondelete='cascade')
+    visit_id = fields.Many2one('visit.information', string="Visit", ondelete='cascade')
+    event = fields.Selection([
+        ('checkin', 'Check-in'),
+        ('checkout', 'Check-out'),
+        ('auto_checkin', 'Auto Check-in'),
+    ], string="Event", required=True)
+    event_time = fields.Datetime(string="Event Time", required=True, default=fields.Datetime.now)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='pending', required=True, index=True)
+    sent_at = fields.Datetime(string="Sent At")
+    delivered_channels = fields.Char(string="Delivered Channels", help="Comma-separated channels already delivered")
+    attempts = fields.Integer(string="Failed Attempts")
+    next_attempt = fields.Datetime(string="Next Attempt")
+
+    @api.model
+    def _notify(self, visits, event, when=None):
+        """Queue ``event`` for the host of each visit and wake the worker after the window."""
+        when = when or fields.Datetime.now()
+        vals_list = [{
+            'employee_id': visit.employee.id,
+            'visit_id': visit.id,
+            'event': event,
+            'event_time': when,
+        } for visit in visits if visit.employee]
+        if not vals_list:
+            return self.browse()
+        notifications = self.sudo().create(vals_list)
+        cron = self.env.ref('visitor_management.ir_cron_visitor_notifications', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at=fields.Datetime.now() + timedelta(seconds=self._get_window()))
+        return notifications
+
+    @api.model
+    def _get_param(self, key, default):
+        value = self.env['ir.config_parameter'].sudo().get_param(key)
+        return int(value) if value and value.isdigit() else default
+
+    @api.model
+    def _get_window(self):
+        return self._get_param('visitor.notify.window', NOTIFY_WINDOW_SECONDS)
+
+    @api.model
+    def _get_channels(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('visitor.notify.channels', NOTIFY_CHANNELS)
+        return [channel.strip() for channel in value.split(',') if channel.strip() in NOTIFY_LIMITS]
+
+    @api.model
+    def _cron_dispatch(self):
+        """Deliver the pending notifications whose window has passed, one digest per host, event and channel.
+
+        A channel that raises is not charged to the budget and is retried with
+        a backoff; the channels that did deliver are remembered so a retry does
+        not repeat them. After NOTIFY_MAX_ATTEMPTS the notifications are failed.
+        """
+        now = fields.Datetime.now()
+        cutoff = now - timedelta(seconds=self._get_window())
+        self.env.cr.execute("""
+            SELECT id FROM visitor_notification
+             WHERE state = 'pending' AND create_date <= %s
+               AND (next_attempt IS NULL OR next_attempt <= %s)
+          ORDER BY id
+               FOR UPDATE SKIP LOCKED
+        """, [cutoff, now])
+        pending = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        groups = defaultdict(lambda: self.browse())
+        for notification in pending:
+            groups[(notification.employee_id, notification.event, notification.delivered_channels or '')] |= notification
+
+        channels = self._get_channels()
+        budgets = {channel: self._get_param(f'visitor.notify.limit.{channel}', NOTIFY_LIMITS[channel])
+                   for channel in channels}
+        delivered = self.browse()
+        throttled = False
+        for (employee, event, done_channels), notifications in groups.items():
+            done_channels = set(filter(None, done_channels.split(',')))
+            targets = [channel for channel in channels
+                       if channel not in done_channels and notifications._can_deliver(channel, employee)]
+            # a digest goes out on all its channels or waits for the next run
+            if any(budgets[channel] <= 0 for channel in targets):
+                throttled = True
+                continue
+            title, message = notifications._digest_text(event)
+            failed = False
+            for channel in targets:
+                try:
+                    with self.env.cr.savepoint():
+                        getattr(notifications, f'_deliver_{channel}')(employee, title, message)
+                except Exception:
+                    _logger.exception("Could not deliver %s notification to employee %s", channel, employee.id)
+                    failed = True
+                    continue
+                budgets[channel] -= 1
+                done_channels.add(channel)
+            if not failed:
+                delivered |= notifications
+                continue
+            attempts = max(notifications.mapped('attempts')) + 1
+            notifications.write({
+                'delivered_channels': ','.join(sorted(done_channels)),
+                'attempts': attempts,
+                'next_attempt': now + timedelta(seconds=NOTIFY_RETRY_SECONDS * 2 ** (attempts - 1)),
+                'state': 'failed' if attempts >= NOTIFY_MAX_ATTEMPTS else 'pending',
+            })
+        delivered.write({'state': 'done', 'sent_at': now, 'next_attempt': False})
+
+        if not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+
+        cron = self.env.ref('visitor_management.ir_cron_visitor_notifications')
+        if throttled:
+            cron._trigger(at=now + timedelta(seconds=NOTIFY_RETRY_SECONDS))
+        else:
+            self.env.cr.execute("""
+                SELECT min(GREATEST(create_date + %s * interval '1 second', next_attempt))
+                  FROM visitor_notification
+                 WHERE state = 'pending'
+            """, [self._get_window()])
+            due = self.env.cr.fetchone()[0]
+            if due:
+                cron._trigger(at=max(due, now))
+        return True
+
+    def _can_deliver(self, channel, employee):
+        if channel == 'bus':
+            return bool(employee.user_id)
+        if channel == 'email':
+            return bool(employee.work_email)
+        return bool(employee.mobile_phone)
+
+    def _digest_text(self, event):
+        title, single, digest = EVENT_TEXT[event]
+        if len(self) == 1:
+            return title, single.format(name=self.visit_id.name, time=self.event_time.strftime('%H:%M'))
+        names = self.visit_id.mapped('name')
+        shown = ", ".join(names[:DIGEST_NAMES])
+        if len(names) > DIGEST_NAMES:
+            shown += f" and {len(names) - DIGEST_NAMES} more"
+        return title, digest.format(count=len(self), names=shown)
+
+    def _deliver_bus(self, employee, title, message):
+        self.env['bus.bus'].sudo()._sendone(employee.user_id.partner_id, 'simple_notification', {
+            'title': title,
+            'message': message,
+            'sticky': True,
+            'type': 'info',
+        })
+
+    def _deliver_email(self, employee, title, message):
+        # queued; the mail queue sends it
+        self.env['mail.mail'].sudo().create({
+            'subject': title,
+            'body_html': f"<p>{html_escape(message)}</p>",
+            'email_to': employee.work_email,
+            'auto_delete': True,
+        })
+
+    def _deliver_sms(self, employee, title, message):
+        visit = self.visit_id[:1]
+        self.env['visitor.sms.outbox'].sudo()._enqueue(employee.mobile_phone, "91", message, visit=visit)
+
+    @api.autovacuum
+    def _gc_sent(self):
+        limit = fields.Datetime.now() - timedelta(days=7)
+        self.search(['|', '&', ('state', '=', 'done'), ('sent_at', '<', limit),
+                          '&', ('state', '=', 'failed'), ('next_attempt', '<', limit)]).unlink()
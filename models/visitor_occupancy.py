@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import Counter
+from datetime import date, datetime, time
+
+from odoo import models, fields, api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tools.sql import create_index, drop_index
+
+from .ir_websocket import VISITOR_CHANNEL
+
+_logger = logging.getLogger(__name__)
+
+OCCUPANCY_FIELDS = {'check_in', 'check_out', 'company_id', 'location_id'}
+
+
+class VisitorOccupancy(models.Model):
+    """Number of visitors on site, per company and location, as a log of signed changes.
+
+    Every check-in/check-out appends a +1/-1 row: concurrent kiosks and gates
+    only ever insert, so they never contend for a shared counter row. The
+    count of a company and location is the sum of its rows, so a roll call
+    reads a few rows instead of scanning visit.information. A visitor counts
+    from check-in until check-out on the day of the check-in; the
+    reconciliation cron recounts, folds the log into one row per location and
+    drops yesterday's visitors who never checked out.
+    """
+    _name = 'visitor.occupancy'
+    _description = 'Visitor Occupancy'
+    _log_access = False
+
+    company_id = fields.Many2one('res.company', string="Company", required=True, ondelete='cascade')
+    location_id = fields.Many2one('company.location', string="Location", ondelete='cascade')
+    delta = fields.Integer(string="Change")
+
+    def init(self):
+        cr = self.env.cr
+        # one counter row per location used to be updated in place
+        drop_index(cr, 'visitor_occupancy_company_location_uniq', self._table)
+        create_index(cr, 'visitor_occupancy_company_location_idx', self._table, ['company_id', 'location_id'])
+        # the reconciliation and the roll call only ever look at visitors on site
+        create_index(cr, 'visit_information_on_site_idx', 'visit_information',
+                     ['company_id', 'location_id', 'check_in'], where='on_site')
+
+    @api.model
+    def _today_start(self):
+        return datetime.combine(date.today(), time.min)
+
+    @api.model
+    def _apply_deltas(self, deltas):
+        """Record {(company id, location id): delta} and push the new counts once committed."""
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        self.env.cr.execute("""
+            INSERT INTO visitor_occupancy (company_id, location_id, delta)
+                 SELECT * FROM unnest(%s::int[], %s::int[], %s::int[])
+        """, [
+            [company_id for company_id, _location_id in deltas],
+            [location_id for _company_id, location_id in deltas],
+            list(deltas.values()),
+        ])
+        self.invalidate_model(['delta'])
+
+        # counts read after commit include concurrent check-ins committed meanwhile
+        companies = self.env.cr.postcommit.data.setdefault('visitor_occupancy.companies', set())
+        if not companies:
+            dbname = self.env.cr.dbname
+
+            @self.env.cr.postcommit.add
+            def push_counts():
+                with Registry(dbname).cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    env['visitor.occupancy']._notify_companies(companies)
+        companies.update(company_id for company_id, _location_id in deltas)
+
+    @api.model
+    def _get_counts(self, company_ids):
+        """{company id: {"total": n, "locations": {location id or 0: n}}} for the given companies."""
+        result = {company_id: {"total": 0, "locations": {}} for company_id in company_ids}
+        if not company_ids:
+            return result
+        self.env.cr.execute("""
+            SELECT company_id, COALESCE(location_id, 0), sum(delta)
+              FROM visitor_occupancy
+             WHERE company_id IN %s
+          GROUP BY company_id, COALESCE(location_id, 0)
+            HAVING sum(delta) > 0
+        """, [tuple(company_ids)])
+        for company_id, location_id, count in self.env.cr.fetchall():
+            result[company_id]["total"] += count
+            result[company_id]["locations"][location_id] = count
+        return result
+
+    @api.model
+    def _notify_companies(self, company_ids):
+        Bus = self.env['bus.bus'].sudo()
+        for company_id, counts in self._get_counts(list(company_ids)).items():
+            Bus._sendone(
+                (self.env['res.company'].browse(company_id), VISITOR_CHANNEL),
+                'visitor_occupancy',
+                dict(counts, company_id=company_id),
+            )
+
+    @api.model
+    def _cron_reconcile(self):
+        """Recount visitors on site and fold the log into one row per company and location.
+
+        Recount and log come from the same snapshot: rows appended by
+        transactions committed after it are neither deleted nor counted, and
+        still add up afterwards.
+        """
+        cr = self.env.cr
+        cr.execute("""
+            SELECT company_id, location_id, count(*)
+              FROM visit_information
+             WHERE on_site AND check_in >= %s AND company_id IS NOT NULL
+          GROUP BY company_id, location_id
+        """, [self._today_start()])
+        actual = {(company_id, location_id): count for company_id, location_id, count in cr.fetchall()}
+        cr.execute("""
+            DELETE FROM visitor_occupancy
+         RETURNING company_id, location_id, delta
+        """)
+        stored = Counter()
+        for company_id, location_id, delta in cr.fetchall():
+            stored[(company_id, location_id)] += delta
+
+        drift = {key: actual.get(key, 0) - stored[key] for key in set(actual) | set(stored)}
+        drift = {key: value for key, value in drift.items() if value}
+        if drift:
+            _logger.info("Occupancy counters corrected: %s", drift)
+        if actual:
+            cr.execute("""
+                INSERT INTO visitor_occupancy (company_id, location_id, delta)
+                     SELECT * FROM unnest(%s::int[], %s::int[], %s::int[])
+            """, [
+                [company_id for company_id, _location_id in actual],
+                [location_id for _company_id, location_id in actual],
+                list(actual.values()),
+            ])
+        self.invalidate_model(['delta'])
+        if drift:
+            self._notify_companies({company_id for company_id, _location_id in drift})
+
+
+class VisitInformation(models.Model):
+    _inherit = 'visit.information'
+
+    @api.model
+    def get_dashboard_data(self, date_from=None, date_to=None, breakdown=None):
+        # live counters are read on every call, outside the dashboard cache
+        data = dict(super().get_dashboard_data(date_from=date_from, date_to=date_to, breakdown=breakdown))
+        counts = self.env['visitor.occupancy'].sudo()._get_counts(self.env.companies.ids)
+        data['occupancy_by_company'] = {company_id: c["total"] for company_id, c in counts.items()}
+        data['occupancy'] = sum(data['occupancy_by_company'].values())
+        return data
+
+    def _occupancy_keys(self):
+        """{visit id: (company id, location id)} of the visits in self counted as on site."""
+        today_start = self.env['visitor.occupancy']._today_start()
+        return {
+            rec.id: (rec.company_id.id, rec.location_id.id or None)
+            for rec in self
+            if rec.company_id and rec.check_in and not rec.check_out and rec.check_in >= today_start
+        }
+
+    @api.model
+    def _occupancy_update(self, before, after):
+        deltas = Counter()
+        for key in before.values():
+            deltas[key] -= 1
+        for key in after.values():
+            deltas[key] += 1
+        self.env['visitor.occupancy'].sudo()._apply_deltas(deltas)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if any(vals.get('check_in') for vals in vals_list):
+            self._occupancy_update({}, records._occupancy_keys())
+        return records
+
+    def write(self, vals):
+        if not OCCUPANCY_FIELDS.intersection(vals):
+            return super().write(vals)
+        before = self._occupancy_keys()
+        res = super().write(vals)
+        self._occupancy_update(before, self._occupancy_keys())
+        return res
+
+    def unlink(self):
+        before = self._occupancy_keys()
+        res = super().unlink()
+        self._occupancy_update(before, {})
+        return res
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import hmac
+import logging
+import secrets
+
+from psycopg2 import errors
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+OTP_TTL_SECONDS = 300
+OTP_MAX_ATTEMPTS = 5
+
+# token buckets: (capacity, tokens refilled per second)
+RATE_LIMITS = {
+    'otp_send_phone': (3, 1 / 60.0),
+    'otp_send_ip': (20, 1 / 6.0),
+    'otp_verify_ip': (30, 1 / 2.0),
+}
+RATE_LIMIT_RETRIES = 3
+
+
+class VisitorOtp(models.Model):
+    """One pending OTP per phone number, shared by all workers through PostgreSQL."""
+    _name = 'visitor.otp'
+    _description = 'Visitor OTP'
+    _log_access = False
+
+    phone = fields.Char(string="Phone", required=True)
+    code_hash = fields.Char(string="Code Hash", required=True)
+    expires_at = fields.Datetime(string="Expires At", required=True, index=True)
+    attempts = fields.Integer(string="Attempts", default=0)
+
+    _sql_constraints = [
+        ('uniq_phone', 'unique(phone)', 'Only one pending OTP per phone number.')
+    ]
+
+    @api.model
+    def _hash_code(self, phone, code):
+        secret = self.env['ir.config_parameter'].sudo().get_param('database.secret', '')
+        return hmac.new(secret.encode(), f"{phone}:{code}".encode(), hashlib.sha256).hexdigest()
+
+    @api.model
+    def _issue(self, phone):
+        """Store a fresh code for phone (replacing any pending one) and return it."""
+        code = f"{secrets.randbelow(900000) + 100000}"
+        ttl = int(self.env['ir.config_parameter'].sudo().get_param('visitor.otp.ttl', OTP_TTL_SECONDS))
+        self.env.cr.execute("""
+            INSERT INTO visitor_otp (phone, code_hash, expires_at, attempts)
+                 VALUES (%(phone)s, %(hash)s, (now() at time zone 'UTC') + %(ttl)s * interval '1 second', 0)
+            ON CONFLICT (phone) DO UPDATE
+                    SET code_hash = EXCLUDED.code_hash, expires_at = EXCLUDED.expires_at, attempts = 0
+        """, {'phone': phone, 'hash': self._hash_code(phone, code), 'ttl': ttl})
+        return code
+
+    @api.model
+    def _verify(self, phone, code):
+        """Check a code; returns "ok", "invalid", "expired" or "locked". A good code is consumed."""
+        max_attempts = int(self.env['ir.config_parameter'].sudo().get_param('visitor.otp.max_attempts', OTP_MAX_ATTEMPTS))
+        self.env.cr.execute("""
+            SELECT id, code_hash, expires_at < (now() at time zone 'UTC'), attempts
+              FROM visitor_otp WHERE phone = %s FOR UPDATE
+        """, [phone])
+        row = self.env.cr.fetchone()
+        if not row:
+            return "invalid"
+        otp_id, code_hash, expired, attempts = row
+        if expired:
+            return "expired"
+        if attempts >= max_attempts:
+            return "locked"
+        if not hmac.compare_digest(code_hash, self._hash_code(phone, code)):
+            self.env.cr.execute("UPDATE visitor_otp SET attempts = attempts + 1 WHERE id = %s", [otp_id])
+            return "invalid"
+        self.env.cr.execute("DELETE FROM visitor_otp WHERE id = %s", [otp_id])
+        return "ok"
+
+    @api.autovacuum
+    def _gc_expired(self):
+        self.env.cr.execute("DELETE FROM visitor_otp WHERE expires_at < (now() at time zone 'UTC')")
+
+
+class VisitorRateLimit(models.Model):
+    """Token buckets keyed by e.g. "otp_send_phone:9876543210"."""
+    _name = 'visitor.rate.limit'
+    _description = 'Visitor Rate Limit'
+    _log_access = False
+
+    key = fields.Char(string="Key", required=True)
+    tokens = fields.Float(string="Tokens")
+    updated_at = fields.Datetime(string="Updated At", index=True)
+
+    _sql_constraints = [
+        ('uniq_key', 'unique(key)', 'Rate limit keys must be unique.')
+    ]
+
+    @api.model
+    def _consume(self, bucket, subject):
+        """Take one token from the bucket; False when the caller is over its limit.
+
+        Refill and take happen in one statement, committed in its own short
+        transaction: requests sharing a key (a kiosk IP) never wait on each
+        other's request, and an update conflicting with a concurrent one is
+        retried here instead of failing the caller's transaction.
+        """
+        capacity, rate = RATE_LIMITS[bucket]
+        key = f"{bucket}:{subject}"
+        for _attempt in range(RATE_LIMIT_RETRIES):
+            try:
+                with self.env.registry.cursor() as cr:
+                    # a refused request leaves the row alone, so the refill keeps accruing
+                    cr.execute("""
+                        INSERT INTO visitor_rate_limit AS r (key, tokens, updated_at)
+                             VALUES (%(key)s, %(capacity)s - 1, now() at time zone 'UTC')
+                        ON CONFLICT (key) DO UPDATE
+                                SET tokens = LEAST(%(capacity)s, r.tokens + %(rate)s * EXTRACT(
+                                                 EPOCH FROM (now() at time zone 'UTC') - r.updated_at)) - 1,
+                                    updated_at = now() at time zone 'UTC'
+                              WHERE LEAST(%(capacity)s, r.tokens + %(rate)s * EXTRACT(
+                                        EPOCH FROM (now() at time zone 'UTC') - r.updated_at)) >= 1
+                          RETURNING r.tokens
+                    """, {'key': key, 'capacity': capacity, 'rate': rate})
+                    allowed = bool(cr.fetchone())
+                break
+            except errors.SerializationFailure:
+                continue
+        else:
+            _logger.warning("Rate limit %s busy for %s, refusing the request", bucket, subject)
+            return False
+        if not allowed:
+            _logger.info("Rate limit %s exceeded for %s", bucket, subject)
+        return allowed
+
+    @api.autovacuum
+    def _gc_idle_buckets(self):
+        # an idle bucket is full again; dropping it changes nothing
+        self.env.cr.execute("""
+            DELETE FROM visitor_rate_limit WHERE updated_at < (now() at time zone 'UTC') - interval '1 day'
+        """)
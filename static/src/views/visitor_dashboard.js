@@ -2,22 +2,130 @@
 
 import { useState } from "@odoo/owl";
 import { useService } from "@web/core/utils/hooks";
-import { Component, onWillStart } from "@odoo/owl";
+import { Component, onWillStart, onWillUnmount } from "@odoo/owl";
+
+// bus deltas are applied at most once per interval
+const FLUSH_INTERVAL = 1000;
+
+// whether the transaction `txid` was committed in a "xmin:xmax:xip,..." snapshot
+function visibleIn(snapshot, txid) {
+    return txid < snapshot.xmin || (txid < snapshot.xmax && !snapshot.xip.has(txid));
+}
+
+function parseSnapshot(text) {
+    const [xmin, xmax, xip] = text.split(":");
+    return {
+        xmin: Number(xmin),
+        xmax: Number(xmax),
+        xip: new Set(xip ? xip.split(",").map(Number) : []),
+    };
+}
 
 export class VisitorDashboard extends Component {
     setup() {
         this.orm = useService("orm");
+        this.busService = useService("bus_service");
         this.state = useState({
             selectedStatus: null,
-            statusCounts: { pending: 0, approved: 0, cancelled: 0 },
+            statusCounts: { pending: 0, approved: 0, cancelled: 0, on_site: 0, occupancy: 0 },
         });
+        this.occupancyByCompany = {};
+        // deltas received before the counts are kept until then
+        this.snapshot = null;
 
         onWillStart(async () => {
             const counts = await this.orm.call("visit.information", "get_dashboard_data");
+            this.occupancyByCompany = counts.occupancy_by_company || {};
             this.state.statusCounts = counts;   // ✅ reactive assignment
+            this.snapshot = parseSnapshot(counts.snapshot);
+            if (this.pendingDeltas.length) {
+                this.scheduleFlush();
+            }
+        });
+
+        // live occupancy pushed by the server on every check-in/check-out
+        this.onOccupancy = (payload) => this.updateOccupancy(payload);
+        this.busService.subscribe("visitor_occupancy", this.onOccupancy);
+
+        // visit changes: counters and visible rows are patched client-side
+        this.pendingDeltas = [];
+        this.flushTimer = null;
+        this.onDelta = (payload) => this.queueDelta(payload);
+        this.busService.subscribe("visitor_delta", this.onDelta);
+
+        onWillUnmount(() => {
+            this.busService.unsubscribe("visitor_occupancy", this.onOccupancy);
+            this.busService.unsubscribe("visitor_delta", this.onDelta);
+            clearTimeout(this.flushTimer);
         });
     }
 
+    queueDelta(payload) {
+        this.pendingDeltas.push(payload);
+        this.scheduleFlush();
+    }
+
+    scheduleFlush() {
+        if (this.snapshot && !this.flushTimer) {
+            this.flushTimer = setTimeout(() => this.flushDeltas(), FLUSH_INTERVAL);
+        }
+    }
+
+    flushDeltas() {
+        this.flushTimer = null;
+        const deltas = this.pendingDeltas;
+        this.pendingDeltas = [];
+
+        const { date_from, date_to, company_ids = [], scope } = this.state.statusCounts;
+        const counts = {};
+        const rows = {};
+        for (const { company_id, c, r, x } of deltas) {
+            if (!company_ids.includes(company_id) || visibleIn(this.snapshot, x)) {
+                continue;  // other company, or already counted in the snapshot
+            }
+            for (const [day, status, onSite, host, n] of c) {
+                if (!status || !day || day < date_from || day > date_to || (scope && host !== scope)) {
+                    continue;
+                }
+                counts[status] = (counts[status] || 0) + n;
+                if (onSite) {
+                    counts.on_site = (counts.on_site || 0) + n;
+                }
+            }
+            Object.assign(rows, r);
+        }
+        for (const [key, n] of Object.entries(counts)) {
+            this.state.statusCounts[key] = (this.state.statusCounts[key] || 0) + n;
+        }
+        this.state.statusCounts.occupancy = Object.values(this.occupancyByCompany).reduce((a, b) => a + b, 0);
+        this.applyRows(rows);
+    }
+
+    applyRows(rows) {
+        const list = this.props.list;
+        if (!list) {
+            return;
+        }
+        for (const record of list.records) {
+            const values = rows[record.resId];
+            if (!values || record.dirty) {
+                continue;
+            }
+            const known = Object.fromEntries(
+                Object.entries(values).filter(([fieldName]) => fieldName in record.data)
+            );
+            record._applyValues(known);
+        }
+    }
+
+    updateOccupancy({ company_id, total }) {
+        if (!(company_id in this.occupancyByCompany)) {
+            return;  // not one of the companies shown
+        }
+        this.occupancyByCompany[company_id] = total;
+        this.scheduleFlush();
+    }
+
     async setSearchContext(ev) {
         const status = ev.currentTarget.dataset.status;
 
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+from . import test_visit_indexes
+from . import test_walkin_questions
+from . import test_gate_scan
+from . import test_visit_mail
+from . import test_visit_archive
+from . import test_gate_sync
+from . import test_visitor_notification
+from . import test_notebook_answers
+from . import test_instrumentation
+from . import test_visit_import
+from . import test_sms_gateway
+from . import test_visitor_otp
+from . import test_visitor_occupancy
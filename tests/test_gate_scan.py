@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from odoo import api, fields, SUPERUSER_ID
+from odoo.service.model import retrying
+from odoo.sql_db import db_connect
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestGateScanConcurrency(TransactionCase):
+    """Two scans of the same pass in separate, really concurrent transactions.
+
+    The data is committed from independent connections (the test cursor
+    would hide it from them) and removed again in the cleanup, together with
+    the occupancy deltas, bus messages and cron triggers the scans commit.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.db = db_connect(self.env.cr.dbname)
+        with self.db.cursor() as cr:
+            # rows the scans add as a side effect are removed by id in the cleanup
+            cr.execute("""
+                SELECT (SELECT COALESCE(max(id), 0) FROM visitor_occupancy),
+                       (SELECT COALESCE(max(id), 0) FROM bus_bus),
+                       (SELECT COALESCE(max(id), 0) FROM ir_cron_trigger)
+            """)
+            self.last_ids = cr.fetchone()
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            company = env.company
+            employee = env['hr.employee'].create({'name': 'Gate Host'})
+            device = env['visitor.gate.device'].create({'name': 'Test Turnstile', 'company_id': company.id})
+            visit = env['visit.information'].with_context(tracking_disable=True).create({
+                'name': 'Gate Visitor',
+                'phone': '9200000001',
+                'employee': employee.id,
+                'company_id': company.id,
+                'visiting_date': fields.Datetime.now(),
+                'status': 'approved',
+            })
+            self.visit_id, self.employee_id, self.device_id = visit.id, employee.id, device.id
+            self.token = visit.qr_token
+            self.device = (device.id, company.id, None)
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['visit.information'].browse(self.visit_id).unlink()
+            env['visitor.gate.device'].browse(self.device_id).unlink()
+            env['hr.employee'].browse(self.employee_id).unlink()
+        # after the commit above: its post-commit occupancy push adds bus rows too
+        last_occupancy, last_bus, last_trigger = self.last_ids
+        with self.db.cursor() as cr:
+            cr.execute("DELETE FROM visitor_occupancy WHERE id > %s AND company_id = %s",
+                       [last_occupancy, self.device[1]])
+            cr.execute("""
+                DELETE FROM bus_bus
+                 WHERE id > %s AND (message LIKE '%%"visitor_delta"%%' OR message LIKE '%%"visitor_occupancy"%%')
+            """, [last_bus])
+            cr.execute("""
+                DELETE FROM ir_cron_trigger t USING ir_cron c, ir_model_data d
+                 WHERE t.id > %s AND t.cron_id = c.id
+                   AND d.model = 'ir.cron' AND d.res_id = c.id AND d.module = 'visitor_management'
+            """, [last_trigger])
+
+    def _scan(self, env):
+        return env['visit.information']._gate_scan(self.token, self.device)
+
+    def _wait_for_lock(self, pid, timeout=10):
+        with self.db.cursor() as cr:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                cr.execute("SELECT wait_event_type FROM pg_stat_activity WHERE pid = %s", [pid])
+                row = cr.fetchone()
+                if row and row[0] == 'Lock':
+                    return True
+                cr.rollback()
+                time.sleep(0.05)
+        return False
+
+    def test_double_scan(self):
+        cr_first = self.db.cursor()
+        try:
+            first = self._scan(api.Environment(cr_first, SUPERUSER_ID, {}))  # holds the row lock
+
+            started, second, attempts, failures = threading.Event(), {}, [], []
+
+            def scan_again():
+                try:
+                    with self.db.cursor() as cr:
+                        env = api.Environment(cr, SUPERUSER_ID, {})
+                        # take the snapshot before the first scan commits
+                        cr.execute("SELECT pg_backend_pid()")
+                        second['pid'] = cr.fetchone()[0]
+                        started.set()
+
+                        def scan():
+                            attempts.append(1)
+                            return self._scan(env)
+
+                        second['row'] = retrying(scan, env)
+                except Exception as e:
+                    failures.append(e)
+                    started.set()
+
+            thread = threading.Thread(target=scan_again)
+            thread.start()
+            self.assertTrue(started.wait(10))
+            self.assertFalse(failures)
+            self.assertTrue(self._wait_for_lock(second['pid']), "second scan did not wait for the first one")
+            cr_first.commit()
+        finally:
+            cr_first.close()
+        thread.join(30)
+
+        self.assertFalse(failures, failures)
+        self.assertEqual(first['action'], 'checkin')
+        # the first attempt hit the serialization failure, the retry saw the check-in
+        self.assertEqual(len(attempts), 2)
+        self.assertIsNone(second['row']['action'])
+        self.assertTrue(second['row']['duplicate'])
+
+        with self.db.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            visit = env['visit.information'].browse(self.visit_id)
+            self.assertEqual(visit.check_in, first['new_in'])
+            self.assertFalse(visit.check_out)
+            notifications = env['visitor.notification'].search([('visit_id', '=', self.visit_id)])
+            self.assertEqual(notifications.mapped('event'), ['checkin'])
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta, timezone
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestGateSync(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Visit = cls.env['visit.information'].with_context(tracking_disable=True)
+        cls.device = cls.env['visitor.gate.device'].create({'name': 'Offline Gate'})
+        cls.employee = cls.env['hr.employee'].create({'name': 'Offline Host'})
+        cls.visit = cls.Visit.create({
+            'name': 'Offline Visitor',
+            'phone': '9500000001',
+            'employee': cls.employee.id,
+            'visiting_date': datetime.now(),
+            'status': 'approved',
+        })
+
+    def _upload(self, *events):
+        device = (self.device.id, self.device.company_id.id, False)
+        return self.Visit._gate_apply_events(device, [
+            {'key': key, 'id': self.visit.id, 'action': action,
+             'at': at.replace(tzinfo=timezone.utc).timestamp()}
+            for key, action, at in events
+        ])
+
+    def _notifications(self):
+        return self.env['visitor.notification'].search([('visit_id', '=', self.visit.id)])
+
+    def test_checkout_without_checkin_is_rejected(self):
+        result, = self._upload(('out-1', 'checkout', datetime.now() - timedelta(minutes=5)))
+        self.assertEqual(result['state'], 'rejected')
+        self.assertEqual(result['message'], "Cannot check-out before check-in.")
+        self.assertFalse(self.visit.check_in)
+        self.assertFalse(self.visit.check_out)
+        self.assertFalse(self._notifications())
+
+    def test_offline_events_notify_the_host(self):
+        arrived = (datetime.now() - timedelta(hours=2)).replace(microsecond=0)
+        left = arrived + timedelta(hours=1)
+        results = self._upload(('in-1', 'checkin', arrived), ('out-1', 'checkout', left))
+        self.assertEqual([r['state'] for r in results], ['applied', 'applied'])
+        self.assertEqual((self.visit.check_in, self.visit.check_out), (arrived, left))
+        self.assertEqual(
+            sorted((n.event, n.event_time, n.employee_id) for n in self._notifications()),
+            [('checkin', arrived, self.employee), ('checkout', left, self.employee)],
+        )
+
+        # an earlier check-in from another gate moves the time but is no news to the host
+        self._upload(('in-2', 'checkin', arrived - timedelta(minutes=10)))
+        self.assertEqual(len(self._notifications()), 2)
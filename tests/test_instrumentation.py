@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+from odoo.addons.visitor_management.models import instrumentation
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestInstrumentation(TransactionCase):
+
+    def _measurement(self):
+        return {'queries': 3, 'sql_time': 0.01, 'external': defaultdict(float), 'calls': defaultdict(int)}
+
+    def test_pending_figures_stay_with_their_database(self):
+        other_db = f"{self.env.cr.dbname}_other"
+        self.addCleanup(instrumentation._pending.pop, other_db, None)
+        with instrumentation._pending_lock:
+            before = dict(instrumentation._pending.get(self.env.cr.dbname, {}))
+
+        instrumentation._record(other_db, 'Test.endpoint', self._measurement(), 0.2, False)
+        self.assertIn(('visitor_sql_queries_total', 'endpoint="Test.endpoint"'), instrumentation._pending[other_db])
+        self.assertEqual(dict(instrumentation._pending.get(self.env.cr.dbname, {})), before)
+
+        rows = self.env['visitor.request.metric']._get_rows()
+        self.assertNotIn('endpoint="Test.endpoint"', {labels for _metric, labels, _value in rows})
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestNotebookAnswers(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        location = cls.env['company.location'].create({'name': 'Answer Desk', 'company_id': cls.env.company.id})
+        cls.questions = cls.env['company.location.question'].create([
+            {'location_id': location.id, 'question_text': f"Answer question {i}"} for i in range(2)
+        ])
+        cls.visit = cls.env['visit.information'].with_context(tracking_disable=True).create({
+            'name': 'Answering Visitor',
+            'phone': '9700000001',
+            'employee': cls.env['hr.employee'].create({'name': 'Answer Host'}).id,
+            'location_id': location.id,
+        })
+        cls.Entry = cls.env['visitor.notebook.entry']
+
+    def _answers(self):
+        entries = self.Entry.search([('visitor_id', '=', self.visit.id)])
+        return {entry.question_id.id: entry.answer_selection for entry in entries}
+
+    def test_upsert_creates_and_updates(self):
+        first, second = self.questions.ids
+        self.Entry._upsert_answers(self.visit.id, {first: 'yes'})
+        self.assertEqual(self._answers(), {first: 'yes'})
+
+        # what a second submit that read the question as unanswered sends
+        self.Entry._upsert_answers(self.visit.id, {first: 'no', second: 'yes'})
+        self.assertEqual(self._answers(), {first: 'no', second: 'yes'})
+        self.assertEqual(self.Entry.search_count([('visitor_id', '=', self.visit.id)]), 2)
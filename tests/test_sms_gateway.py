@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.addons.visitor_management.models import sms_gateway
+from odoo.addons.visitor_management.models.sms_gateway import (
+    DEFAULT_MAX_ATTEMPTS, SUCCESS_CODE, TRANSPORTS, SMSGatewayClient,
+)
+from odoo.tests import TransactionCase, tagged
+
+
+class FailingTransport:
+    """Answers every call with a gateway error code."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def post(self, params):
+        return ",".join(f"1702|{dest}|0" for dest in params['destination'].split(','))
+
+    def close(self):
+        pass
+
+
+@tagged('post_install', '-at_install')
+class TestParseResponse(TransactionCase):
+
+    def test_matches_numbers_on_their_digits(self):
+        chunk = ['919876543210', '919812345678']
+        results = SMSGatewayClient._parse_response(
+            chunk, f"{SUCCESS_CODE}|9876543210|id-1,1702|+919812345678|id-2")
+        self.assertTrue(results['919876543210'][0])
+        self.assertFalse(results['919812345678'][0])
+
+    def test_ambiguous_suffix_is_not_guessed(self):
+        chunk = ['919876543210', '449876543210']
+        results = SMSGatewayClient._parse_response(chunk, f"{SUCCESS_CODE}|9876543210|id-1")
+        self.assertEqual([ok for ok, _detail in results.values()], [False, False])
+
+    def test_single_number_takes_the_single_status(self):
+        results = SMSGatewayClient._parse_response(['919876543210'], f"{SUCCESS_CODE}|unknown|id-1")
+        self.assertTrue(results['919876543210'][0])
+
+    def test_bare_error_code_fails_the_chunk(self):
+        chunk = ['919876543210', '919812345678']
+        results = SMSGatewayClient._parse_response(chunk, "1710")
+        self.assertEqual(results, {dest: (False, "1710") for dest in chunk})
+
+
+@tagged('post_install', '-at_install')
+class TestSmsOutbox(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.Outbox = self.env['visitor.sms.outbox']
+        self.addCleanup(sms_gateway._clients.pop, self.env.cr.dbname, None)
+        patcher = patch.dict(TRANSPORTS, {'failing': FailingTransport})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _use_transport(self, name):
+        self.env['ir.config_parameter'].sudo().set_param('visitor.sms.transport', name)
+
+    def _run_cron(self, message):
+        message.next_try_at = fields.Datetime.now() - timedelta(minutes=1)
+        self.env.flush_all()
+        self.Outbox._cron_send_outbox()
+        message.invalidate_recordset()
+
+    def test_failed_message_backs_off_then_errors(self):
+        self._use_transport('failing')
+        message = self.Outbox._enqueue('9876543210', '91', "Your pass is ready")
+
+        before = fields.Datetime.now()
+        self._run_cron(message)
+        self.assertEqual((message.state, message.attempts), ('outgoing', 1))
+        self.assertGreaterEqual(message.next_try_at, before + timedelta(minutes=2))
+
+        # not due yet: left alone
+        self.env.flush_all()
+        self.Outbox._cron_send_outbox()
+        message.invalidate_recordset()
+        self.assertEqual(message.attempts, 1)
+
+        for _attempt in range(DEFAULT_MAX_ATTEMPTS - 1):
+            self._run_cron(message)
+        self.assertEqual((message.state, message.attempts), ('error', DEFAULT_MAX_ATTEMPTS))
+
+    def test_accepted_message_is_sent(self):
+        self._use_transport('log')
+        message = self.Outbox._enqueue('9876543210', '91', "Your pass is ready")
+        self._run_cron(message)
+        self.assertEqual(message.state, 'sent')
+        self.assertTrue(message.sent_at)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestVisitArchive(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.location = cls.env['company.location'].create({'name': 'Archive Desk', 'company_id': cls.env.company.id})
+        # same wording on purpose
+        cls.questions = cls.env['company.location.question'].create([
+            {'location_id': cls.location.id, 'question_text': "Do you carry a laptop?"} for _i in range(2)
+        ])
+        cls.visit = cls.env['visit.information'].with_context(tracking_disable=True).create({
+            'name': 'Archived Visitor',
+            'phone': '9400000001',
+            'employee': cls.env['hr.employee'].create({'name': 'Archive Host'}).id,
+            'location_id': cls.location.id,
+            'visit_type': 'walkin',
+        })
+
+    def test_answers_keep_questions_with_the_same_text(self):
+        entries = self.env['visitor.notebook.entry'].search([('visitor_id', '=', self.visit.id)], order='question_id')
+        self.assertEqual(len(entries), 2)
+        entries[0].answer_selection = 'yes'
+        entries[1].answer_selection = 'no'
+
+        visit_id = self.visit.id
+        archive = self.env['visit.archive']._archive_visits(self.visit)
+        self.assertFalse(self.env['visit.information'].browse(visit_id).exists())
+        self.assertEqual(archive.visit_ref, visit_id)
+        self.assertEqual(json.loads(archive.answers), [
+            {'question_id': self.questions[0].id, 'question': "Do you carry a laptop?", 'answer': 'yes'},
+            {'question_id': self.questions[1].id, 'question': "Do you carry a laptop?", 'answer': 'no'},
+        ])
+
+    def test_visit_ref_indexed_once(self):
+        self.env.cr.execute("""
+            SELECT indexname FROM pg_indexes
+             WHERE tablename = 'visit_archive' AND indexdef LIKE '%%(visit_ref)%%'
+        """)
+        self.assertEqual([row[0] for row in self.env.cr.fetchall()], ['visit_archive_uniq_visit_ref'])
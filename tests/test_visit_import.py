@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestVisitImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.other_company = cls.env['res.company'].create({'name': 'Other Import Co'})
+        cls.env.user.company_ids |= cls.other_company
+        Employee = cls.env['hr.employee']
+        cls.host = Employee.create({'name': 'Own Host', 'work_email': 'own.host@example.com',
+                                    'company_id': cls.company.id})
+        cls.other_host = Employee.create({'name': 'Other Host', 'work_email': 'other.host@example.com',
+                                          'company_id': cls.other_company.id})
+        Location = cls.env['company.location']
+        cls.location = Location.create({'name': 'Own Lobby', 'company_id': cls.company.id})
+        cls.other_location = Location.create({'name': 'Other Lobby', 'company_id': cls.other_company.id})
+        cls.day = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+
+    def _import(self, **row):
+        row = dict({'name': 'Imported Visitor', 'phone': '9800000001', 'visiting_date': self.day}, **row)
+        Visit = self.env['visit.information'].with_company(self.company).with_context(
+            allowed_company_ids=[self.company.id, self.other_company.id])
+        return Visit._import_preregistrations([row])
+
+    def test_host_and_location_of_the_import_company(self):
+        result = self._import(employee='own.host@example.com', location='Own Lobby')
+        self.assertEqual(result['created'], 1)
+        visit = self.env['visit.information'].browse(result['rows'][0]['id'])
+        self.assertEqual((visit.employee, visit.location_id, visit.company_id),
+                         (self.host, self.location, self.company))
+
+    def test_other_company_rows_are_rejected(self):
+        for row in ({'employee': 'other.host@example.com'}, {'employee': self.other_host.id},
+                    {'location': 'Other Lobby'}, {'location_id': self.other_location.id}):
+            result = self._import(**row)
+            self.assertEqual(result['created'], 0, row)
+            self.assertEqual(result['rows'][0]['status'], 'error', row)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from psycopg2 import IntegrityError
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL, mute_logger
+from odoo.tools.sql import index_exists
+
+KIOSK_INDEXES = (
+    'visit_information_phone_visiting_date_idx',
+    'visit_information_status_visiting_date_idx',
+    'visit_information_approved_visiting_date_idx',
+    'visit_information_qr_token_uniq_idx',
+)
+
+
+@tagged('post_install', '-at_install')
+class TestVisitIndexes(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Visit = cls.env['visit.information'].with_context(tracking_disable=True)
+        cls.employee = cls.env['hr.employee'].create({'name': 'Index Host'})
+        cls.today = fields.Datetime.to_datetime(fields.Date.today()) + timedelta(hours=10)
+
+    def _visit(self, phone, visiting_date=None, **vals):
+        return self.Visit.create(dict({
+            'name': f"Visitor {phone}",
+            'phone': phone,
+            'employee': self.employee.id,
+            'visiting_date': visiting_date or self.today,
+        }, **vals))
+
+    def _plan(self, domain):
+        """EXPLAIN of the query the ORM runs for ``domain``, sequential scans disabled.
+
+        The test tables are tiny, so the planner would rather scan them; with
+        seqscan off, it still has to fall back to one when no index fits.
+        """
+        query = self.Visit._search(domain, limit=1)
+        self.env.cr.execute("SET LOCAL enable_seqscan = off")
+        try:
+            self.env.cr.execute(SQL("EXPLAIN %s", query.select()))
+            return "\n".join(row[0] for row in self.env.cr.fetchall())
+        finally:
+            self.env.cr.execute("SET LOCAL enable_seqscan = on")
+
+    def test_indexes_exist(self):
+        for name in KIOSK_INDEXES:
+            self.assertTrue(index_exists(self.env.cr, name), f"missing index {name}")
+
+    def test_qr_token_unique(self):
+        visit = self._visit('9000000001')
+        with self.assertRaises(IntegrityError), mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+            self._visit('9000000002', qr_token=visit.qr_token)
+            self.env.flush_all()
+
+    def test_qr_token_fresh_on_copy(self):
+        visit = self._visit('9000000003')
+        self.assertNotEqual(visit.copy().qr_token, visit.qr_token)
+
+    def test_find_today_visitor(self):
+        phone = '9000000004'
+        self._visit(phone, self.today - timedelta(days=1))
+        today_visit = self._visit(phone)
+        self._visit(phone, self.today + timedelta(days=1))
+
+        self.assertEqual(self.Visit._find_today_visitor(phone), today_visit)
+        self.assertFalse(self.Visit._find_today_visitor('9000000099'))
+
+    def test_lookups_use_indexes(self):
+        self._visit('9000000005', status='approved')
+        self.env.flush_all()
+        self.env.cr.execute("ANALYZE visit_information")
+        day_start = fields.Datetime.to_datetime(fields.Date.today())
+        day_end = day_start + timedelta(days=1)
+        today = [('visiting_date', '>=', day_start), ('visiting_date', '<', day_end)]
+
+        plan = self._plan([('phone', '=', '9000000005')] + today)
+        self.assertIn('visit_information_phone_visiting_date_idx', plan)
+
+        plan = self._plan([('qr_token', '=', 'no-such-token'), ('status', '=', 'approved')])
+        self.assertIn('visit_information_qr_token_uniq_idx', plan)
+
+        # dashboard and gate lookups: either index on (status, visiting_date) fits
+        plan = self._plan([('status', '=', 'approved')] + today)
+        self.assertRegex(plan, r'visit_information_(status|approved)_visiting_date_idx')
+        self.assertNotIn('Seq Scan on visit_information', plan)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo import Command
+from odoo.addons.mail.models.mail_mail import MailMail
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestVisitMail(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Mail = cls.env['mail.mail'].sudo()
+        cls.visitor_mail = cls.Mail.create({
+            'subject': 'Visit approved', 'email_to': 'visitor@example.com', 'visitor_mail_kind': 'approval',
+        })
+        cls.other_mail = cls.Mail.create({'subject': 'Newsletter', 'email_to': 'reader@example.com'})
+
+    def _sent_by(self, method):
+        sent = []
+
+        def send(mails, *args, **kwargs):
+            sent.extend(mails.ids)
+
+        with patch.object(MailMail, 'send', autospec=True, side_effect=send):
+            method()
+        return sent
+
+    def test_mail_queue_skips_visitor_mails(self):
+        sent = self._sent_by(lambda: self.Mail.process_email_queue())
+        self.assertIn(self.other_mail.id, sent)
+        self.assertNotIn(self.visitor_mail.id, sent)
+
+        sent = self._sent_by(lambda: self.Mail.process_email_queue(ids=[self.visitor_mail.id, self.other_mail.id]))
+        self.assertEqual(sent, [self.other_mail.id])
+
+    def test_flush_worker_sends_visitor_mails_only(self):
+        sent = self._sent_by(lambda: self.Mail._cron_flush_visitor_mail())
+        self.assertIn(self.visitor_mail.id, sent)
+        self.assertNotIn(self.other_mail.id, sent)
+
+    def test_detach_badges_keeps_other_attachments(self):
+        template = self.env.ref('visitor_management.email_visit_approved').sudo()
+        visit = self.env['visit.information'].with_context(tracking_disable=True).create({
+            'name': 'Badge Visitor', 'phone': '9300000001',
+            'employee': self.env['hr.employee'].create({'name': 'Badge Host'}).id,
+        })
+        badge = self.env['ir.attachment'].create({
+            'name': 'Approved_Visit.pdf', 'raw': b'%PDF-1.4', 'mimetype': 'application/pdf',
+            'res_model': 'visit.information', 'res_id': visit.id,
+        })
+        terms = self.env['ir.attachment'].create({
+            'name': 'Site rules.pdf', 'raw': b'%PDF-1.4', 'mimetype': 'application/pdf',
+        })
+        template.attachment_ids = [Command.set((badge | terms).ids)]
+
+        self.env['visit.information']._detach_badges_from_approval_template()
+        self.assertEqual(template.attachment_ids, terms)
+        self.assertTrue(badge.exists())
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from odoo.addons.visitor_management.models.visitor_notification import NOTIFY_MAX_ATTEMPTS
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestVisitorNotification(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        params = cls.env['ir.config_parameter'].sudo()
+        params.set_param('visitor.notify.window', '0')
+        params.set_param('visitor.notify.channels', 'bus,email')
+        cls.employee = cls.env['hr.employee'].create({
+            'name': 'Notified Host',
+            'user_id': cls.env.user.id,
+            'work_email': 'host@example.com',
+        })
+        visit = cls.env['visit.information'].with_context(tracking_disable=True).create({
+            'name': 'Notified Visitor',
+            'phone': '9600000001',
+            'employee': cls.employee.id,
+            'visiting_date': datetime.now(),
+        })
+        cls.Notification = cls.env['visitor.notification']
+        cls.notification = cls.Notification._notify(visit, 'checkin')
+
+    def _dispatch(self, email_error=None):
+        Model = type(self.Notification)
+        with patch.object(Model, '_deliver_bus', autospec=True) as bus, \
+                patch.object(Model, '_deliver_email', autospec=True, side_effect=email_error) as email:
+            self.Notification._cron_dispatch()
+        return bus.call_count, email.call_count
+
+    def test_failed_channel_is_retried_alone(self):
+        self.assertEqual(self._dispatch(email_error=RuntimeError("SMTP down")), (1, 1))
+        self.assertEqual(self.notification.state, 'pending')
+        self.assertEqual(self.notification.attempts, 1)
+        self.assertEqual(self.notification.delivered_channels, 'bus')
+        self.assertGreater(self.notification.next_attempt, datetime.now())
+
+        # not due yet
+        self.assertEqual(self._dispatch(), (0, 0))
+
+        self.notification.next_attempt = datetime.now() - timedelta(seconds=1)
+        self.assertEqual(self._dispatch(), (0, 1))
+        self.assertEqual(self.notification.state, 'done')
+        self.assertTrue(self.notification.sent_at)
+
+    def test_gives_up_after_max_attempts(self):
+        for _attempt in range(NOTIFY_MAX_ATTEMPTS):
+            self.notification.next_attempt = False
+            self._dispatch(email_error=RuntimeError("SMTP down"))
+        self.assertEqual(self.notification.state, 'failed')
+        self.assertEqual(self.notification.attempts, NOTIFY_MAX_ATTEMPTS)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestVisitorOccupancy(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Occupancy = cls.env['visitor.occupancy']
+        cls.company = cls.env.company
+        cls.location = cls.env['company.location'].create({'name': 'Occupancy Lobby', 'company_id': cls.company.id})
+        employee = cls.env['hr.employee'].create({'name': 'Occupancy Host'})
+        cls.visits = cls.env['visit.information'].with_context(tracking_disable=True).create([{
+            'name': f"Occupancy Visitor {i}",
+            'phone': f"93000000{i:02d}",
+            'employee': employee.id,
+            'company_id': cls.company.id,
+            'location_id': cls.location.id,
+            'visiting_date': datetime.now(),
+            'status': 'approved',
+        } for i in range(3)])
+
+    def _count(self):
+        self.env.flush_all()
+        return self.Occupancy._get_counts([self.company.id])[self.company.id]["locations"].get(self.location.id, 0)
+
+    def _rows(self):
+        self.env.flush_all()
+        return self.Occupancy.search([('company_id', '=', self.company.id), ('location_id', '=', self.location.id)])
+
+    def test_check_in_and_out_append_deltas(self):
+        rows_before = len(self._rows())
+        self.visits.write({'check_in': datetime.now()})
+        self.assertEqual(self._count(), 3)
+        self.visits[0].write({'check_out': datetime.now()})
+        self.assertEqual(self._count(), 2)
+        # every change is a new row; none is updated in place
+        rows = self._rows()
+        self.assertEqual(len(rows), rows_before + 2)
+        self.assertEqual(rows.mapped('delta')[-2:], [3, -1])
+
+    def test_reconcile_corrects_drift_and_folds_the_log(self):
+        self.visits[:2].write({'check_in': datetime.now()})
+        self.visits[1].write({'check_out': datetime.now()})
+        # a lost update, as a crashed worker would leave it
+        self.Occupancy._apply_deltas({(self.company.id, self.location.id): 5})
+        self.assertEqual(self._count(), 6)
+
+        self.env.flush_all()
+        self.Occupancy._cron_reconcile()
+        self.assertEqual(self._count(), 1)
+        self.assertEqual(self._rows().mapped('delta'), [1])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.addons.visitor_management.models.visitor_otp import OTP_MAX_ATTEMPTS, RATE_LIMITS
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestVisitorOtp(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.Otp = self.env['visitor.otp']
+        self.phone = '9900000001'
+
+    def _wrong(self, code):
+        return f"{(int(code) + 1) % 1000000:06d}"
+
+    def test_code_is_stored_as_hmac_and_consumed(self):
+        code = self.Otp._issue(self.phone)
+        otp = self.Otp.search([('phone', '=', self.phone)])
+        self.assertNotIn(code, otp.code_hash)
+        self.assertEqual(otp.code_hash, self.Otp._hash_code(self.phone, code))
+
+        self.assertEqual(self.Otp._verify(self.phone, self._wrong(code)), "invalid")
+        self.assertEqual(self.Otp._verify(self.phone, code), "ok")
+        self.assertEqual(self.Otp._verify(self.phone, code), "invalid")  # used up
+
+    def test_locked_after_max_attempts(self):
+        code = self.Otp._issue(self.phone)
+        for _attempt in range(OTP_MAX_ATTEMPTS):
+            self.assertEqual(self.Otp._verify(self.phone, self._wrong(code)), "invalid")
+        self.assertEqual(self.Otp._verify(self.phone, code), "locked")
+
+        # a new code starts over
+        code = self.Otp._issue(self.phone)
+        self.assertEqual(self.Otp._verify(self.phone, code), "ok")
+
+    def test_expired_code(self):
+        code = self.Otp._issue(self.phone)
+        self.env.cr.execute(
+            "UPDATE visitor_otp SET expires_at = (now() at time zone 'UTC') - interval '1 second' WHERE phone = %s",
+            [self.phone])
+        self.assertEqual(self.Otp._verify(self.phone, code), "expired")
+
+
+@tagged('post_install', '-at_install')
+class TestVisitorRateLimit(TransactionCase):
+    """_consume commits in its own transaction, so the buckets are removed in the cleanup."""
+
+    def setUp(self):
+        super().setUp()
+        self.RateLimit = self.env['visitor.rate.limit']
+        # two tokens, no noticeable refill during the test
+        patcher = patch.dict(RATE_LIMITS, {'test_bucket': (2, 1 / 3600.0)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.subject = f"test-{id(self)}"
+        self.addCleanup(self._execute, "DELETE FROM visitor_rate_limit WHERE key = %s", [f"test_bucket:{self.subject}"])
+
+    def _execute(self, query, params):
+        with self.env.registry.cursor() as cr:
+            cr.execute(query, params)
+
+    def test_bucket_empties_and_refills(self):
+        self.assertTrue(self.RateLimit._consume('test_bucket', self.subject))
+        self.assertTrue(self.RateLimit._consume('test_bucket', self.subject))
+        self.assertFalse(self.RateLimit._consume('test_bucket', self.subject))
+        # other subjects have their own bucket
+        self.addCleanup(self._execute, "DELETE FROM visitor_rate_limit WHERE key = %s",
+                        [f"test_bucket:{self.subject}-other"])
+        self.assertTrue(self.RateLimit._consume('test_bucket', f"{self.subject}-other"))
+
+        # one hour later one token is back, and only one
+        self._execute("""
+            UPDATE visitor_rate_limit SET updated_at = updated_at - interval '1 hour' WHERE key = %s
+        """, [f"test_bucket:{self.subject}"])
+        self.assertTrue(self.RateLimit._consume('test_bucket', self.subject))
+        self.assertFalse(self.RateLimit._consume('test_bucket', self.subject))
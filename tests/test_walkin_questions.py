@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestWalkinQuestions(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Visit = cls.env['visit.information'].with_context(tracking_disable=True)
+        cls.employee = cls.env['hr.employee'].create({'name': 'Walk-in Host'})
+        cls.location = cls.env['company.location'].create({'name': 'Walk-in Desk', 'company_id': cls.env.company.id})
+        cls.questions = cls.env['company.location.question'].create([
+            {'location_id': cls.location.id, 'question_text': f"Safety question {i}"} for i in range(15)
+        ])
+        cls.phones = iter(range(9100000000, 9199999999))
+
+    def _vals(self, location=None, **vals):
+        return dict({
+            'name': 'Walk-in',
+            'phone': str(next(self.phones)),
+            'employee': self.employee.id,
+            'location_id': (location or self.location).id,
+            'visit_type': 'walkin',
+        }, **vals)
+
+    def _count_queries(self, vals_list):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        self.Visit.create(vals_list)
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - before
+
+    def test_query_count_independent_of_batch_size(self):
+        self._count_queries([self._vals()])  # warm the caches
+        # at most 100 entries per batch: the ORM splits larger INSERTs
+        small = self._count_queries([self._vals() for _i in range(2)])
+        large = self._count_queries([self._vals() for _i in range(6)])
+        self.assertEqual(small, large)
+
+    def test_query_count_independent_of_question_count(self):
+        single = self.env['company.location'].create({'name': 'One Question', 'company_id': self.env.company.id})
+        self.env['company.location.question'].create({'location_id': single.id, 'question_text': "Only question"})
+        self._count_queries([self._vals(single)])
+        one = self._count_queries([self._vals(single) for _i in range(5)])
+        fifteen = self._count_queries([self._vals() for _i in range(5)])
+        self.assertEqual(one, fifteen)
+
+    def test_one_empty_entry_per_question(self):
+        visits = self.Visit.create([self._vals() for _i in range(3)])
+        for visit in visits:
+            self.assertEqual(visit.notebook_id.question_id, self.questions)
+            self.assertFalse(any(visit.notebook_id.mapped('answer_selection')))
+
+    def test_answered_questions_kept(self):
+        answered = self.questions[0]
+        visit = self.Visit.create(self._vals(notebook_id=[
+            Command.create({'question_id': answered.id, 'answer_selection': 'yes'}),
+        ]))
+        self.assertEqual(visit.notebook_id.question_id, self.questions)
+        entry = visit.notebook_id.filtered(lambda e: e.question_id == answered)
+        self.assertEqual(entry.answer_selection, 'yes')
+
+    def test_pre_registered_and_no_location(self):
+        pre = self.Visit.create(self._vals(visit_type='pre'))
+        self.assertFalse(pre.notebook_id)
+        no_location = self.Visit.create(dict(self._vals(), location_id=False))
+        self.assertFalse(no_location.notebook_id)
@@ -2,3 +2,5 @@
 
 from . import cancel
 
+from . import badge_batch
+from . import visit_import
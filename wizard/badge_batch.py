@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+
+class VisitBadgeBatchWizard(models.TransientModel):
+    _name = 'visit.badge.batch.wizard'
+    _description = 'Print Badges for a Day'
+
+    date = fields.Date(string="Date", required=True, default=lambda self: fields.Date.add(fields.Date.context_today(self), days=1))
+    location_id = fields.Many2one("company.location", string="Location", domain="[('company_id', 'in', allowed_company_ids)]")
+
+    def action_print(self):
+        self.ensure_one()
+        visits = self.env['visit.information']._get_day_badge_visits(self.date, self.location_id.id)
+        if not visits:
+            raise UserError(_("No approved visits on %s.") % self.date)
+        url = f"/visitor/badges/batch?date={fields.Date.to_string(self.date)}"
+        if self.location_id:
+            url += f"&location_id={self.location_id.id}"
+        return {
+            "type": "ir.actions.act_url",
+            "url": url,
+            "target": "new",
+        }
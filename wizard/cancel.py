@@ -12,10 +12,9 @@ class VisitCancelWizard(models.TransientModel):
         appointment.cancellation_reason = self.reason
         appointment.status = "cancelled"
         
-        # Send email
-        template = self.env.ref("visitor_management.email_visit_cancelled")
+        # Queue email; sent by the mail flush worker
         email_values = {'email_from': self.env.user.email}
-        template.send_mail(appointment.id, force_send=True, email_values=email_values)
+        appointment._queue_mail("visitor_management.email_visit_cancelled", 'cancel', email_values=email_values)
         
         
  
\ No newline at end of file
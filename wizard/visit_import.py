@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class VisitImportWizard(models.TransientModel):
+    _name = 'visit.import.wizard'
+    _description = 'Import Pre-Registered Visitors'
+
+    file = fields.Binary(string="File", required=True)
+    filename = fields.Char(string="File Name")
+    state = fields.Selection([("draft", "Draft"), ("done", "Done")], default="draft")
+    result = fields.Text(string="Result", readonly=True)
+
+    def _read_rows(self):
+        content = base64.b64decode(self.file)
+        name = (self.filename or '').lower()
+        if name.endswith('.xlsx'):
+            if openpyxl is None:
+                raise UserError(_("Reading .xlsx files requires the openpyxl library."))
+            sheet = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True).active
+            values = sheet.iter_rows(values_only=True)
+            header = [str(h or '').strip().lower() for h in next(values, [])]
+            return [dict(zip(header, row)) for row in values if any(row)]
+        if name.endswith('.csv'):
+            reader = csv.DictReader(io.StringIO(content.decode('utf-8-sig')))
+            return [{(k or '').strip().lower(): v for k, v in row.items()} for row in reader]
+        raise UserError(_("Please upload a .csv or .xlsx file."))
+
+    def action_import(self):
+        self.ensure_one()
+        rows = self._read_rows()
+        if not rows:
+            raise UserError(_("The file has no rows."))
+
+        result = self.env['visit.information']._import_preregistrations(rows)
+        lines = [_("%(created)s of %(total)s visitors registered.", created=result["created"], total=len(rows))]
+        for entry in result["rows"]:
+            if entry["status"] == "duplicate":
+                lines.append(_("Row %(row)s: already registered (visit %(id)s)", row=entry["row"], id=entry["id"]))
+            elif entry["status"] == "error":
+                lines.append(_("Row %(row)s: %(errors)s", row=entry["row"], errors="; ".join(entry["errors"])))
+
+        self.write({'state': 'done', 'result': "\n".join(lines)})
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }